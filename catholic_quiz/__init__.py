@@ -0,0 +1,25 @@
+"""Python tooling for the Definitive Catholic Theology Quiz.
+
+The quiz itself is a single self-contained page; this package reads the data
+tables out of the page source (``catholic_quiz_IMPROVED.py``) and builds
+``index.html`` from it.
+"""
+
+from .jsliteral import JSParseError
+from .model import SOURCE_PAGE, CategoryIndex, QuizModel, load_model, load_tables, load_tables_cached, read_page
+from .scoring import WeightMatrix, calculate_scores, hybrid_scores, rank_schools
+
+__all__ = [
+    "CategoryIndex",
+    "JSParseError",
+    "QuizModel",
+    "SOURCE_PAGE",
+    "WeightMatrix",
+    "calculate_scores",
+    "hybrid_scores",
+    "load_model",
+    "load_tables",
+    "load_tables_cached",
+    "rank_schools",
+    "read_page",
+]
@@ -0,0 +1,33 @@
+"""Command line entry point: ``python -m catholic_quiz <command> ...``."""
+
+from __future__ import annotations
+
+import sys
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    commands = {
+        "bench": "catholic_quiz.bench",
+        "build": "catholic_quiz.build",
+        "dist": "catholic_quiz.dist",
+        "explain": "catholic_quiz.explain",
+        "ingest": "catholic_quiz.ingest",
+        "jsbench": "catholic_quiz.jsbench",
+        "proxy": "catholic_quiz.proxy",
+        "search": "catholic_quiz.search",
+        "share": "catholic_quiz.share",
+        "stats": "catholic_quiz.stats",
+        "store": "catholic_quiz.store",
+        "validate": "catholic_quiz.validate",
+    }
+    if not argv or argv[0] not in commands:
+        print(f"usage: python -m catholic_quiz {{{','.join(commands)}}} ...", file=sys.stderr)
+        return 2
+    import importlib
+
+    return importlib.import_module(commands[argv[0]]).main(argv[1:])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,303 @@
+"""Benchmarks for the parsing, scoring, ranking and selection hot paths.
+
+Each case runs once to warm up, then for a few rounds of enough calls to
+last :data:`MIN_ROUND` seconds; a round's time is divided by its calls.
+The results are written as JSON and compared against a stored baseline: a
+case whose best round is more than ``--threshold`` slower than the
+baseline's is a regression, and the command exits with status 1::
+
+    python -m catholic_quiz bench --save-baseline   # record this machine's timings
+    python -m catholic_quiz bench                   # later: compare against them
+    python -m catholic_quiz bench -k batch          # only the batch scoring cases
+
+Baselines are only comparable on the machine (and Python) that wrote them,
+so they live in the cache directory rather than the repository.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from .model import (CACHE_DIR, QUIZ_LENGTHS, SOURCE_PAGE, QuizModel, load_tables, load_tables_cached, read_page,
+                    select_questions)
+from .ingest import IngestQueue, SegmentLog
+from .scoring import WeightMatrix, calculate_scores, hybrid_scores, rank_schools, score_batches
+from .share import ShareCodec, token_bytes
+
+BENCH_DIR = CACHE_DIR / "bench"
+MIN_ROUND = 0.1
+SEED = 1
+BATCH_SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+# The page shows the top five schools.
+TOP_K = 5
+# Submissions per ingest round, each queued on its own as an HTTP request would be.
+INGEST_RECORDS = 100_000
+
+
+def random_columns(matrix: WeightMatrix, selected: list[int], n: int, seed: int = SEED) -> list[bytes]:
+    """Answer columns (see :func:`score_batches`) for ``n`` random respondents who answered everything."""
+    rng = random.Random(seed)
+    columns = []
+    for q in selected:
+        k = matrix.option_count(q)
+        columns.append(rng.randbytes(n).translate(bytes(b % k + 1 for b in range(256))))
+    return columns
+
+
+class Case:
+    """A named benchmark: ``setup()`` does the untimed work and returns the
+    function to time; ``items`` is how many things one call processes."""
+
+    __slots__ = ("name", "setup", "items")
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], Any]], items: int = 1):
+        self.name = name
+        self.setup = setup
+        self.items = items
+
+
+class Fixture:
+    """Inputs shared between cases, built on first use."""
+
+    def __init__(self, source: Path):
+        self.path = source
+        self._source: str | None = None
+        self._tables: dict[str, Any] | None = None
+        self._matrix: WeightMatrix | None = None
+        self._model: QuizModel | None = None
+
+    @property
+    def source(self) -> str:
+        if self._source is None:
+            self._source = read_page(self.path)
+        return self._source
+
+    @property
+    def tables(self) -> dict[str, Any]:
+        if self._tables is None:
+            self._tables = load_tables(self.source)
+        return self._tables
+
+    @property
+    def matrix(self) -> WeightMatrix:
+        if self._matrix is None:
+            self._matrix = WeightMatrix.from_tables(self.tables)
+        return self._matrix
+
+    @property
+    def model(self) -> QuizModel:
+        if self._model is None:
+            self._model = QuizModel(self.tables)
+        return self._model
+
+    def respondent(self) -> tuple[list[int], list[int]]:
+        """Every question, answered at random."""
+        selected = list(range(len(self.model.questions)))
+        rng = random.Random(SEED)
+        return selected, [rng.randrange(self.matrix.option_count(q)) for q in selected]
+
+
+def cases(fixture: Fixture) -> list[Case]:
+    def parse():
+        source = fixture.source
+        return lambda: load_tables(source)
+
+    def parse_cached():
+        cache_dir = tempfile.mkdtemp(prefix="catholic-quiz-bench-")
+        load_tables_cached(fixture.path, cache_dir=cache_dir)
+        return lambda: load_tables_cached(fixture.path, cache_dir=cache_dir)
+
+    def compile_weights():
+        tables = fixture.tables
+        return lambda: WeightMatrix.from_tables(tables)
+
+    def score_one():
+        matrix, (selected, answers) = fixture.matrix, fixture.respondent()
+        return lambda: hybrid_scores(matrix, calculate_scores(matrix, selected, answers))
+
+    def rank():
+        matrix, (selected, answers) = fixture.matrix, fixture.respondent()
+        hybrid = hybrid_scores(matrix, calculate_scores(matrix, selected, answers))
+        return lambda: rank_schools(matrix, hybrid)[:TOP_K]
+
+    def batch(n: int):
+        def setup():
+            matrix = fixture.matrix
+            selected = list(range(len(fixture.model.questions)))
+            columns = random_columns(matrix, selected, n)
+
+            def run():
+                for _ in score_batches(matrix, selected, columns):
+                    pass
+            return run
+        return setup
+
+    def selection(length: int):
+        def setup():
+            model, rng = fixture.model, random.Random(SEED)
+            return lambda: select_questions(model, length, rng)
+        return setup
+
+    def ingest():
+        payload = token_bytes(ShareCodec.from_tables(fixture.tables).encode(*fixture.respondent()))
+
+        async def submit_all(directory: str) -> None:
+            log = SegmentLog(Path(directory), fsync="off")
+            queue = IngestQueue(log)
+            writer = asyncio.create_task(queue.run())
+            await asyncio.gather(*(queue.submit([payload]) for _ in range(INGEST_RECORDS)))
+            await queue.stop()
+            await writer
+            log.close()
+
+        def run():
+            with tempfile.TemporaryDirectory(prefix="catholic-quiz-bench-") as directory:
+                asyncio.run(submit_all(directory))
+        return run
+
+    return [
+        Case("parse_tables", parse),
+        Case("parse_tables_cached", parse_cached),
+        Case("compile_weights", compile_weights),
+        Case("score_one", score_one),
+        Case(f"rank_top{TOP_K}", rank),
+        *(Case(f"score_batch_{label}", batch(n), n) for label, n in BATCH_SIZES.items()),
+        *(Case(f"select_{length}", selection(length)) for length in QUIZ_LENGTHS),
+        Case("ingest_100k", ingest, INGEST_RECORDS),
+    ]
+
+
+def measure(fn: Callable[[], Any], repeat: int, budget: float) -> tuple[list[float], int]:
+    """Per-call times of up to ``repeat`` rounds, fewer if they and the
+    warm-up call would exceed ``budget`` seconds, and the calls per round."""
+    started = time.perf_counter()
+    fn()
+    first = time.perf_counter() - started
+    loops = max(1, int(MIN_ROUND / first)) if first > 0 else 1000
+    rounds = max(1, min(repeat, int((budget - first) / (first * loops)) if first > 0 else repeat))
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - started) / loops)
+    return times, loops
+
+
+def run_cases(selected: list[Case], repeat: int, budget: float, log=print) -> dict[str, dict[str, Any]]:
+    results = {}
+    for case in selected:
+        times, loops = measure(case.setup(), repeat, budget)
+        results[case.name] = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "rounds": len(times),
+            "loops": loops,
+            "items": case.items,
+        }
+        log(format_result(case.name, results[case.name]))
+    return results
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def format_result(name: str, result: dict[str, Any]) -> str:
+    line = f"{name:<22} {format_seconds(result['min']):>10} min {format_seconds(result['median']):>10} median"
+    if result["items"] > 1:
+        line += f"  {format_seconds(result['min'] / result['items'])}/item"
+    return line
+
+
+def compare(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]],
+            threshold: float) -> list[tuple[str, float, bool]]:
+    """``(case, current / baseline, regressed)`` for every case in both, by best round."""
+    rows = []
+    for name, result in results.items():
+        if name in baseline and baseline[name]["min"] > 0:
+            ratio = result["min"] / baseline[name]["min"]
+            rows.append((name, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def read_results(path: Path) -> dict[str, dict[str, Any]]:
+    """The per-case results of a results or baseline file, or {} if there is none."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["results"]
+    except FileNotFoundError:
+        return {}
+
+
+def write_results(path: Path, results: dict[str, Any], **meta: Any) -> None:
+    """Write ``results`` with the machine they were measured on (and any ``meta``)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        **meta,
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz bench", description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="patterns", action="append", default=[],
+                        help="only run cases whose name contains this (repeatable)")
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per case (default: %(default)s)")
+    parser.add_argument("--budget", type=float, default=30.0,
+                        help="seconds per case before rounds are cut short (default: %(default)s)")
+    parser.add_argument("-o", "--output", default=BENCH_DIR / "results.json", type=Path,
+                        help="results file (default: %(default)s)")
+    parser.add_argument("--baseline", default=BENCH_DIR / "baseline.json", type=Path,
+                        help="baseline to compare against (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    selected = [c for c in cases(Fixture(args.source))
+                if not args.patterns or any(p in c.name for p in args.patterns)]
+    if args.list or not selected:
+        for case in selected:
+            print(case.name)
+        return 0 if selected else 1
+    results = run_cases(selected, args.repeat, args.budget)
+    write_results(args.output, results)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        write_results(args.baseline, {**read_results(args.baseline), **results})
+        print(f"baseline written to {args.baseline}")
+        return 0
+    baseline = read_results(args.baseline)
+    if not baseline:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one", file=sys.stderr)
+        return 0
+    rows = compare(results, baseline, args.threshold)
+    for name, ratio, regressed in rows:
+        print(f"{name:<22} {ratio:6.2f}x baseline" + ("  REGRESSION" if regressed else ""))
+    regressions = [name for name, _, regressed in rows if regressed]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}",
+              file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,593 @@
+"""Build ``index.html`` from the page source.
+
+The source page carries an empty ``// @generated:begin`` / ``// @generated:end``
+region in its script. Each stage in :data:`STAGES` contributes a block of
+JavaScript derived from the data tables; the blocks are spliced into that
+region and the result is written to ``index.html``. Stages that generate
+markup instead fill ``BuildContext.markup[name]``, which replaces the
+``<!-- @generated:begin name -->`` region of the same name. Checks that do not
+emit code append to ``BuildContext.warnings`` (reported) or ``errors`` (fatal).
+
+Tables listed in ``BuildContext.deferred`` are cut from the script and shipped
+as JSON blocks instead (see :data:`LAZY_TABLES`). The size of the remaining
+startup script is checked against a budget (:data:`SCRIPT_BUDGET`, or
+``--script-budget``); ``--sizes`` prints it per section. The service worker
+(``sw.js``, see :mod:`catholic_quiz.offline`) is written next to the page.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from . import explain, jsruntime, offline
+from .jsliteral import JSParseError, find_declaration
+from .retrieval import FUNCTION_WORDS, NOISE_WORDS, RetrievalIndex
+from .search import SearchIndex
+from .share import ShareCodec
+from .model import ALL_TABLES, CACHE_DIR, ROOT, SOURCE_PAGE, CategoryIndex, QuizModel, bank_hash
+from .scoring import (WeightMatrix, answer_improvements, answer_rows, answer_sensitivity, calculate_scores,
+                      derived_school_stats, hybrid_scores, rank_schools, school_contributions)
+from .validate import validate_path, validate_source
+
+OUTPUT_PAGE = ROOT / "index.html"
+
+_GENERATED = re.compile(r"(// @generated:begin\n).*?(// @generated:end)", re.DOTALL)
+_MARKUP_REGION = r"(<!-- @generated:begin {0} -->\n).*?(^[ \t]*<!-- @generated:end {0} -->)"
+
+
+class BuildError(Exception):
+    """The source failed a build check; ``errors`` lists every problem found."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__(f"{len(errors)} build error(s):\n" + "\n".join(errors))
+        self.errors = errors
+
+
+class BuildContext:
+    """Parsed tables plus everything the stages derive from them.
+
+    The tables are validated while parsing; derived structures are built on
+    first use so that a schema error is reported before anything trips on it.
+    """
+
+    __slots__ = ("source", "tables", "issues", "markup", "deferred", "warnings", "errors", "_matrix",
+                 "_categories", "_model", "_retrieval", "_search")
+
+    def __init__(self, source: str, filename: str | Path = SOURCE_PAGE.name,
+                 validated: tuple[list, dict[str, Any]] | None = None):
+        self.source = source
+        self.issues, self.tables = validated or validate_source(source, filename)
+        self.markup: dict[str, str] = {}
+        self.deferred: list[str] = []
+        self.warnings: list[str] = []
+        self.errors: list[str] = []
+        self._matrix: WeightMatrix | None = None
+        self._categories: CategoryIndex | None = None
+        self._model: QuizModel | None = None
+        self._retrieval: RetrievalIndex | None = None
+        self._search: SearchIndex | None = None
+
+    @classmethod
+    def from_path(cls, path: str | Path, cache_dir: str | Path | None = CACHE_DIR) -> "BuildContext":
+        """Context for the page at ``path``, reusing the parse cache."""
+        issues, tables, source_map = validate_path(path, cache_dir=cache_dir)
+        return cls(source_map.source, path, (issues, tables))
+
+    @property
+    def matrix(self) -> WeightMatrix:
+        if self._matrix is None:
+            self._matrix = WeightMatrix.from_tables(self.tables)
+        return self._matrix
+
+    @property
+    def categories(self) -> CategoryIndex:
+        if self._categories is None:
+            self._categories = CategoryIndex.from_tables(self.tables)
+        return self._categories
+
+    @property
+    def model(self) -> QuizModel:
+        if self._model is None:
+            self._model = QuizModel(self.tables)
+        return self._model
+
+    @property
+    def retrieval(self) -> RetrievalIndex:
+        if self._retrieval is None:
+            self._retrieval = RetrievalIndex.from_model(self.model)
+        return self._retrieval
+
+    @property
+    def search(self) -> SearchIndex:
+        if self._search is None:
+            self._search = SearchIndex(self.model)
+        return self._search
+
+
+# ---------------------------------------------------------------------------
+# JavaScript emitters
+# ---------------------------------------------------------------------------
+
+def js_typed_array(kind: str, values: Iterable[float | int]) -> str:
+    return f"new {kind}([{','.join(map(repr, values))}])"
+
+
+def js_const(name: str, value: str) -> str:
+    return f"const {name} = {value};"
+
+
+def js_value(value: Any) -> str:
+    """A JSON-compatible value as a JavaScript literal."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def emit_scoring_tables(ctx: BuildContext) -> str:
+    """Reciprocal normalisers and the eligibility mask, indexed like SCHOOLS."""
+    m = ctx.matrix
+    return "\n".join([
+        "// 1 / MAX_POSSIBLE_SCORES and 1 / SCHOOL_QUESTION_COUNTS per school index",
+        js_const("SCHOOL_INV_MAX_POSSIBLE", js_typed_array("Float64Array", m.inv_max_possible)),
+        js_const("SCHOOL_INV_QUESTION_COUNT", js_typed_array("Float64Array", m.inv_question_count)),
+        "// 1 where SCHOOL_QUESTION_COUNTS >= MIN_QUESTIONS_THRESHOLD",
+        js_const("SCHOOL_ELIGIBLE", js_typed_array("Uint8Array", m.eligible)),
+    ])
+
+
+_ROMAN = [(1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"),
+          (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]
+
+
+def roman(n: int) -> str:
+    out = []
+    for value, numeral in _ROMAN:
+        count, n = divmod(n, value)
+        out.append(numeral * count)
+    return "".join(out)
+
+
+OPTION_SHELL_INDENT = " " * 24
+
+
+def emit_question_shell(ctx: BuildContext) -> str:
+    """Static option nodes for #options plus the question-number labels.
+
+    Every question is displayed in the same shell of ``OPTION_SLOTS`` labels
+    (the longest option list); the runtime fills in texts and hides unused
+    slots, so navigation never re-parses option markup.
+    """
+    slots = max(len(q["options"]) for q in ctx.tables["QUESTIONS"])
+    ctx.markup["option-shell"] = "".join(
+        f'{OPTION_SHELL_INDENT}<label class="option hidden" onclick="selectOption({i})">'
+        f'<input type="radio" name="answer" value="{i}"><div class="option-radio"></div>'
+        f'<span class="option-text"></span></label>\n'
+        for i in range(slots)
+    )
+    numerals = [roman(i + 1) for i in range(len(ctx.tables["QUESTIONS"]))]
+    return "\n".join([
+        js_const("OPTION_SLOTS", str(slots)),
+        "// Question numbers by position in the form",
+        js_const("ROMAN_NUMERALS", js_value(numerals)),
+    ])
+
+
+# Saved progress keeps one hex digit per answer: the option + 1, 0 if unanswered.
+MAX_OPTIONS = 15
+
+
+def emit_bank_hash(ctx: BuildContext) -> str:
+    """The question bank's fingerprint, which saved progress is tied to."""
+    longest = max(len(q["options"]) for q in ctx.tables["QUESTIONS"])
+    if longest > MAX_OPTIONS:
+        ctx.errors.append(f"a question has {longest} options; saved answers hold at most {MAX_OPTIONS}")
+    return "\n".join([
+        "// Fingerprint of QUESTIONS (catholic_quiz.model.bank_hash)",
+        js_const("BANK_HASH", js_value(bank_hash(ctx.tables))),
+    ])
+
+
+def emit_category_index(ctx: BuildContext) -> str:
+    """QUESTION_CATEGORY[q] = index into CATEGORIES (validated to be exactly one)."""
+    return "\n".join([
+        "// CATEGORIES index of each question",
+        js_const("QUESTION_CATEGORY", js_typed_array("Uint8Array", ctx.categories.category_of)),
+    ])
+
+
+def emit_retrieval_index(ctx: BuildContext) -> str:
+    """The BM25 index over the reference passages (see catholic_quiz.retrieval).
+
+    Passage ``i`` is found through ``RETRIEVAL_REFS[i]``. Term ``t`` (its
+    position in ``RETRIEVAL_TERMS``) has ``RETRIEVAL_COUNTS[t]`` postings,
+    stored after those of the terms before it as passage-id gaps
+    (``RETRIEVAL_GAPS``) and term frequencies (``RETRIEVAL_FREQS``).
+    """
+    index = ctx.retrieval.js_tables()
+    return "\n".join([
+        "// Reference passages: [\"c\", CITATIONS key, i] | [\"t\", QUESTION_TOPICS key] | [\"s\" | \"f\", school code]",
+        js_const("RETRIEVAL_REFS", js_value(index["refs"])),
+        "// Index terms (sorted, space-separated), then their postings",
+        js_const("RETRIEVAL_TERMS", js_value(index["terms"])),
+        js_const("RETRIEVAL_COUNTS", js_typed_array("Uint16Array", index["counts"])),
+        js_const("RETRIEVAL_GAPS", js_typed_array("Uint16Array", index["gaps"])),
+        js_const("RETRIEVAL_FREQS", js_typed_array("Uint8Array", index["freqs"])),
+        "// Token count of each passage",
+        js_const("RETRIEVAL_LENGTHS", js_typed_array("Uint16Array", index["lengths"])),
+        "// Left out of the index: FUNCTION_WORDS always, RETRIEVAL_NOISE_WORDS for retrieval",
+        js_const("FUNCTION_WORDS", js_value(" ".join(sorted(FUNCTION_WORDS)))),
+        js_const("RETRIEVAL_NOISE_WORDS", js_value(" ".join(sorted(NOISE_WORDS)))),
+    ])
+
+
+def emit_search_index(ctx: BuildContext) -> str:
+    """The full-text index behind the search box (see catholic_quiz.search)."""
+    index = ctx.search
+    return "\n".join([
+        "// Search terms (sorted, space-separated) and their postings: per term a",
+        "// varint count, then varint gaps between document ids (schools, questions, options)",
+        js_const("SEARCH_TERMS", js_value(" ".join(index.terms))),
+        js_const("SEARCH_POSTINGS", js_value(index.encode_base64())),
+    ])
+
+
+# Tables only needed for results and sources, kept off the startup path.
+LAZY_TABLES = ("SCHOOL_FIGURES", "HETERODOXY_STATUS", "CITATIONS")
+
+
+def json_block(element_id: str, value: Any) -> str:
+    """``value`` as an inert ``<script type="application/json">`` element.
+
+    ``<``, ``>`` and ``&`` are escaped so the text can never close the
+    element early.
+    """
+    text = js_value(value).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+    return f'    <script type="application/json" id="{element_id}">{text}</script>\n'
+
+
+def emit_lazy_tables(ctx: BuildContext) -> None:
+    """Move :data:`LAZY_TABLES` from the script into JSON blocks for lazyTable().
+
+    The browser only tokenizes a JSON block while loading the page; it is
+    parsed the first time the page asks for the table.
+    """
+    ctx.markup["lazy-tables"] = "".join(json_block(f"table-{name}", ctx.tables[name]) for name in LAZY_TABLES)
+    ctx.deferred.extend(LAZY_TABLES)
+
+
+def check_school_stats(ctx: BuildContext) -> None:
+    """Warn where MAX_POSSIBLE_SCORES / SCHOOL_QUESTION_COUNTS drifted from QUESTIONS."""
+    derived_max, derived_counts = derived_school_stats(ctx.tables)
+    for name, table, derived in (
+        ("MAX_POSSIBLE_SCORES", ctx.tables["MAX_POSSIBLE_SCORES"], derived_max),
+        ("SCHOOL_QUESTION_COUNTS", ctx.tables["SCHOOL_QUESTION_COUNTS"], derived_counts),
+    ):
+        stale = [code for code in derived if table.get(code) != derived[code]]
+        if stale:
+            sample = ", ".join(f"{c}: {table.get(c)} vs {derived[c]}" for c in stale[:5])
+            ctx.warnings.append(
+                f"{name} disagrees with QUESTIONS for {len(stale)} school(s) (table vs derived: {sample}, ...)"
+            )
+
+
+def check_explanations(ctx: BuildContext) -> None:
+    """Warn about pre-generated explanations whose question or prompt has changed."""
+    try:
+        entries = explain.read_chunk()
+    except ValueError as exc:
+        ctx.warnings.append(str(exc))
+        return
+    stale = explain.stale_entries(ctx.model, entries, ctx.retrieval)
+    if stale:
+        ctx.warnings.append(
+            f"{len(stale)} explanation(s) in {explain.EXPLANATIONS_CHUNK.name} are out of date "
+            f"(questions {', '.join(sorted(stale, key=int)[:10])}); run python -m catholic_quiz explain"
+        )
+
+
+def check_schema(ctx: BuildContext) -> None:
+    """Fail on any schema or cross-reference problem found by the validator."""
+    ctx.errors.extend(map(str, ctx.issues))
+
+
+Stage = Callable[[BuildContext], "str | None"]
+
+STAGES: list[Stage] = [
+    check_schema,
+    check_school_stats,
+    check_explanations,
+    emit_scoring_tables,
+    emit_question_shell,
+    emit_bank_hash,
+    emit_category_index,
+    emit_retrieval_index,
+    emit_search_index,
+    emit_lazy_tables,
+]
+
+
+def render(ctx: BuildContext, stages: Iterable[Stage] = STAGES) -> str:
+    blocks = []
+    for stage in stages:
+        block = stage(ctx)
+        if ctx.errors:
+            raise BuildError(ctx.errors)
+        if block:
+            blocks.append(block)
+    body = "// Generated by catholic_quiz_build.py. Do not edit; edit the source page instead.\n"
+    body += "\n\n".join(blocks) + "\n"
+    html = ctx.source
+    for name in ctx.deferred:
+        start, end = find_declaration(html, name)
+        html = html[:start] + f"// {name} is loaded by lazyTable()\n" + html[end:]
+    html, n = _GENERATED.subn(lambda m: m.group(1) + body + m.group(2), html, count=1)
+    if n != 1:
+        raise BuildError(["source page has no // @generated:begin ... // @generated:end region"])
+    for name, markup in ctx.markup.items():
+        region = re.compile(_MARKUP_REGION.format(re.escape(name)), re.DOTALL | re.MULTILINE)
+        html, n = region.subn(lambda m: m.group(1) + markup + m.group(2), html, count=1)
+        if n != 1:
+            raise BuildError([f"source page has no <!-- @generated:begin {name} --> region"])
+    return html
+
+
+# ---------------------------------------------------------------------------
+# Startup size
+# ---------------------------------------------------------------------------
+
+# Bytes of inline script the browser must parse before the page responds.
+SCRIPT_BUDGET = 440_000
+
+
+def startup_sizes(html: str) -> tuple[list[tuple[str, int]], list[tuple[str, int]]]:
+    """UTF-8 sizes of the startup script's sections and of the deferred tables.
+
+    Each data table still declared in the script is a section, as is the
+    generated region; everything else counts as ``code``. Both lists are
+    largest first.
+    """
+    script = jsruntime.page_script(html)
+    sections = []
+    for name in ALL_TABLES:
+        try:
+            start, end = find_declaration(script, name)
+        except JSParseError:
+            continue
+        sections.append((name, len(script[start:end].encode("utf-8"))))
+    generated = _GENERATED.search(script)
+    if generated:
+        sections.append(("(generated)", len(generated.group(0).encode("utf-8"))))
+    sections.append(("(code)", len(script.encode("utf-8")) - sum(size for _, size in sections)))
+    deferred = [(element_id.removeprefix("table-"), len(text.encode("utf-8")))
+                for element_id, text in jsruntime.data_blocks(html).items()]
+    by_size = lambda item: -item[1]
+    return sorted(sections, key=by_size), sorted(deferred, key=by_size)
+
+
+def format_sizes(sections: list[tuple[str, int]], deferred: list[tuple[str, int]]) -> list[str]:
+    total = sum(size for _, size in sections)
+    lines = [f"{name:<24} {size:>9,}  {size / total:6.1%}" for name, size in sections]
+    lines.append(f"{'startup script':<24} {total:>9,}")
+    lines += [f"{name + ' (lazy)':<24} {size:>9,}" for name, size in deferred]
+    return lines
+
+
+def check_script_budget(sections: list[tuple[str, int]], budget: int) -> list[str]:
+    """An error if the startup script is over ``budget`` bytes, naming its largest sections."""
+    total = sum(size for _, size in sections)
+    if total <= budget:
+        return []
+    largest = ", ".join(f"{name} {size:,}" for name, size in sections[:3])
+    return [f"startup script is {total:,} bytes, over the {budget:,}-byte budget (largest: {largest})"]
+
+
+# ---------------------------------------------------------------------------
+# Cross-check against the browser engine
+# ---------------------------------------------------------------------------
+
+_SCORING_DRIVER = """
+const __cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+console.log(JSON.stringify(__cases.map(c => {
+    selectedQuestions = c.selected;
+    answers = c.answers;
+    calculateScores();
+    indexAnswers();
+    const ranked = rankSchools();
+    const contributions = ranked.slice(0, 3).map(s => schoolContributions(s).map(c => [c.q, c.option, c.weight]));
+    const improvements = ranked.slice(0, 3).map(s => schoolImprovements(s).map(c => [c.q, c.option, c.gain]));
+    const sensitivity = answerSensitivity(ranked).map(r => [r.q, r.option, r.rival, r.margin]);
+    return { ranked, hybrid: Array.from(hybridScores), axes: Array.from(axisScores), contributions, improvements,
+             sensitivity };
+})));
+"""
+
+
+def sample_answer_sheets(tables: dict[str, Any], count: int, seed: int = 1) -> list[dict[str, list]]:
+    """Deterministic random respondents covering short and complete forms."""
+    rng = random.Random(seed)
+    questions = tables["QUESTIONS"]
+    cases = []
+    for _ in range(count):
+        selected = sorted(rng.sample(range(len(questions)), rng.randint(1, len(questions))))
+        answers = [
+            None if rng.random() < 0.1 else rng.randrange(len(questions[q]["options"]))
+            for q in selected
+        ]
+        cases.append({"selected": selected, "answers": answers})
+    return cases
+
+
+def cross_check_js(html: str, ctx: BuildContext, count: int = 64) -> list[str]:
+    """Score sample sheets in node and in Python; return any disagreements."""
+    cases = sample_answer_sheets(ctx.tables, count)
+    results = jsruntime.run_with_driver(html, _SCORING_DRIVER, cases)
+    problems = []
+    m = ctx.matrix
+    option_counts = [len(q["options"]) for q in ctx.tables["QUESTIONS"]]
+    for i, (case, js) in enumerate(zip(cases, results)):
+        sheet = calculate_scores(m, case["selected"], case["answers"])
+        hybrid = hybrid_scores(m, sheet)
+        if list(hybrid) != js["hybrid"]:
+            problems.append(f"sheet {i}: hybrid scores differ")
+        ranked = rank_schools(m, hybrid)
+        if ranked != js["ranked"]:
+            problems.append(f"sheet {i}: rankings differ")
+        rows = answer_rows(m, case["selected"], case["answers"])
+        if [[list(c) for c in school_contributions(m, rows, s)] for s in ranked[:3]] != js["contributions"]:
+            problems.append(f"sheet {i}: answer contributions differ")
+        asked = set(case["selected"])
+        if [[list(c) for c in answer_improvements(m, rows, asked, s, option_counts)] for s in ranked[:3]] \
+                != js["improvements"]:
+            problems.append(f"sheet {i}: answer improvements differ")
+        sensitivity = answer_sensitivity(m, sheet, hybrid, ranked, case["selected"], case["answers"])
+        if [list(r) for r in sensitivity] != js["sensitivity"]:
+            problems.append(f"sheet {i}: answer sensitivity differs")
+        if list(sheet.axis_scores) != js["axes"]:
+            problems.append(f"sheet {i}: axis scores differ")
+    return problems
+
+
+_RETRIEVAL_DRIVER = """
+const __queries = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+console.log(JSON.stringify(__queries.map(q => retrievePassages(q, 8).map(r => [r.doc, r.score, r.text]))));
+"""
+
+
+def sample_queries(model: QuizModel, count: int, seed: int = 1) -> list[str]:
+    """Question texts and option texts, the kind of text the AI helper retrieves for."""
+    rng = random.Random(seed)
+    queries = []
+    for q in rng.sample(model.questions, min(count, len(model.questions))):
+        queries.append(q.text)
+        queries.append(rng.choice(q.options).text)
+    return queries
+
+
+def cross_check_retrieval(html: str, ctx: BuildContext, count: int = 32) -> list[str]:
+    """Run sample queries through the page's retrievePassages and the Python index."""
+    queries = sample_queries(ctx.model, count)
+    results = jsruntime.run_with_driver(html, _RETRIEVAL_DRIVER, queries)
+    index = ctx.retrieval
+    problems = []
+    for query, js in zip(queries, results):
+        expected = [(index.passages.index(p), score, p.text) for score, p in index.search(query, 8)]
+        if [doc for doc, _, _ in js] != [doc for doc, _, _ in expected]:
+            problems.append(f"retrieval for {query[:40]!r}: passages differ")
+        elif any(abs(a[1] - b[1]) > 1e-9 or a[2] != b[2] for a, b in zip(js, expected)):
+            problems.append(f"retrieval for {query[:40]!r}: scores or passage texts differ")
+    return problems
+
+
+_SEARCH_DRIVER = """
+const __queries = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+console.log(JSON.stringify(__queries.map(q => searchQuiz(q).map(hit => hit.doc))));
+"""
+
+
+def cross_check_search(html: str, ctx: BuildContext) -> list[str]:
+    """Run sample queries (whole words, prefixes, school codes) through searchQuiz and the Python index."""
+    rng = random.Random(1)
+    terms = ctx.search.terms
+    queries = [rng.choice(terms) for _ in range(16)]
+    queries += [term[:3] for term in rng.sample(terms, 8)]
+    queries += [f"{rng.choice(terms)} {rng.choice(terms)[:4]}" for _ in range(8)]
+    queries += [school.code for school in rng.sample(ctx.model.schools, 8)]
+    results = jsruntime.run_with_driver(html, _SEARCH_DRIVER, queries)
+    index = ctx.search
+    problems = []
+    for query, js in zip(queries, results):
+        expected = [hit.doc for hit in index.search(query)]
+        if js != expected:
+            problems.append(f"search for {query!r}: results differ")
+    return problems
+
+
+_SHARE_DRIVER = """
+const __cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+console.log(JSON.stringify(__cases.map(c => ({ token: encodeResults(c.selected, c.answers),
+                                               decoded: decodeResults(c.token) }))));
+"""
+
+
+def cross_check_share(html: str, ctx: BuildContext, count: int = 32) -> list[str]:
+    """Encode sample sheets in node and in Python, and decode each side's tokens on the other."""
+    codec = ShareCodec.from_tables(ctx.tables)
+    cases = sample_answer_sheets(ctx.tables, count, seed=2)
+    cases.append({"selected": list(range(len(ctx.tables["QUESTIONS"]))),
+                  "answers": [0] * len(ctx.tables["QUESTIONS"])})
+    for case in cases:
+        case["token"] = codec.encode(case["selected"], case["answers"])
+    results = jsruntime.run_with_driver(html, _SHARE_DRIVER, cases)
+    problems = []
+    for i, (case, js) in enumerate(zip(cases, results)):
+        if js["token"] != case["token"]:
+            problems.append(f"share sheet {i}: tokens differ")
+        selected, answers = codec.decode(case["token"])
+        if js["decoded"] != {"selected": selected, "answers": answers}:
+            problems.append(f"share sheet {i}: decoded answers differ")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def build(source_path: str | Path = SOURCE_PAGE, output_path: str | Path = OUTPUT_PAGE, *,
+          js_check: bool = True, cache_dir: str | Path | None = CACHE_DIR, script_budget: int = SCRIPT_BUDGET,
+          show_sizes: bool = False, log: Callable[[str], Any] = print) -> BuildContext:
+    started = time.perf_counter()
+    ctx = BuildContext.from_path(source_path, cache_dir)
+    html = render(ctx)
+    for warning in ctx.warnings:
+        log(f"warning: {warning}")
+    sections, deferred = startup_sizes(html)
+    if show_sizes:
+        for line in format_sizes(sections, deferred):
+            log(line)
+    errors = check_script_budget(sections, script_budget)
+    if errors:
+        raise BuildError(errors)
+    if js_check:
+        if jsruntime.find_engine() is None:
+            log("note: node not found; skipped JavaScript scoring cross-check")
+        else:
+            problems = (cross_check_js(html, ctx) + cross_check_retrieval(html, ctx) + cross_check_search(html, ctx)
+                        + cross_check_share(html, ctx))
+            if problems:
+                raise BuildError(["JavaScript engine disagrees with the Python reference:"] + problems)
+    output_path = Path(output_path)
+    output_path.write_text(html, encoding="utf-8")
+    offline.write_service_worker(output_path.parent, [output_path.name])
+    log(f"wrote {output_path} ({len(html.encode('utf-8')):,} bytes; startup script "
+        f"{sum(size for _, size in sections):,} of {script_budget:,}) in {time.perf_counter() - started:.2f}s")
+    return ctx
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="catholic_quiz_build.py", description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_PAGE, type=Path, help="built page (default: %(default)s)")
+    parser.add_argument("--no-js-check", dest="js_check", action="store_false",
+                        help="skip the node cross-check of the scoring engine")
+    parser.add_argument("--no-cache", dest="cache_dir", action="store_const", const=None, default=CACHE_DIR,
+                        help="parse the page even if a cached parse is up to date")
+    parser.add_argument("--script-budget", type=int, default=SCRIPT_BUDGET, metavar="BYTES",
+                        help="fail if the startup script is larger (default: %(default)s)")
+    parser.add_argument("--sizes", action="store_true", help="print the startup script's size per section")
+    args = parser.parse_args(argv)
+    try:
+        build(args.source, args.output, js_check=args.js_check, cache_dir=args.cache_dir,
+              script_budget=args.script_budget, show_sizes=args.sizes)
+    except BuildError as exc:
+        print(exc)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,356 @@
+"""Write a deployable copy of the built page: minified, precompressed, with local fonts.
+
+``index.html`` stays readable in the repository; ``dist`` turns it into the
+files a web server should ship::
+
+    python -m catholic_quiz dist                       # -> dist/
+    python -m catholic_quiz dist --fonts ~/fonts       # also self-host the web fonts
+
+The page's CSS and script are minified (comments and indentation go, line
+breaks stay so automatic semicolon insertion is unaffected) and so is the
+markup's indentation. With ``--fonts``, the Google Fonts stylesheet is
+replaced by ``@font-face`` rules for local copies, subset to the characters
+the page uses when fontTools is installed. A service worker precaching the
+shipped files is written alongside (see :mod:`catholic_quiz.offline`).
+Every text asset gets a ``.gz`` and, when the ``brotli`` module is
+installed, a ``.br`` variant. A size report is printed, and when node is
+available the minified script is cross-checked against the Python
+reference like a normal build.
+"""
+
+from __future__ import annotations
+
+import gzip
+import re
+import shutil
+import sys
+import urllib.parse
+from pathlib import Path
+
+from . import jsruntime, offline
+from .model import ROOT
+
+try:
+    import brotli
+except ImportError:  # optional: only the .br variants need it
+    brotli = None
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:  # optional: fonts are copied whole without it
+    font_subset = None
+
+DIST_DIR = ROOT / "dist"
+FONT_EXTENSIONS = (".woff2", ".woff", ".ttf", ".otf")
+FONT_FORMATS = {".woff2": "woff2", ".woff": "woff", ".ttf": "truetype", ".otf": "opentype"}
+# Extra files shipped next to the page when they exist.
+CHUNKS = offline.DATA_CHUNKS
+
+
+# ---------------------------------------------------------------------------
+# Minification
+# ---------------------------------------------------------------------------
+
+_CSS_TOKEN = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|/\*.*?\*/|([^"'/]+|/)""", re.DOTALL)
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and needless whitespace; strings are left alone."""
+    out = []
+    for m in _CSS_TOKEN.finditer(css):
+        string, code = m.group(1), m.group(2)
+        if string:
+            out.append(string)
+        elif code:
+            code = _CSS_PUNCT.sub(r"\1", re.sub(r"\s+", " ", code))
+            out.append(re.sub(r":\s+", ":", code).replace(";}", "}"))
+    return "".join(out).strip()
+
+
+# After one of these keywords a ``/`` starts a regular expression, not a division.
+_REGEX_KEYWORDS = frozenset("return typeof instanceof in of new delete void throw case do else yield await".split())
+_IDENTIFIER = re.compile(r"[A-Za-z0-9_$]+")
+
+
+def minify_js(js: str) -> str:
+    """Strip comments, blank lines and every space not needed between tokens.
+
+    Strings, template literals and regular expressions are copied verbatim.
+    A space survives only between two identifier characters or between
+    ``+ +`` / ``- -``. Line breaks are kept, so the result parses exactly
+    like the input.
+    """
+    out: list[str] = []
+    i, n = 0, len(js)
+    last = ""  # last significant token, to tell a regex from a division
+    braces: list[bool] = []  # per open brace: whether it opened a template ${...}
+
+    def emit_space() -> None:
+        if out and out[-1] not in " \n":
+            out.append(" ")
+
+    def emit(token: str) -> None:
+        if out and out[-1] == " ":
+            prev = out[-2][-1] if len(out) > 1 else "\n"
+            if prev == "\n" or not (_IDENTIFIER.match(prev) and _IDENTIFIER.match(token)) and not (
+                    prev in "+-" and token[0] == prev):
+                out.pop()
+        out.append(token)
+
+    def emit_newline() -> None:
+        while out and out[-1] == " ":
+            out.pop()
+        if out and out[-1] != "\n":
+            out.append("\n")
+
+    def template(i: int) -> int:
+        """Copy template text from ``i`` up to its end or a ``${``; return the next position."""
+        while i < n:
+            c = js[i]
+            if c == "\\":
+                out.append(js[i:i + 2])
+                i += 2
+            elif c == "`":
+                out.append(c)
+                return i + 1
+            elif js.startswith("${", i):
+                out.append("${")
+                braces.append(True)
+                return i + 2
+            else:
+                out.append(c)
+                i += 1
+        return i
+
+    while i < n:
+        c = js[i]
+        if c in " \t\r":
+            emit_space()
+            i += 1
+        elif c == "\n":
+            emit_newline()
+            i += 1
+        elif js.startswith("//", i):
+            i = js.find("\n", i)
+            i = n if i < 0 else i
+        elif js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            emit_space()
+        elif c in "'\"":
+            j = i + 1
+            while j < n and js[j] != c:
+                j += 2 if js[j] == "\\" else 1
+            emit(js[i:j + 1])
+            i, last = j + 1, "a"
+        elif c == "`":
+            emit(c)
+            i, last = template(i + 1), "a"
+        elif c == "/" and (not last or last in _REGEX_KEYWORDS or not _IDENTIFIER.fullmatch(last) and last not in ")]"):
+            j, in_class = i + 1, False
+            while j < n and (in_class or js[j] != "/"):
+                if js[j] == "\\":
+                    j += 1
+                elif js[j] == "[":
+                    in_class = True
+                elif js[j] == "]":
+                    in_class = False
+                j += 1
+            m = _IDENTIFIER.match(js, j + 1)
+            j = m.end() if m else j + 1
+            emit(js[i:j])
+            i, last = j, "a"
+        else:
+            m = _IDENTIFIER.match(js, i)
+            if m:
+                token = m.group(0)
+                i = m.end()
+            else:
+                token = c
+                i += 1
+                if c == "{":
+                    braces.append(False)
+                elif c == "}" and braces and braces.pop():
+                    emit(c)
+                    i = template(i)
+                    last = "a"
+                    continue
+            emit(token)
+            last = token
+    return "".join(out).strip() + "\n"
+
+
+_BLOCK = re.compile(r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2>)", re.DOTALL)
+_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+
+
+def minify_html(html: str) -> str:
+    """Minify the page's CSS and main script and drop markup indentation and comments."""
+    out, pos = [], 0
+    for m in _BLOCK.finditer(html):
+        out.append(_minify_markup(html[pos:m.start()]))
+        opening, tag, body, closing = m.groups()
+        if tag == "style":
+            body = minify_css(body)
+        elif tag == "script" and opening == "<script>":
+            body = minify_js(body)
+        out.append(opening + body + closing)
+        pos = m.end()
+    out.append(_minify_markup(html[pos:]))
+    return "".join(out)
+
+
+def _minify_markup(markup: str) -> str:
+    return re.sub(r"\n\s+", "\n", _COMMENT.sub("", markup))
+
+
+# ---------------------------------------------------------------------------
+# Fonts
+# ---------------------------------------------------------------------------
+
+_GOOGLE_FONTS = re.compile(r'[ \t]*<link[^>]*href="https://fonts\.(?:googleapis|gstatic)\.com[^"]*"[^>]*>\n?')
+_GOOGLE_CSS = re.compile(r'href="(https://fonts\.googleapis\.com/css2\?[^"]+)"')
+_FONT_URL = re.compile(r"url\(fonts/([^)]+)\)")
+
+
+def google_font_faces(html: str) -> list[tuple[str, str, int]]:
+    """``(family, style, weight)`` for every face the page's Google Fonts link asks for."""
+    m = _GOOGLE_CSS.search(html)
+    if m is None:
+        return []
+    faces = []
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(m.group(1).replace("&amp;", "&")).query)
+    for spec in query.get("family", []):
+        family, _, axes = spec.partition(":")
+        names, _, tuples = axes.partition("@")
+        names = names.split(",")
+        for values in tuples.split(";") if tuples else ["400"]:
+            axis = dict(zip(names, map(int, values.split(","))))
+            faces.append((family, "italic" if axis.get("ital") else "normal", axis.get("wght", 400)))
+    return faces
+
+
+def font_file(font_dir: Path, family: str, style: str, weight: int) -> Path | None:
+    """The local file for a face: ``CrimsonPro-300italic.woff2`` and the like."""
+    stem = f"{family.replace(' ', '')}-{weight}{'italic' if style == 'italic' else ''}"
+    for ext in FONT_EXTENSIONS:
+        path = font_dir / (stem + ext)
+        if path.exists():
+            return path
+    return None
+
+
+def self_host_fonts(html: str, font_dir: Path, out_dir: Path, log=print) -> str:
+    """Point the page at local copies of its Google fonts, if every face is in ``font_dir``."""
+    faces = google_font_faces(html)
+    found = {face: font_file(font_dir, *face) for face in faces}
+    missing = [f"{family} {weight} {style}" for (family, style, weight), path in found.items() if path is None]
+    if not faces or missing:
+        log(f"fonts: keeping Google Fonts; missing in {font_dir}: {', '.join(missing) or 'no faces requested'}")
+        return html
+    text = "".join(sorted(set(html)))
+    (out_dir / "fonts").mkdir(parents=True, exist_ok=True)
+    rules = []
+    for (family, style, weight), path in found.items():
+        target = out_dir / "fonts" / path.name
+        if font_subset is not None:
+            target = target.with_suffix(".woff2" if brotli is not None else ".woff")
+            options = font_subset.Options()
+            options.flavor = target.suffix[1:]
+            font = font_subset.load_font(str(path), options)
+            subsetter = font_subset.Subsetter(options)
+            subsetter.populate(text=text)
+            subsetter.subset(font)
+            font_subset.save_font(font, str(target), options)
+        else:
+            shutil.copyfile(path, target)
+        rules.append(
+            f"@font-face{{font-family:'{family}';font-style:{style};font-weight:{weight};font-display:swap;"
+            f"src:url(fonts/{target.name}) format('{FONT_FORMATS[target.suffix]}')}}"
+        )
+    if font_subset is None:
+        log("fonts: fontTools not installed; copied whole font files")
+    html = _GOOGLE_FONTS.sub("", html)
+    return html.replace("<style>", "<style>" + "".join(rules), 1)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def compressed_variants(path: Path) -> dict[str, int]:
+    """Write ``path.gz`` (and ``path.br`` if brotli is available); their sizes by suffix."""
+    data = path.read_bytes()
+    variants = {".gz": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    for suffix, packed in variants.items():
+        path.with_name(path.name + suffix).write_bytes(packed)
+    return {suffix: len(packed) for suffix, packed in variants.items()}
+
+
+def write_dist(page: Path, out_dir: Path, *, font_dir: Path | None = None, log=print) -> list[tuple]:
+    """Write the minified page, its chunks, the service worker and their variants to ``out_dir``.
+
+    Returns ``(name, original, minified, gzip, brotli or None)`` per asset.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    html = page.read_text(encoding="utf-8")
+    minified = minify_html(html)
+    if font_dir is not None:
+        minified = self_host_fonts(minified, font_dir, out_dir, log)
+    assets = [("index.html", html, minified)]
+    for name in CHUNKS:
+        chunk = page.with_name(name)
+        if chunk.exists():
+            text = chunk.read_text(encoding="utf-8")
+            assets.append((name, text, text))
+    for name, _, text in assets:
+        (out_dir / name).write_text(text, encoding="utf-8")
+    # The worker's manifest hashes the files as shipped, so it is written last.
+    shell = ["index.html", *(f"fonts/{name}" for name in _FONT_URL.findall(minified))]
+    worker = offline.render_service_worker(offline.precache_manifest(out_dir, shell, CHUNKS))
+    (out_dir / offline.SERVICE_WORKER).write_text(minify_js(worker), encoding="utf-8")
+    assets.append((offline.SERVICE_WORKER, worker, minify_js(worker)))
+    rows = []
+    for name, original, text in assets:
+        sizes = compressed_variants(out_dir / name)
+        rows.append((name, len(original.encode("utf-8")), len(text.encode("utf-8")), sizes[".gz"], sizes.get(".br")))
+    return rows
+
+
+def format_report(rows: list[tuple]) -> list[str]:
+    lines = [f"{'asset':<18} {'original':>10} {'minified':>10} {'gzip':>9} {'brotli':>9}"]
+    for name, original, minified, gz, br in rows:
+        lines.append(f"{name:<18} {original:>10,} {minified:>10,} {gz:>9,} {f'{br:,}' if br else '-':>9}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    from .build import BuildContext, OUTPUT_PAGE, cross_check_js, cross_check_retrieval, cross_check_search
+    from .model import CACHE_DIR, SOURCE_PAGE
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz dist", description=__doc__.splitlines()[0])
+    parser.add_argument("--page", default=OUTPUT_PAGE, type=Path, help="built page (default: %(default)s)")
+    parser.add_argument("-o", "--output", default=DIST_DIR, type=Path, help="output directory (default: %(default)s)")
+    parser.add_argument("--fonts", type=Path, help="directory with the page's font files, to self-host them")
+    parser.add_argument("--no-js-check", dest="js_check", action="store_false",
+                        help="skip the node cross-check of the minified script")
+    args = parser.parse_args(argv)
+    rows = write_dist(args.page, args.output, font_dir=args.fonts)
+    for line in format_report(rows):
+        print(line)
+    if brotli is None:
+        print("note: the brotli module is not installed; wrote .gz variants only")
+    if args.js_check and jsruntime.find_engine() is not None:
+        ctx = BuildContext.from_path(SOURCE_PAGE, CACHE_DIR)
+        html = (args.output / "index.html").read_text(encoding="utf-8")
+        problems = cross_check_js(html, ctx) + cross_check_retrieval(html, ctx) + cross_check_search(html, ctx)
+        if problems:
+            print("minified script disagrees with the Python reference:", *problems, sep="\n", file=sys.stderr)
+            return 1
+    print(f"wrote {args.output}")
+    return 0
@@ -0,0 +1,248 @@
+// A small in-memory DOM for running the quiz page outside a browser
+// (see catholic_quiz/jsbench.py). It covers what the page script uses:
+// lookup by id, simple selectors, classList/style/dataset,
+// innerHTML/textContent and event listeners. Markup is parsed by a small
+// tolerant tokenizer; call parseInto(body, markup) with the page's body
+// before running the script.
+const VOID_TAGS = new Set(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr']);
+const ENTITIES = { amp: '&', lt: '<', gt: '>', quot: '"', '#39': "'", apos: "'", nbsp: ' ' };
+const decodeEntities = s => s.replace(/&(#?\w+);/g, (m, e) => ENTITIES[e] ?? (e[0] === '#' ? String.fromCodePoint(e[1] === 'x' ? parseInt(e.slice(2), 16) : parseInt(e.slice(1), 10)) : m));
+const escapeText = s => s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+
+let domStats = { created: 0, parsed: 0, mutations: 0 };
+
+class TextNode {
+    constructor(data) { this.nodeType = 3; this.data = String(data); this.parentNode = null; domStats.created++; }
+    get textContent() { return this.data; }
+    set textContent(v) { this.data = String(v); domStats.mutations++; }
+    get outerHTML() { return escapeText(this.data); }
+    appendData(s) { this.data += s; domStats.mutations++; }
+    remove() { if (this.parentNode) this.parentNode.removeChild(this); }
+}
+
+class ClassList {
+    constructor(el) { this.el = el; }
+    _get() { return (this.el.attributes.class || '').split(/\s+/).filter(Boolean); }
+    _set(list) { this.el.attributes.class = list.join(' '); domStats.mutations++; }
+    contains(c) { return this._get().includes(c); }
+    add(...cs) { const l = this._get(); cs.forEach(c => { if (!l.includes(c)) l.push(c); }); this._set(l); }
+    remove(...cs) { this._set(this._get().filter(c => !cs.includes(c))); }
+    toggle(c, force) {
+        const has = this.contains(c);
+        const want = force === undefined ? !has : !!force;
+        if (want && !has) this.add(c);
+        if (!want && has) this.remove(c);
+        return want;
+    }
+}
+
+class Element {
+    constructor(tag, attributes = {}) {
+        this.nodeType = 1;
+        this.tagName = tag.toUpperCase();
+        this.attributes = { ...attributes };
+        this.childNodes = [];
+        this.parentNode = null;
+        this.classList = new ClassList(this);
+        this.listeners = {};
+        this.disabled = 'disabled' in attributes;
+        this.checked = 'checked' in attributes;
+        this.value = attributes.value ?? '';
+        this.scrollTop = 0;
+        this.scrollHeight = 0;
+        const style = {};
+        for (const decl of (attributes.style || '').split(';')) {
+            const [k, v] = decl.split(':');
+            if (k && v) style[k.trim().replace(/-([a-z])/g, (m, c) => c.toUpperCase())] = v.trim();
+        }
+        this.style = style;
+        const el = this;
+        this.dataset = new Proxy({}, {
+            get: (t, k) => el.attributes['data-' + String(k).replace(/[A-Z]/g, c => '-' + c.toLowerCase())],
+            set: (t, k, v) => { el.attributes['data-' + String(k).replace(/[A-Z]/g, c => '-' + c.toLowerCase())] = String(v); return true; }
+        });
+        domStats.created++;
+    }
+    get id() { return this.attributes.id || ''; }
+    set id(v) { this.attributes.id = v; }
+    get className() { return this.attributes.class || ''; }
+    set className(v) { this.attributes.class = v; domStats.mutations++; }
+    get children() { return this.childNodes.filter(n => n.nodeType === 1); }
+    get firstChild() { return this.childNodes[0] || null; }
+    get firstElementChild() { return this.children[0] || null; }
+    get nextElementSibling() {
+        if (!this.parentNode) return null;
+        const sibs = this.parentNode.children;
+        return sibs[sibs.indexOf(this) + 1] || null;
+    }
+    getAttribute(k) { return this.attributes[k] ?? null; }
+    setAttribute(k, v) { this.attributes[k] = String(v); domStats.mutations++; }
+    removeAttribute(k) { delete this.attributes[k]; }
+    hasAttribute(k) { return k in this.attributes; }
+    appendChild(node) {
+        if (node.parentNode) node.parentNode.removeChild(node);
+        if (node.nodeType === 11) { [...node.childNodes].forEach(n => this.appendChild(n)); return node; }
+        node.parentNode = this;
+        this.childNodes.push(node);
+        domStats.mutations++;
+        return node;
+    }
+    append(...nodes) { nodes.forEach(n => this.appendChild(typeof n === 'string' ? new TextNode(n) : n)); }
+    insertBefore(node, ref) {
+        if (!ref) return this.appendChild(node);
+        if (node.parentNode) node.parentNode.removeChild(node);
+        node.parentNode = this;
+        this.childNodes.splice(this.childNodes.indexOf(ref), 0, node);
+        domStats.mutations++;
+        return node;
+    }
+    removeChild(node) {
+        const i = this.childNodes.indexOf(node);
+        if (i !== -1) this.childNodes.splice(i, 1);
+        node.parentNode = null;
+        domStats.mutations++;
+        return node;
+    }
+    replaceChildren(...nodes) { this.childNodes.forEach(n => n.parentNode = null); this.childNodes = []; this.append(...nodes); }
+    remove() { if (this.parentNode) this.parentNode.removeChild(this); }
+    get textContent() { return this.childNodes.map(n => n.textContent).join(''); }
+    set textContent(v) {
+        this.childNodes.forEach(n => n.parentNode = null);
+        this.childNodes = [];
+        if (v !== '' && v !== null && v !== undefined) this.appendChild(new TextNode(v));
+        domStats.mutations++;
+    }
+    get innerHTML() { return this.childNodes.map(n => n.outerHTML).join(''); }
+    set innerHTML(html) {
+        this.childNodes.forEach(n => n.parentNode = null);
+        this.childNodes = [];
+        parseInto(this, String(html));
+        domStats.mutations++;
+    }
+    get outerHTML() {
+        const attrs = Object.entries(this.attributes).map(([k, v]) => v === '' ? ` ${k}` : ` ${k}="${String(v).replace(/"/g, '&quot;')}"`).join('');
+        const tag = this.tagName.toLowerCase();
+        return VOID_TAGS.has(tag) ? `<${tag}${attrs}>` : `<${tag}${attrs}>${this.innerHTML}</${tag}>`;
+    }
+    addEventListener(type, fn) { (this.listeners[type] ||= []).push(fn); }
+    removeEventListener(type, fn) { this.listeners[type] = (this.listeners[type] || []).filter(f => f !== fn); }
+    dispatchEvent(event) {
+        event.target ||= this;
+        (this.listeners[event.type] || []).forEach(fn => fn.call(this, event));
+        const handler = this['on' + event.type];
+        if (typeof handler === 'function') handler.call(this, event);
+        else if (this.attributes['on' + event.type]) new Function('event', this.attributes['on' + event.type]).call(this, event);
+        if (event.bubbles && !event.stopped && this.parentNode) this.parentNode.dispatchEvent(event);
+        return true;
+    }
+    click() { this.dispatchEvent({ type: 'click', bubbles: true, stopPropagation() { this.stopped = true; }, preventDefault() {} }); }
+    focus() {}
+    blur() {}
+    scrollIntoView() {}
+    getBoundingClientRect() { return { top: 0, left: 0, width: 0, height: 0 }; }
+    matches(selector) { return selector.split(',').some(sel => matchesChain(this, sel.trim().split(/\s+/))); }
+    closest(selector) { for (let el = this; el && el.nodeType === 1; el = el.parentNode) if (el.matches(selector)) return el; return null; }
+    querySelectorAll(selector) {
+        const out = [];
+        const walk = el => el.children.forEach(child => { if (child.matches(selector)) out.push(child); walk(child); });
+        walk(this);
+        return out;
+    }
+    querySelector(selector) { return this.querySelectorAll(selector)[0] || null; }
+    getElementById(id) {
+        for (const child of this.children) {
+            if (child.attributes.id === id) return child;
+            const found = child.getElementById(id);
+            if (found) return found;
+        }
+        return null;
+    }
+}
+
+function matchesCompound(el, compound) {
+    const m = compound.match(/^([a-zA-Z][\w-]*|\*)?((?:[#.][\w-]+|\[[^\]]+\])*)$/);
+    if (!m) return false;
+    if (m[1] && m[1] !== '*' && el.tagName !== m[1].toUpperCase()) return false;
+    for (const part of m[2].match(/[#.][\w-]+|\[[^\]]+\]/g) || []) {
+        if (part[0] === '#' && el.attributes.id !== part.slice(1)) return false;
+        if (part[0] === '.' && !el.classList.contains(part.slice(1))) return false;
+        if (part[0] === '[') {
+            const [, k, v] = part.match(/^\[([\w-]+)(?:="?([^"\]]*)"?)?\]$/) || [];
+            if (!(k in el.attributes) || (v !== undefined && el.attributes[k] !== v)) return false;
+        }
+    }
+    return true;
+}
+
+function matchesChain(el, parts) {
+    if (!matchesCompound(el, parts[parts.length - 1])) return false;
+    if (parts.length === 1) return true;
+    const rest = parts.slice(0, -1);
+    for (let p = el.parentNode; p && p.nodeType === 1; p = p.parentNode) if (matchesChain(p, rest)) return true;
+    return false;
+}
+
+const TOKEN = /<!--[\s\S]*?-->|<\/([a-zA-Z][\w-]*)\s*>|<([a-zA-Z][\w-]*)((?:\s+[^\s=>\/]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+))?)*)\s*\/?>|[^<]+|</g;
+const ATTR = /([^\s=>\/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?/g;
+
+function parseInto(root, html) {
+    domStats.parsed += html.length;
+    const stack = [root];
+    let m;
+    TOKEN.lastIndex = 0;
+    while ((m = TOKEN.exec(html))) {
+        const top = stack[stack.length - 1];
+        if (m[0].startsWith('<!--')) continue;
+        if (m[1]) {
+            const tag = m[1].toUpperCase();
+            for (let i = stack.length - 1; i > 0; i--) if (stack[i].tagName === tag) { stack.length = i; break; }
+        } else if (m[2]) {
+            const attrs = {};
+            let a;
+            ATTR.lastIndex = 0;
+            while ((a = ATTR.exec(m[3] || ''))) attrs[a[1]] = decodeEntities(a[2] ?? a[3] ?? a[4] ?? '');
+            const el = new Element(m[2], attrs);
+            top.appendChild(el);
+            if (!VOID_TAGS.has(m[2].toLowerCase()) && !m[0].endsWith('/>')) stack.push(el);
+        } else {
+            top.appendChild(new TextNode(decodeEntities(m[0])));
+        }
+    }
+}
+
+const documentElement = new Element('html');
+const body = new Element('body');
+documentElement.appendChild(body);
+const documentListeners = {};
+const document = {
+    body,
+    documentElement,
+    readyState: 'loading',
+    createElement: tag => new Element(tag),
+    createTextNode: data => new TextNode(data),
+    createDocumentFragment: () => { const f = new Element('fragment'); f.nodeType = 11; return f; },
+    getElementById: id => body.getElementById(id),
+    querySelector: sel => body.querySelector(sel),
+    querySelectorAll: sel => body.querySelectorAll(sel),
+    addEventListener: (type, fn) => (documentListeners[type] ||= []).push(fn),
+    dispatch: type => (documentListeners[type] || []).forEach(fn => fn({ type })),
+};
+const storage = new Map();
+const localStorage = {
+    getItem: k => storage.has(k) ? storage.get(k) : null,
+    setItem: (k, v) => storage.set(k, String(v)),
+    removeItem: k => storage.delete(k),
+    clear: () => storage.clear(),
+};
+const location = { protocol: 'file:', hostname: '', href: 'file:///index.html', hash: '', search: '', pathname: '/index.html' };
+const window = {
+    location,
+    localStorage,
+    scrollTo() {},
+    addEventListener() {},
+    requestIdleCallback: fn => setTimeout(fn, 0),
+};
+const navigator = { clipboard: { writeText: () => Promise.resolve() } };
+const requestAnimationFrame = fn => setTimeout(() => fn(performance.now()), 0);
+const alert = () => {};
+const confirm = () => true;
@@ -0,0 +1,239 @@
+"""Pre-generate the AI helper's "explain this question" answers offline.
+
+Each question's explanation request (the page's own wording plus the
+question's QUESTION_TOPICS ``geminiPrompt``) is run once through a local
+model, and the answers are written to ``explanations.js``. The page loads
+that chunk the first time "explain" is pressed and shows the stored answer
+at once; only follow-up questions go to a live model.
+
+Every entry records a hash of the exact messages sent, and the provider and
+model that answered. A rerun skips questions already answered from the same
+messages by the same model and regenerates the rest; the chunk is rewritten
+after every answer, so an interrupted run resumes where it stopped. Answers
+from another model are kept until their replacement arrives, so switching
+``--model`` never leaves questions without one::
+
+    python -m catholic_quiz explain --endpoint http://localhost:11434 --model llama3.2
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from .model import ROOT, SOURCE_PAGE, QuizModel, load_model
+from .proxy import BACKEND_ERRORS, DEFAULT_CONTEXT, Backend, chat_request, extract_content
+from .retrieval import RetrievalIndex, format_passages
+
+EXPLANATIONS_CHUNK = ROOT / "explanations.js"
+_CHUNK_PREFIX = "window.QUIZ_EXPLANATIONS = "
+_CHUNK = re.compile(r"^" + re.escape(_CHUNK_PREFIX) + r"(.*);\s*\Z", re.DOTALL | re.MULTILINE)
+
+
+SYSTEM_PROMPT = """You are a Catholic theological guide helping someone understand complex theological concepts while taking a quiz about Catholic schools of thought.
+
+Be helpful, educational, and explain theological concepts in accessible language. If asked to explain the question, break down the theological terms and what each option represents. Do NOT tell the user which answer to pick - help them understand the concepts so they can decide for themselves based on their own beliefs.
+
+If reference passages are given below, rely on them for any documents, authors or dates you mention, and do not invent sources.
+
+Keep responses concise (2-3 paragraphs max) but informative."""
+
+
+def question_context(model: QuizModel, q: int) -> str:
+    """The question-specific part of the system prompt (mirrors questionContext)."""
+    question = model.questions[q]
+    options = "\n".join(f"{i + 1}. {option.text}" for i, option in enumerate(question.options))
+    return f"""Current question being asked in the quiz:
+"{question.text}"
+
+Category: {model.categories[question.category].name}
+
+Options:
+{options}"""
+
+
+def system_prompt(model: QuizModel, q: int, references: str = "") -> str:
+    """The AI helper's system prompt for question ``q``: the shared instructions
+    first, so backends can reuse their cached prefix, then the question and
+    any retrieved reference passages."""
+    prompt = SYSTEM_PROMPT + "\n\n" + question_context(model, q)
+    return prompt + "\n\n" + references if references else prompt
+
+
+def explain_message(model: QuizModel, q: int) -> str:
+    """The user turn askAIToExplain sends for question ``q``."""
+    question = model.questions[q]
+    return f"""Please explain this question in simpler terms: "{question.text}"
+
+This question is about {model.categories[question.category].name}. Help me understand the theological concepts and what each option means."""
+
+
+def explain_messages(model: QuizModel, q: int, index: RetrievalIndex) -> list[dict[str, str]]:
+    """Messages for the offline run: the live request plus the topic's study prompt.
+
+    Passages are retrieved for the live request, as the page retrieves them.
+    """
+    message = explain_message(model, q)
+    references = format_passages(index.search(model.questions[q].text + " " + message))
+    user = message + "\n\n" + model.topic(q).prompt
+    return [{"role": "system", "content": system_prompt(model, q, references)}, {"role": "user", "content": user}]
+
+
+def request_hash(messages: list[dict[str, str]]) -> str:
+    """A short hash of what the model is asked (not which model is asked)."""
+    payload = json.dumps(messages, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def read_chunk(path: str | Path = EXPLANATIONS_CHUNK) -> dict[str, dict[str, str]]:
+    """``{question index (str): {"hash", "model", "text"}}`` from a chunk file, or {}."""
+    try:
+        m = _CHUNK.search(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    if m is None:
+        raise ValueError(f"{path} is not an explanations chunk")
+    return json.loads(m.group(1))
+
+
+def write_chunk(entries: dict[str, dict[str, str]], path: str | Path = EXPLANATIONS_CHUNK) -> None:
+    path = Path(path)
+    ordered = dict(sorted(entries.items(), key=lambda item: int(item[0])))
+    text = (
+        "// Generated by python -m catholic_quiz explain. Do not edit.\n"
+        + _CHUNK_PREFIX + json.dumps(ordered, ensure_ascii=False, indent=0) + ";\n"
+    )
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def stale_entries(model: QuizModel, entries: dict[str, dict[str, str]],
+                  index: RetrievalIndex | None = None) -> list[str]:
+    """Keys of chunk entries whose question or prompt has changed since they were generated."""
+    index = index or RetrievalIndex.from_model(model)
+    stale = []
+    for key, entry in entries.items():
+        q = int(key)
+        if q >= len(model.questions) or entry.get("hash") != request_hash(explain_messages(model, q, index)):
+            stale.append(key)
+    return stale
+
+
+class ExplainJob:
+    """Runs the pending questions through ``backend`` with ``workers`` in flight."""
+
+    def __init__(self, model: QuizModel, backend: Backend, provider: str, model_name: str, *,
+                 chunk: Path = EXPLANATIONS_CHUNK, workers: int = 2, retries: int = 3,
+                 context_tokens: int = DEFAULT_CONTEXT, timeout: float = 600.0, log=print):
+        self.model = model
+        self.index = RetrievalIndex.from_model(model)
+        self.backend = backend
+        self.provider = provider
+        self.flavour = "ollama" if provider == "ollama" else "openai"
+        self.model_name = model_name
+        self.context_tokens = context_tokens
+        self.chunk = chunk
+        self.workers = workers
+        self.retries = retries
+        self.timeout = timeout
+        self.log = log
+        self.entries = read_chunk(chunk)
+        self.failed: list[int] = []
+
+    def pending(self) -> list[tuple[int, str, list[dict[str, str]]]]:
+        """Questions without an answer to their current messages from this provider and model."""
+        todo = []
+        for q in range(len(self.model.questions)):
+            messages = explain_messages(self.model, q, self.index)
+            digest = request_hash(messages)
+            entry = self.entries.get(str(q), {})
+            answered = entry.get("hash"), entry.get("provider"), entry.get("model")
+            if answered != (digest, self.provider, self.model_name):
+                todo.append((q, digest, messages))
+        return todo
+
+    def generate(self, messages: list[dict[str, str]]) -> str:
+        path, body = chat_request(self.provider, self.model_name, messages, context_tokens=self.context_tokens)
+        status, _, data = self.backend.request("POST", path, json.dumps(body).encode("utf-8"), self.timeout)
+        if status != 200:
+            raise OSError(f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}")
+        text = extract_content(self.flavour, json.loads(data))
+        if not text or not text.strip():
+            raise OSError("empty response")
+        return text.strip()
+
+    async def worker(self, queue: asyncio.Queue, total: int) -> None:
+        while True:
+            try:
+                q, digest, messages = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            for attempt in range(self.retries + 1):
+                try:
+                    started = time.perf_counter()
+                    text = await asyncio.to_thread(self.generate, messages)
+                    break
+                except (*BACKEND_ERRORS, ValueError) as exc:
+                    if attempt == self.retries:
+                        self.log(f"question {q}: giving up after {attempt + 1} attempt(s): {exc}")
+                        self.failed.append(q)
+                        text = None
+                    else:
+                        await asyncio.sleep(2 ** attempt)
+            if text is not None:
+                self.entries[str(q)] = {"hash": digest, "provider": self.provider,
+                                        "model": self.model_name, "text": text}
+                write_chunk(self.entries, self.chunk)
+                done = total - queue.qsize()
+                self.log(f"[{done}/{total}] question {q} ({time.perf_counter() - started:.1f}s)")
+
+    async def run(self) -> None:
+        todo = self.pending()
+        # Drop answers to changed questions now so the page never shows one,
+        # even if regenerating it fails. Answers from another model still fit
+        # their question and stay until replaced.
+        stale = stale_entries(self.model, self.entries, self.index)
+        if stale:
+            for key in stale:
+                del self.entries[key]
+            write_chunk(self.entries, self.chunk)
+        self.log(f"{len(self.model.questions) - len(todo)} up to date, {len(todo)} to generate")
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in todo:
+            queue.put_nowait(item)
+        await asyncio.gather(*(self.worker(queue, len(todo)) for _ in range(max(1, self.workers))))
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz explain", description=__doc__.splitlines()[0])
+    parser.add_argument("--provider", default="ollama", choices=("ollama", "lmstudio", "llamacpp", "custom"))
+    parser.add_argument("--endpoint", default="http://localhost:11434", help="LLM server URL (default: %(default)s)")
+    parser.add_argument("--model", default="llama3.2", help="model name (default: %(default)s)")
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    parser.add_argument("--output", default=EXPLANATIONS_CHUNK, type=Path, help="chunk file (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="concurrent requests (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=3, help="retries per question (default: %(default)s)")
+    parser.add_argument("--context", type=int, default=DEFAULT_CONTEXT,
+                        help="context window in tokens, as set in the AI helper (default: %(default)s)")
+    args = parser.parse_args(argv)
+    job = ExplainJob(load_model(args.source), Backend(args.endpoint), args.provider, args.model,
+                     chunk=args.output, workers=args.jobs, retries=args.retries, context_tokens=args.context)
+    try:
+        asyncio.run(job.run())
+    except KeyboardInterrupt:
+        print(f"interrupted; {len(job.entries)} explanation(s) saved, rerun to resume")
+        return 130
+    if job.failed:
+        failed = sorted(job.failed)
+        listed = ", ".join(map(str, failed[:20])) + (", ..." if len(failed) > 20 else "")
+        print(f"{len(failed)} question(s) failed ({listed}); rerun to retry")
+        return 1
+    return 0
@@ -0,0 +1,530 @@
+"""Collect anonymised quiz submissions into append-only segment files.
+
+Clients POST results tokens (the ``#r=`` part of a share link, see
+:mod:`catholic_quiz.share`) to ``/submit``, one or more per request, one per
+line. Only the token's bytes and the time of arrival are kept: no address,
+no headers. The same records can be appended from files of shared links::
+
+    python -m catholic_quiz ingest                        # serve on 127.0.0.1:8766
+    python -m catholic_quiz ingest --import links.txt     # append links, then exit
+    python -m catholic_quiz ingest --stats
+
+Storage is a directory of segments, ``00000001.seg``, ``00000002.seg``, ...
+A segment is a run of records, each a header (payload length, CRC-32 of
+the timestamp and payload, timestamp in milliseconds) followed by the
+payload; once a segment reaches ``--segment-size`` the next one is started.
+Timestamps never decrease, within or across segments. Beside each segment
+its ``.idx`` file is a sparse index of ``(timestamp, bank prefix, offset)``
+entries: one for the segment's first record, then one whenever
+:data:`INDEX_INTERVAL` bytes have been written since the last entry or the
+bank hash changes. :func:`scan` uses it to start a time range close to its
+first record instead of at the start of the segment. On startup a torn
+tail left by a crash is cut back to the last whole record.
+
+Submissions go through an asyncio queue to a single writer, which takes
+everything queued (up to ``--batch`` records) and appends it with one write
+per file, so the cost of a write and its fsync is shared by every request
+in the batch. ``--fsync batch`` (the default) syncs each batch before its
+requests are answered; ``interval`` syncs at most every
+``--fsync-interval`` seconds; ``off`` leaves it to the operating system.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+from .model import ROOT
+from .share import BANK_BYTES, ShareError, link_token, read_links, token_bytes
+
+SUBMISSIONS_DIR = ROOT / "submissions"
+SEGMENT_SIZE = 64 * 1024 * 1024
+INDEX_INTERVAL = 64 * 1024
+FSYNC_POLICIES = ("batch", "interval", "off")
+MAX_BATCH = 4096
+MAX_PENDING = 65536
+MAX_BODY = 1024 * 1024
+SUBMIT_PATH = "/submit"
+STATUS_PATH = "/ingest/status"
+
+# payload length, CRC-32 of timestamp + payload, timestamp (ms since the epoch)
+_RECORD = struct.Struct("<IIQ")
+_TIMESTAMP = struct.Struct("<Q")
+# timestamp (ms), bank hash prefix, offset of the record in its segment
+_INDEX = struct.Struct(f"<Q{BANK_BYTES}sxI")
+
+
+def segment_path(directory: Path, number: int) -> Path:
+    return directory / f"{number:08d}.seg"
+
+
+def segment_paths(directory: Path) -> list[Path]:
+    """The segments in ``directory``, oldest first."""
+    return sorted(directory.glob("[0-9]" * 8 + ".seg"))
+
+
+def read_index(path: Path) -> list[tuple[int, bytes, int]]:
+    """The ``(timestamp, bank, offset)`` entries of an ``.idx`` file; [] if there is none."""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    return list(_INDEX.iter_unpack(data[:len(data) - len(data) % _INDEX.size]))
+
+
+class Record:
+    """One stored submission: its arrival time (ms) and the token's bytes."""
+
+    __slots__ = ("timestamp", "payload")
+
+    def __init__(self, timestamp: int, payload: bytes):
+        self.timestamp = timestamp
+        self.payload = payload
+
+    @property
+    def bank(self) -> bytes:
+        return self.payload[1:1 + BANK_BYTES]
+
+    @property
+    def size(self) -> int:
+        """Bytes the record takes in its segment, header included."""
+        return _RECORD.size + len(self.payload)
+
+    def __repr__(self) -> str:
+        return f"Record({self.timestamp}, {self.payload.hex()})"
+
+
+def read_records(path: Path, start: int = 0) -> Iterator[tuple[int, Record]]:
+    """``(offset, record)`` for each whole, intact record from ``start``; stops at a torn or corrupt one."""
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size <= start:
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            pos = start
+            while pos + _RECORD.size <= size:
+                length, crc, timestamp = _RECORD.unpack_from(data, pos)
+                end = pos + _RECORD.size + length
+                if end > size:
+                    return
+                payload = data[pos + _RECORD.size:end]
+                if zlib.crc32(payload, zlib.crc32(_TIMESTAMP.pack(timestamp))) != crc:
+                    return
+                yield pos, Record(timestamp, payload)
+                pos = end
+
+
+def scan(directory: Path, since: int | None = None, until: int | None = None,
+         bank: bytes | None = None) -> Iterator[Record]:
+    """Records with ``since <= timestamp <= until`` (ms; either may be None), oldest first,
+    optionally only those of one bank hash prefix."""
+    paths = segment_paths(directory)
+    indexes = [read_index(path.with_suffix(".idx")) for path in paths]
+    for i, (path, index) in enumerate(zip(paths, indexes)):
+        if until is not None and index and index[0][0] > until:
+            return
+        start = 0
+        if since is not None:
+            following = indexes[i + 1] if i + 1 < len(indexes) else None
+            if following and following[0][0] < since:
+                continue  # every record here is older than the next segment's first
+            k = bisect.bisect_left([entry[0] for entry in index], since)
+            start = index[k - 1][2] if k > 0 else 0
+        for _, record in read_records(path, start):
+            if since is not None and record.timestamp < since:
+                continue
+            if until is not None and record.timestamp > until:
+                return
+            if bank is None or record.bank == bank:
+                yield record
+
+
+def _write_all(fh: Any, data: bytearray) -> None:
+    """Write all of ``data`` to an unbuffered file, which may take several writes."""
+    view = memoryview(data)
+    while view:
+        written = fh.write(view)
+        if not written:
+            raise OSError(f"short write to {fh.name}")
+        view = view[written:]
+
+
+class SegmentLog:
+    """Appends records to the newest segment in ``directory``, starting a new one
+    every ``segment_size`` bytes. Not thread-safe: use one writer."""
+
+    def __init__(self, directory: Path, segment_size: int = SEGMENT_SIZE, fsync: str = "batch",
+                 fsync_interval: float = 1.0, index_interval: int = INDEX_INTERVAL):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.index_interval = index_interval
+        self.last_timestamp = 0
+        self.last_sync = time.monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = segment_paths(self.directory)
+        self.number = int(existing[-1].stem) if existing else 1
+        self._open(recover=bool(existing))
+
+    def _open(self, recover: bool) -> None:
+        path = segment_path(self.directory, self.number)
+        index_path = path.with_suffix(".idx")
+        self.size, self.indexed, self.bank = 0, -self.index_interval, None
+        entries = 0
+        if recover:
+            index = read_index(index_path)
+            size = path.stat().st_size if path.exists() else 0
+            while index and index[-1][2] >= size:
+                index.pop()
+            # Scan from the last indexed offset; if the record there is the torn
+            # one, step back an entry at a time (and finally to the start) so
+            # the intact records before it are kept.
+            last = None
+            for start in [entry[2] for entry in reversed(index)] + [0]:
+                for offset, record in read_records(path, start):
+                    last = offset, record
+                if last is not None:
+                    break
+            if last is not None:
+                offset, record = last
+                self.size = offset + _RECORD.size + len(record.payload)
+                self.last_timestamp = record.timestamp
+            while index and index[-1][2] >= self.size:
+                index.pop()
+            if index:
+                self.indexed = index[-1][2]
+            if last is not None:
+                self.bank = last[1].bank
+            entries = len(index)
+        self.segment = open(path, "ab", buffering=0)
+        self.segment.truncate(self.size)
+        self.index = open(index_path, "ab", buffering=0)
+        self.index_size = entries * _INDEX.size
+        self.index.truncate(self.index_size)
+        if not recover and self.fsync == "batch":
+            self._sync_directory()
+
+    def _sync_directory(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _rotate(self) -> None:
+        if self.fsync != "off":
+            os.fsync(self.segment.fileno())
+            os.fsync(self.index.fileno())
+        self.segment.close()
+        self.index.close()
+        self.number += 1
+        self._open(recover=False)
+
+    def append(self, payloads: Sequence[bytes], timestamp: int | None = None) -> int:
+        """Append ``payloads`` with one timestamp (now, in ms, by default); returns it."""
+        now = int(time.time() * 1000) if timestamp is None else timestamp
+        timestamp = max(now, self.last_timestamp)
+        crc_seed = zlib.crc32(_TIMESTAMP.pack(timestamp))
+        out, index = bytearray(), bytearray()
+        # What the index describes as written; restored if a write fails
+        # (unless the failure moved the log on to a new segment).
+        written = self.number, self.indexed, self.bank
+        try:
+            for payload in payloads:
+                if self.size + len(out) >= self.segment_size and self.size + len(out) > 0:
+                    self._write(out, index)
+                    out, index = bytearray(), bytearray()
+                    self._rotate()
+                    written = self.number, self.indexed, self.bank
+                offset = self.size + len(out)
+                bank = payload[1:1 + BANK_BYTES]
+                if offset - self.indexed >= self.index_interval or bank != self.bank:
+                    index += _INDEX.pack(timestamp, bank, offset)
+                    self.indexed, self.bank = offset, bank
+                out += _RECORD.pack(len(payload), zlib.crc32(payload, crc_seed), timestamp)
+                out += payload
+            self._write(out, index)
+        except BaseException:
+            if self.number == written[0]:
+                self.indexed, self.bank = written[1:]
+            raise
+        self.last_timestamp = timestamp
+        self._sync()
+        return timestamp
+
+    def _write(self, out: bytearray, index: bytearray) -> None:
+        # Records before their index entries: a crash in between leaves
+        # records that are merely unindexed, never entries past the data.
+        try:
+            _write_all(self.segment, out)
+            _write_all(self.index, index)
+        except BaseException:
+            self._discard_partial_write()
+            raise
+        self.size += len(out)
+        self.index_size += len(index)
+
+    def _discard_partial_write(self) -> None:
+        """Cut a failed write's bytes off both files, so the next append's
+        offsets are true; if even that fails, carry on in a new segment."""
+        try:
+            self.segment.truncate(self.size)
+            self.index.truncate(self.index_size)
+        except OSError:
+            # The old segment's torn tail is where read_records stops.
+            self.segment.close()
+            self.index.close()
+            self.number += 1
+            self._open(recover=False)
+
+    def _sync(self) -> None:
+        if self.fsync == "off":
+            return
+        now = time.monotonic()
+        if self.fsync == "batch" or now - self.last_sync >= self.fsync_interval:
+            os.fsync(self.segment.fileno())
+            os.fsync(self.index.fileno())
+            self.last_sync = now
+
+    def close(self) -> None:
+        if self.fsync != "off":
+            os.fsync(self.segment.fileno())
+            os.fsync(self.index.fileno())
+        self.segment.close()
+        self.index.close()
+
+
+class IngestQueue:
+    """Batches submissions from many coroutines into :meth:`SegmentLog.append` calls.
+
+    :meth:`submit` returns once its records are written (and, with
+    ``fsync="batch"``, synced). :meth:`run` is the single writer; appends run
+    in a worker thread so the event loop keeps accepting submissions.
+    """
+
+    def __init__(self, log: SegmentLog, max_batch: int = MAX_BATCH, max_pending: int = MAX_PENDING):
+        self.log = log
+        self.max_batch = max_batch
+        self.queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self.records = 0
+        self.batches = 0
+
+    async def submit(self, payloads: list[bytes]) -> None:
+        done = asyncio.get_running_loop().create_future()
+        await self.queue.put((payloads, done))
+        await done
+
+    async def stop(self) -> None:
+        """Have :meth:`run` finish the submissions queued so far and return."""
+        await self.queue.put(None)
+
+    async def run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                return
+            items = [item]
+            count = len(item[0])
+            while count < self.max_batch and not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                items.append(item)
+                count += len(item[0])
+            payloads = [payload for batch, _ in items for payload in batch]
+            try:
+                await asyncio.to_thread(self.log.append, payloads)
+            except Exception as exc:
+                # Fail this batch's submissions, and keep serving the rest.
+                print(f"ingest: could not append {len(payloads)} record(s): {exc!r}", file=sys.stderr)
+                for _, done in items:
+                    if not done.done():
+                        done.set_exception(exc)
+                continue
+            self.records += len(payloads)
+            self.batches += 1
+            for _, done in items:
+                if not done.done():
+                    done.set_result(None)
+
+
+def parse_submission(body: bytes) -> tuple[list[bytes], int]:
+    """The token payloads in a request body (one token or link per line) and how many lines were rejected."""
+    payloads, rejected = [], 0
+    for line in body.decode("utf-8", "replace").splitlines():
+        if not line.strip():
+            continue
+        try:
+            payloads.append(token_bytes(link_token(line)))
+        except ShareError:
+            rejected += 1
+    return payloads, rejected
+
+
+_REASONS = {200: "OK", 202: "Accepted", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+            413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class IngestServer:
+    """A minimal HTTP/1.1 front end (keep-alive, CORS) feeding an :class:`IngestQueue`."""
+
+    def __init__(self, queue: IngestQueue, verbose: bool = False):
+        self.queue = queue
+        self.verbose = verbose
+        self.rejected = 0
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "records": self.queue.records,
+            "batches": self.queue.batches,
+            "rejected": self.rejected,
+            "queued": self.queue.queue.qsize(),
+            "segment": segment_path(self.queue.log.directory, self.queue.log.number).name,
+        }
+
+    async def respond(self, method: str, path: str, body: bytes) -> tuple[int, dict[str, Any] | None]:
+        if method == "OPTIONS":
+            return 204, None
+        if method == "GET" and path == STATUS_PATH:
+            return 200, self.status()
+        if method != "POST" or path != SUBMIT_PATH:
+            return 404, {"error": f"unknown path {path}"}
+        payloads, rejected = parse_submission(body)
+        self.rejected += rejected
+        if not payloads:
+            return 400, {"accepted": 0, "rejected": rejected}
+        try:
+            await self.queue.submit(payloads)
+        except Exception as exc:
+            return 503, {"error": f"could not store the submission: {exc}"}
+        return 202, {"accepted": len(payloads), "rejected": rejected}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    await self.send(writer, 413, {"error": f"body over {MAX_BODY} bytes"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                path = target.split("?", 1)[0]
+                status, reply = await self.respond(method, path, body)
+                close = headers.get("connection", "").lower() == "close"
+                await self.send(writer, status, reply, close)
+                if self.verbose:
+                    print(f"{method} {path} {status}", file=sys.stderr)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer: asyncio.StreamWriter, status: int, reply: dict[str, Any] | None,
+                   close: bool = False) -> None:
+        body = b"" if reply is None else json.dumps(reply).encode("utf-8")
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Access-Control-Allow-Origin: *",
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+            "Access-Control-Allow-Headers: Content-Type",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+        ]
+        if close:
+            head.append("Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(log: SegmentLog, host: str, port: int, *, max_batch: int = MAX_BATCH, verbose: bool = False) -> None:
+    queue = IngestQueue(log, max_batch)
+    server = IngestServer(queue, verbose)
+    writer = asyncio.create_task(queue.run())
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"ingesting on http://{host}:{port}{SUBMIT_PATH} into {log.directory}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await queue.stop()
+        await writer
+
+
+def format_stats(directory: Path) -> list[str]:
+    lines = [f"{'segment':<14} {'bytes':>12} {'records':>9} {'index':>6}  first - last"]
+    for path in segment_paths(directory):
+        count, first, last = 0, None, None
+        for _, record in read_records(path):
+            count += 1
+            first = record.timestamp if first is None else first
+            last = record.timestamp
+        span = " - ".join(time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(t / 1000)) for t in (first, last)) \
+            if count else "-"
+        entries = len(read_index(path.with_suffix(".idx")))
+        lines.append(f"{path.name:<14} {path.stat().st_size:>12,} {count:>9,} {entries:>6}  {span}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz ingest", description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=SUBMISSIONS_DIR, type=Path, help="segment directory (default: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--segment-size", type=int, default=SEGMENT_SIZE // (1024 * 1024), metavar="MB",
+                        help="start a new segment at this size (default: %(default)s)")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="batch",
+                        help="when to sync to disk (default: %(default)s)")
+    parser.add_argument("--fsync-interval", type=float, default=1.0, metavar="SECONDS",
+                        help="with --fsync interval, the longest gap between syncs (default: %(default)s)")
+    parser.add_argument("--batch", type=int, default=MAX_BATCH,
+                        help="most records written at once (default: %(default)s)")
+    parser.add_argument("--import", dest="imports", action="append", default=[], type=Path, metavar="FILE",
+                        help="append the links in FILE ('-' for stdin) and exit (repeatable)")
+    parser.add_argument("--stats", action="store_true", help="summarise the stored segments and exit")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        for line in format_stats(args.dir):
+            print(line)
+        return 0
+    log = SegmentLog(args.dir, args.segment_size * 1024 * 1024, args.fsync, args.fsync_interval)
+    try:
+        if args.imports:
+            payloads, rejected = parse_submission("\n".join(read_links(args.imports)).encode("utf-8"))
+            for i in range(0, len(payloads), args.batch):
+                log.append(payloads[i:i + args.batch])
+            print(f"appended {len(payloads)} record(s) to {args.dir}"
+                  + (f"; {rejected} line(s) were not results links" if rejected else ""))
+            return 0 if payloads or not rejected else 1
+        asyncio.run(serve(log, args.host, args.port, max_batch=args.batch, verbose=args.verbose))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log.close()
+    return 0
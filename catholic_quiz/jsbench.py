@@ -0,0 +1,145 @@
+"""Time the built page's script in node, as a browser would run it.
+
+The page's markup is loaded into an in-memory DOM (``domstub.js``) and the
+script is compiled and run in a fresh ``vm`` context per session, followed
+by DOMContentLoaded. Each session then takes one quiz length from start to
+results, answering every question, and records:
+
+``parse``, ``evaluate``, ``init``
+    compiling the script, running its top-level statements, and the
+    DOMContentLoaded handler (per session, reported under ``startup``);
+``first_question``
+    ``startQuiz()``: question selection, the navigation and the first
+    ``renderQuestion()``;
+``answer``
+    ``selectOption()`` then ``nextQuestion()``, once per question;
+``show_results``
+    ``showResults()``, with ``calculate_scores`` and ``render_rankings``
+    timed again on their own afterwards.
+
+Percentiles of each are printed and written as JSON. Everything runs
+offline; ``--jitless`` turns off node's optimizing compilers, which is
+closer to how a low-end phone runs the page::
+
+    python -m catholic_quiz jsbench --sessions 10
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from . import jsruntime
+from .bench import BENCH_DIR, format_seconds, write_results
+from .build import OUTPUT_PAGE
+from .model import QUIZ_LENGTHS
+
+PERCENTILES = (50, 90, 99)
+
+_DRIVER = r"""
+const vm = require('vm');
+const { stub, markup, script, lengths, sessions, seed } = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+let state = seed;
+const random = () => (state = (state * 1103515245 + 12345) % 2147483648) / 2147483648;
+const samples = { startup: { parse: [], evaluate: [], init: [] } };
+const time = (list, fn) => { const t = performance.now(); const r = fn(); list.push(performance.now() - t); return r; };
+let run = 0;
+for (const length of lengths) {
+    const s = samples[length] = { first_question: [], answer: [], show_results: [], calculate_scores: [], render_rankings: [] };
+    for (let i = 0; i < sessions; i++) {
+        const ctx = vm.createContext({ console, performance, setTimeout, clearTimeout, atob, btoa, TextEncoder, TextDecoder });
+        vm.runInContext(stub, ctx);
+        vm.runInContext('parseInto(body, ' + JSON.stringify(markup) + ')', ctx);
+        // A distinct source per run, so V8's compilation cache cannot serve it.
+        const compiled = time(samples.startup.parse, () => new vm.Script(script + '\n// run ' + run++));
+        time(samples.startup.evaluate, () => compiled.runInContext(ctx));
+        time(samples.startup.init, () => vm.runInContext("document.dispatch('DOMContentLoaded')", ctx));
+        const page = vm.runInContext(`({ setQuizLength, startQuiz, selectOption, nextQuestion, showResults,
+            calculateScores, rankSchools, renderRankings, QUESTIONS, selection: () => selectedQuestions })`, ctx);
+        page.setQuizLength(length);
+        time(s.first_question, () => page.startQuiz());
+        const selected = page.selection();
+        selected.forEach((q, pos) => time(s.answer, () => {
+            page.selectOption(Math.floor(random() * page.QUESTIONS[q].options.length));
+            if (pos < selected.length - 1) page.nextQuestion();
+        }));
+        time(s.show_results, () => page.showResults());
+        time(s.calculate_scores, () => page.calculateScores());
+        const ranked = page.rankSchools();
+        time(s.render_rankings, () => page.renderRankings(ranked));
+    }
+}
+console.log(JSON.stringify(samples));
+"""
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """The ``p``-th percentile of sorted ``ordered``, interpolating between ranks."""
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples: list[float]) -> dict[str, Any]:
+    """Percentiles, mean and max of millisecond ``samples``, in seconds."""
+    ordered = sorted(ms / 1000 for ms in samples)
+    summary = {f"p{p}": percentile(ordered, p) for p in PERCENTILES}
+    summary.update(mean=sum(ordered) / len(ordered), max=ordered[-1], n=len(ordered))
+    return summary
+
+
+def run(html: str, lengths: tuple[int, ...] = QUIZ_LENGTHS, sessions: int = 5, *, seed: int = 1,
+        engine_args: tuple[str, ...] = (), timeout: float = 600.0) -> dict[str, dict[str, dict[str, Any]]]:
+    """``{"startup" or quiz length: {metric: summary}}`` for ``sessions`` runs per length."""
+    payload = {
+        "stub": jsruntime.DOM_STUB_FILE.read_text(encoding="utf-8"),
+        "markup": jsruntime.page_markup(html),
+        "script": jsruntime.page_script(html),
+        "lengths": list(lengths),
+        "sessions": sessions,
+        "seed": seed,
+    }
+    samples = jsruntime.run_script(_DRIVER, payload, engine_args=engine_args, timeout=timeout)
+    return {group: {metric: summarize(values) for metric, values in samples[group].items()}
+            for group in ["startup", *map(str, lengths)]}
+
+
+def format_summary(group: str, metric: str, summary: dict[str, Any]) -> str:
+    cells = " ".join(f"{format_seconds(summary[f'p{p}']):>9}" for p in PERCENTILES)
+    return f"{group:<8} {metric:<17} {cells} {format_seconds(summary['max']):>9} {summary['n']:>6}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz jsbench", description=__doc__.splitlines()[0])
+    parser.add_argument("--page", default=OUTPUT_PAGE, type=Path, help="built page (default: %(default)s)")
+    parser.add_argument("--lengths", type=int, nargs="+", default=list(QUIZ_LENGTHS), metavar="N",
+                        help="quiz lengths to run (default: all)")
+    parser.add_argument("--sessions", type=int, default=5, help="sessions per quiz length (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the answers given (default: %(default)s)")
+    parser.add_argument("--jitless", action="store_true", help="run node without its optimizing compilers")
+    parser.add_argument("-o", "--output", default=BENCH_DIR / "js-results.json", type=Path,
+                        help="results file (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if jsruntime.find_engine() is None:
+        print("no JavaScript engine found (install node or set QUIZ_NODE)", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    try:
+        results = run(args.page.read_text(encoding="utf-8"), tuple(args.lengths), args.sessions, seed=args.seed,
+                      engine_args=("--jitless",) if args.jitless else ())
+    except jsruntime.JSRuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    header = " ".join(f"{f'p{p}':>9}" for p in PERCENTILES)
+    print(f"{'length':<8} {'metric':<17} {header} {'max':>9} {'n':>6}")
+    for group, metrics in results.items():
+        for metric, summary in metrics.items():
+            print(format_summary(group, metric, summary))
+    write_results(args.output, results, engine=jsruntime.find_engine(), jitless=args.jitless)
+    print(f"results written to {args.output} in {time.perf_counter() - started:.1f}s")
+    return 0
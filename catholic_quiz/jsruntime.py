@@ -0,0 +1,97 @@
+"""Run the page script under a local JavaScript engine (node) when available."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any, Sequence
+
+__all__ = ["data_blocks", "find_engine", "page_markup", "page_script", "run_script", "run_with_driver", "JSRuntimeError"]
+
+# Just enough of the browser for the page's top-level statements to run.
+DOM_STUB = """\
+const document = {
+    addEventListener() {},
+    getElementById(id) { return id in __DATA_BLOCKS ? { textContent: __DATA_BLOCKS[id] } : null; },
+    querySelectorAll() { return []; },
+};
+const window = { location: { protocol: 'file:', hostname: '' }, scrollTo() {} };
+const localStorage = { getItem() { return null; }, setItem() {} };
+"""
+# A working in-memory DOM, for running the page's UI code (see jsbench).
+DOM_STUB_FILE = Path(__file__).with_name("domstub.js")
+
+_SCRIPT = re.compile(r"<script>(.*?)</script>", re.DOTALL)
+_BODY = re.compile(r"<body[^>]*>(.*?)<script>", re.DOTALL)
+_DATA_BLOCK = re.compile(r'<script type="application/json" id="([^"]+)">(.*?)</script>', re.DOTALL)
+
+
+class JSRuntimeError(RuntimeError):
+    pass
+
+
+def find_engine() -> str | None:
+    """Path of a usable ``node`` binary, or None."""
+    return os.environ.get("QUIZ_NODE") or shutil.which("node")
+
+
+def page_script(html: str) -> str:
+    """The page's main inline ``<script>`` block."""
+    blocks = _SCRIPT.findall(html)
+    if not blocks:
+        raise JSRuntimeError("no inline <script> block found")
+    return max(blocks, key=len)
+
+
+def page_markup(html: str) -> str:
+    """The page's ``<body>`` markup up to its script block."""
+    m = _BODY.search(html)
+    if m is None:
+        raise JSRuntimeError("no <body> before the inline <script> block")
+    return m.group(1)
+
+
+def data_blocks(html: str) -> dict[str, str]:
+    """The text of the page's JSON ``<script>`` blocks by element id."""
+    return dict(_DATA_BLOCK.findall(html))
+
+
+def run_with_driver(html: str, driver: str, payload: Any = None, *, engine: str | None = None,
+                    stub: str = DOM_STUB, timeout: float = 60.0) -> Any:
+    """Evaluate the page script followed by ``driver`` and return its JSON output.
+
+    ``payload`` is serialised to stdin; the driver reads it with
+    ``require('fs').readFileSync(0)`` and must print one JSON document.
+    The page's JSON blocks are available to the stub as ``__DATA_BLOCKS``.
+    """
+    blocks = f"const __DATA_BLOCKS = {json.dumps(data_blocks(html))};\n"
+    return run_script(blocks + stub + page_script(html) + "\n;\n" + driver, payload, engine=engine, timeout=timeout)
+
+
+def run_script(source: str, payload: Any = None, *, engine: str | None = None,
+               engine_args: Sequence[str] = (), timeout: float = 60.0) -> Any:
+    """Run ``source`` as a node program and return the JSON document it prints."""
+    engine = engine or find_engine()
+    if engine is None:
+        raise JSRuntimeError("no JavaScript engine found (install node or set QUIZ_NODE)")
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False, encoding="utf-8") as fh:
+        fh.write(source)
+        path = fh.name
+    try:
+        proc = subprocess.run(
+            [engine, *engine_args, path],
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    finally:
+        os.unlink(path)
+    if proc.returncode != 0:
+        raise JSRuntimeError(proc.stderr.strip() or f"{engine} exited with {proc.returncode}")
+    return json.loads(proc.stdout)
@@ -0,0 +1,419 @@
+"""Load the quiz data tables out of the page source.
+
+:func:`load_tables` parses raw tables (JSON-shaped dicts and lists) from a
+source string; :func:`load_tables_cached` does the same for a file, keeping
+the parse in an on-disk cache; :func:`load_model` wraps the cached tables in
+the typed :class:`QuizModel`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import marshal
+import math
+import os
+import random
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Iterable
+
+from .jsliteral import extract, find_literal, parse_literal
+
+ROOT = Path(__file__).resolve().parent.parent
+# The page source: an HTML document that keeps its historical .py name.
+SOURCE_PAGE = ROOT / "catholic_quiz_IMPROVED.py"
+
+ALL_TABLES = (
+    "SCHOOLS",
+    "MAX_POSSIBLE_SCORES",
+    "SCHOOL_QUESTION_COUNTS",
+    "MIN_QUESTIONS_THRESHOLD",
+    "SCHOOL_DESC",
+    "SCHOOL_FIGURES",
+    "HETERODOXY_STATUS",
+    "AXES",
+    "AXIS_ENDPOINTS",
+    "AXIS_MULTIPLIER",
+    "QUESTIONS",
+    "CATEGORIES",
+    "QUESTION_TOPICS",
+    "CITATIONS",
+    "DEFAULT_CITATIONS",
+)
+
+
+def read_page(path: str | Path = SOURCE_PAGE) -> str:
+    return Path(path).read_text(encoding="utf-8")
+
+
+# How deep to record entry locations per table (see SourceMap); others get 1.
+LOCATE_DEPTH = {"QUESTIONS": 3, "CATEGORIES": 3}
+
+
+def load_tables(source: str, names: Iterable[str] = ALL_TABLES,
+                source_map: "SourceMap | None" = None) -> dict[str, Any]:
+    """Parse the named ``const`` tables from the page source.
+
+    If ``source_map`` is given, the offsets of table entries are recorded in
+    it while parsing, for error messages that point at the source line.
+    """
+    if source_map is None:
+        return {name: extract(source, name) for name in names}
+    tables = {}
+    for name in names:
+        start = find_literal(source, name)
+        offsets = source_map.offsets[name] = {(): start}
+        tables[name], _ = parse_literal(source, start, locate=LOCATE_DEPTH.get(name, 1), offsets=offsets)
+    return tables
+
+
+class SourceMap:
+    """Source offsets of table entries, keyed by table name and entry path.
+
+    Paths index into the parsed value: ``("QUESTIONS", 12, "options", 3)``
+    is the fourth option of question 12. :meth:`where` resolves a path to
+    ``file:line``, falling back to the nearest recorded ancestor.
+
+    ``source`` may be None when the offsets come from the parse cache; the
+    file is then read the first time a line number is needed.
+    """
+
+    __slots__ = ("path", "filename", "_source", "offsets")
+
+    def __init__(self, source: str | None, filename: str | Path = SOURCE_PAGE.name):
+        self.path = Path(filename)
+        self.filename = self.path.name
+        self._source = source
+        self.offsets: dict[str, dict[tuple, int]] = {}
+
+    @property
+    def source(self) -> str:
+        if self._source is None:
+            self._source = read_page(self.path)
+        return self._source
+
+    def line(self, table: str, *path: Any) -> int:
+        offsets = self.offsets.get(table, {})
+        while path not in offsets and path:
+            path = path[:-1]
+        return self.source.count("\n", 0, offsets.get(path, 0)) + 1
+
+    def where(self, table: str, *path: Any) -> str:
+        return f"{self.filename}:{self.line(table, *path)}"
+
+
+class CategoryIndex:
+    """Flat QUESTIONS index -> CATEGORIES index lookup.
+
+    ``CATEGORIES`` lists question indices per category; this inverts it once
+    so the category of a question is a single array read. ``problems`` holds
+    ``(path, message)`` pairs for questions that are missing, listed twice, or
+    out of range (``path`` points into CATEGORIES, or is empty); such
+    questions map to :data:`UNASSIGNED`.
+    """
+
+    UNASSIGNED = 255
+
+    __slots__ = ("category_of", "problems")
+
+    def __init__(self, categories: list[dict[str, Any]], question_count: int):
+        self.category_of = array("B", [self.UNASSIGNED]) * question_count
+        self.problems: list[tuple[tuple, str]] = []
+        for c, cat in enumerate(categories):
+            for k, q in enumerate(cat["questions"]):
+                path = (c, "questions", k)
+                if not isinstance(q, int) or not 0 <= q < question_count:
+                    self.problems.append(
+                        (path, f"category {cat['id']!r} lists question {q!r}, but QUESTIONS has {question_count}")
+                    )
+                elif self.category_of[q] != self.UNASSIGNED:
+                    first = categories[self.category_of[q]]["id"]
+                    self.problems.append((path, f"question {q} is listed in both {first!r} and {cat['id']!r}"))
+                else:
+                    self.category_of[q] = c
+        missing = [q for q in range(question_count) if self.category_of[q] == self.UNASSIGNED]
+        if missing:
+            self.problems.append(((), f"question(s) {', '.join(map(str, missing))} belong to no category"))
+
+    @classmethod
+    def from_tables(cls, tables: dict[str, Any]) -> "CategoryIndex":
+        return cls(tables["CATEGORIES"], len(tables["QUESTIONS"]))
+
+    def __getitem__(self, question: int) -> int:
+        return self.category_of[question]
+
+
+# ---------------------------------------------------------------------------
+# Parse cache
+# ---------------------------------------------------------------------------
+
+CACHE_DIR = Path(os.environ.get("CATHOLIC_QUIZ_CACHE", ROOT / ".cache"))
+# Bump when the parser or the cached layout changes. marshal data is only
+# readable by the Python version that wrote it, so that is part of the key too.
+CACHE_VERSION = 1
+_CACHE_TAG = (CACHE_VERSION, sys.version_info[:2])
+
+
+def _cache_file(path: Path, names: tuple[str, ...], cache_dir: Path) -> Path:
+    key = hashlib.sha1("\0".join((str(path.resolve()),) + names).encode()).hexdigest()[:16]
+    return cache_dir / f"{path.stem}-{key}.marshal"
+
+
+def load_tables_cached(path: str | Path = SOURCE_PAGE, names: Iterable[str] = ALL_TABLES, *,
+                       cache_dir: str | Path | None = CACHE_DIR) -> tuple[dict[str, Any], SourceMap]:
+    """Parse ``names`` from the page at ``path``, reusing an earlier parse.
+
+    The cache entry records the file's mtime, size and SHA-256. A matching
+    mtime and size is trusted without reading the file; otherwise the file is
+    hashed, and only a changed hash triggers a re-parse (a fresh checkout
+    touches mtimes without changing content). ``cache_dir=None`` disables
+    the cache.
+    """
+    path = Path(path)
+    names = tuple(names)
+    if cache_dir is None:
+        source = read_page(path)
+        source_map = SourceMap(source, path)
+        return load_tables(source, names, source_map), source_map
+    cache_file = _cache_file(path, names, Path(cache_dir))
+    st = path.stat()
+    try:
+        tag, mtime_ns, size, digest, tables, offsets = marshal.loads(cache_file.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        tag = None
+    if tag == _CACHE_TAG and (mtime_ns, size) == (st.st_mtime_ns, st.st_size):
+        source_map = SourceMap(None, path)
+        source_map.offsets = offsets
+        return tables, source_map
+    data = path.read_bytes()
+    source = data.decode("utf-8")
+    source_map = SourceMap(source, path)
+    current = hashlib.sha256(data).hexdigest()
+    if tag == _CACHE_TAG and digest == current:
+        source_map.offsets = offsets
+    else:
+        tables = load_tables(source, names, source_map)
+    entry = (_CACHE_TAG, st.st_mtime_ns, st.st_size, current, tables, source_map.offsets)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(marshal.dumps(entry))
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass  # read-only checkout: the cache is an optimisation only
+    return tables, source_map
+
+
+# ---------------------------------------------------------------------------
+# Typed model
+# ---------------------------------------------------------------------------
+
+class _Record:
+    """Base for the slotted model records: positional init and a short repr."""
+
+    __slots__ = ()
+
+    def __init__(self, *values: Any):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:2])
+        return f"{type(self).__name__}({fields}, ...)"
+
+
+class Figure(_Record):
+    """A representative theologian of a school (SCHOOL_FIGURES)."""
+
+    __slots__ = ("name", "era", "bio", "works")
+    name: str
+    era: str
+    bio: str
+    works: str
+
+
+class Heterodoxy(_Record):
+    """Magisterial status note for a school (HETERODOXY_STATUS)."""
+
+    __slots__ = ("level", "title", "warning", "documents", "guidance")
+    level: str
+    title: str
+    warning: str
+    documents: str
+    guidance: str
+
+
+class School(_Record):
+    __slots__ = ("index", "code", "name", "summary", "affirmations", "figure", "heterodoxy",
+                 "max_possible", "question_count")
+    index: int
+    code: str
+    name: str
+    summary: str
+    affirmations: tuple[str, ...]
+    figure: Figure | None
+    heterodoxy: Heterodoxy | None
+    max_possible: int
+    question_count: int
+
+
+class Axis(_Record):
+    __slots__ = ("index", "code", "name", "low", "high", "multiplier")
+    index: int
+    code: str
+    name: str
+    low: str
+    high: str
+    multiplier: int
+
+
+class Option(_Record):
+    __slots__ = ("text", "weights")
+    text: str
+    weights: dict[str, int]
+
+
+class Question(_Record):
+    __slots__ = ("index", "text", "options", "axis_weights", "category")
+    index: int
+    text: str
+    options: tuple[Option, ...]
+    axis_weights: dict[str, int]
+    category: int
+
+
+class Category(_Record):
+    __slots__ = ("index", "id", "name", "short_name", "icon", "questions")
+    index: int
+    id: str
+    name: str
+    short_name: str
+    icon: str
+    questions: tuple[int, ...]
+
+
+class Citation(_Record):
+    __slots__ = ("title", "author", "year", "note")
+    title: str
+    author: str | None
+    year: int | None
+    note: str | None
+
+
+class Topic(_Record):
+    """Background for a question (QUESTION_TOPICS); ``prompt`` is its geminiPrompt."""
+
+    __slots__ = ("topic", "description", "reading", "prompt")
+    topic: str
+    description: str
+    reading: str
+    prompt: str
+
+
+def _citation(entry: dict[str, Any]) -> Citation:
+    return Citation(entry["title"], entry.get("author"), entry.get("year"), entry.get("note"))
+
+
+def _topic(entry: dict[str, Any]) -> Topic:
+    return Topic(entry["topic"], entry["description"], entry["reading"], entry["geminiPrompt"])
+
+
+class QuizModel:
+    """The quiz data as typed records, indexed the way the page indexes it.
+
+    ``tables`` keeps the raw parse for code (scoring, the build) that works on
+    the JSON shapes directly. Build with :meth:`from_tables` or
+    :func:`load_model`; the tables are expected to have passed validation.
+    """
+
+    __slots__ = ("tables", "schools", "school_index", "axes", "questions", "categories",
+                 "topics", "default_topic", "citations", "default_citations", "min_questions_threshold")
+
+    def __init__(self, tables: dict[str, Any]):
+        self.tables = tables
+        desc, figures, status = tables["SCHOOL_DESC"], tables["SCHOOL_FIGURES"], tables["HETERODOXY_STATUS"]
+        self.schools: tuple[School, ...] = tuple(
+            School(
+                i, code, name,
+                desc.get(code, {}).get("summary", ""),
+                tuple(desc.get(code, {}).get("affirmations", ())),
+                Figure(*(figures[code][k] for k in ("figure", "era", "bio", "works"))) if code in figures else None,
+                Heterodoxy(*(status[code][k] for k in Heterodoxy.__slots__)) if code in status else None,
+                tables["MAX_POSSIBLE_SCORES"].get(code, 0),
+                tables["SCHOOL_QUESTION_COUNTS"].get(code, 0),
+            )
+            for i, (code, name) in enumerate(tables["SCHOOLS"])
+        )
+        self.school_index = {school.code: school for school in self.schools}
+        endpoints, multiplier = tables["AXIS_ENDPOINTS"], tables["AXIS_MULTIPLIER"]
+        self.axes: tuple[Axis, ...] = tuple(
+            Axis(i, code, name, *endpoints[code], multiplier[code]) for i, (code, name) in enumerate(tables["AXES"])
+        )
+        self.categories: tuple[Category, ...] = tuple(
+            Category(i, c["id"], c["name"], c["shortName"], c["icon"], tuple(c["questions"]))
+            for i, c in enumerate(tables["CATEGORIES"])
+        )
+        category_of = CategoryIndex.from_tables(tables).category_of
+        self.questions: tuple[Question, ...] = tuple(
+            Question(q, question["text"], tuple(Option(text, weights) for text, weights in question["options"]),
+                     question.get("axis_weights", {}), category_of[q])
+            for q, question in enumerate(tables["QUESTIONS"])
+        )
+        topics = tables["QUESTION_TOPICS"]
+        self.default_topic = _topic(topics["default"])
+        self.topics: dict[int, Topic] = {int(k): _topic(v) for k, v in topics.items() if k != "default"}
+        self.citations: dict[int, tuple[Citation, ...]] = {
+            int(k): tuple(map(_citation, v)) for k, v in tables["CITATIONS"].items()
+        }
+        self.default_citations = tuple(map(_citation, tables["DEFAULT_CITATIONS"]))
+        self.min_questions_threshold: int = tables["MIN_QUESTIONS_THRESHOLD"]
+
+    @classmethod
+    def from_tables(cls, tables: dict[str, Any]) -> "QuizModel":
+        return cls(tables)
+
+    def topic(self, question: int) -> Topic:
+        """The question's topic, or the default topic (as the page falls back)."""
+        return self.topics.get(question, self.default_topic)
+
+    def citations_for(self, question: int) -> tuple[Citation, ...]:
+        return self.citations.get(question, self.default_citations)
+
+
+def load_model(path: str | Path = SOURCE_PAGE, *, cache_dir: str | Path | None = CACHE_DIR) -> QuizModel:
+    """Typed model of the page at ``path`` (see :func:`load_tables_cached`)."""
+    tables, _ = load_tables_cached(path, cache_dir=cache_dir)
+    return QuizModel(tables)
+
+
+def bank_hash(tables: dict[str, Any]) -> str:
+    """Fingerprint of the question bank: every question's text, options and weights, in order.
+
+    Saved progress carries it, so answers recorded against another bank are
+    recognised instead of being read against the wrong questions.
+    """
+    canonical = json.dumps(tables["QUESTIONS"], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+# The quiz lengths offered on the start screen.
+QUIZ_LENGTHS = (26, 51, 77, 103, 128, 154)
+
+
+def select_questions(model: QuizModel, count: int, rng: random.Random | None = None) -> list[int]:
+    """A stratified selection of about ``count`` questions (mirrors selectQuestionsForQuiz).
+
+    Each category contributes in proportion to its size, at least one and at
+    most all of its questions, picked at random; the result lists categories
+    in CATEGORIES order and each category's questions in question order.
+    """
+    rng = rng or random
+    total = len(model.questions)
+    selected: list[int] = []
+    for cat in model.categories:
+        # Math.round: halves round up.
+        take = min(max(1, math.floor(count * len(cat.questions) / total + 0.5)), len(cat.questions))
+        selected += sorted(rng.sample(cat.questions, take))
+    return selected
@@ -0,0 +1,139 @@
+"""Generate the page's service worker, so repeat visits start from cache and work offline.
+
+``sw.js`` is written next to the page by the build (and by ``dist``, for
+the minified files). It carries a precache manifest with a content hash per
+file; when any file changes, so does ``sw.js``, and the browser installs the
+new worker, which fetches the new files into a fresh cache and deletes the
+old one. Requests are served as follows:
+
+the shell (the page, and self-hosted fonts)
+    cache first: the page starts without touching the network;
+data chunks (``explanations.js``)
+    stale-while-revalidate: the cached copy is served and refreshed in the
+    background;
+Google Fonts
+    the stylesheet stale-while-revalidate, the font files (whose URLs never
+    change) cache first.
+
+Everything else, including the AI proxy's requests, goes to the network
+untouched. The page only registers the worker when served over http(s).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable
+
+from .explain import EXPLANATIONS_CHUNK
+
+SERVICE_WORKER = "sw.js"
+# Loaded on demand by the page, and refreshed in the background once cached.
+DATA_CHUNKS = (EXPLANATIONS_CHUNK.name,)
+HASH_LENGTH = 16
+
+_TEMPLATE = """\
+// Generated by python -m catholic_quiz build (catholic_quiz/offline.py); do not edit.
+const VERSION = '@VERSION@';
+const PRECACHE = @PRECACHE@;
+const SHELL_CACHE = 'quiz-shell-' + VERSION;
+const DATA_CACHE = 'quiz-data-' + VERSION;
+const FONT_CACHE = 'quiz-fonts';
+const SHELL = new Set(PRECACHE.filter(entry => !entry.data).map(entry => entry.url));
+const DATA = new Set(PRECACHE.filter(entry => entry.data).map(entry => entry.url));
+
+self.addEventListener('install', event => {
+    const fill = (name, entries) => caches.open(name).then(cache =>
+        cache.addAll(entries.map(entry => new Request(entry.url, { cache: 'reload' }))));
+    event.waitUntil(Promise.all([
+        fill(SHELL_CACHE, PRECACHE.filter(entry => !entry.data)),
+        fill(DATA_CACHE, PRECACHE.filter(entry => entry.data)),
+    ]).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    const keep = [SHELL_CACHE, DATA_CACHE, FONT_CACHE];
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names.filter(name => name.startsWith('quiz-') && !keep.includes(name))
+            .map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+function cacheable(response) {
+    return response.ok || response.type === 'opaque';
+}
+
+async function cacheFirst(cacheName, request, key = request) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(key, { ignoreSearch: true });
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (cacheable(response)) cache.put(key, response.clone());
+    return response;
+}
+
+async function staleWhileRevalidate(event, cacheName, key) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(key, { ignoreSearch: true });
+    const refresh = fetch(event.request).then(response => {
+        if (cacheable(response)) cache.put(key, response.clone());
+        return response;
+    });
+    if (!cached) return refresh;
+    event.waitUntil(refresh.catch(() => {}));
+    return cached;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin === self.location.origin) {
+        const scope = new URL(self.registration.scope).pathname;
+        if (!url.pathname.startsWith(scope)) return;
+        let name = url.pathname.slice(scope.length);
+        if (request.mode === 'navigate' && name === '') name = PRECACHE[0].url;
+        if (SHELL.has(name)) event.respondWith(cacheFirst(SHELL_CACHE, request, name));
+        else if (DATA.has(name)) event.respondWith(staleWhileRevalidate(event, DATA_CACHE, name));
+    } else if (url.hostname === 'fonts.googleapis.com') {
+        event.respondWith(staleWhileRevalidate(event, FONT_CACHE, request));
+    } else if (url.hostname === 'fonts.gstatic.com') {
+        event.respondWith(cacheFirst(FONT_CACHE, request));
+    }
+});
+"""
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def precache_manifest(directory: Path, shell: Iterable[str], data: Iterable[str] = ()) -> list[dict]:
+    """``{url, revision[, data]}`` for each file of ``shell`` then ``data`` that exists in ``directory``.
+
+    The first shell entry is the page, served for navigations to the worker's scope.
+    """
+    manifest = []
+    for names, is_data in ((shell, False), (data, True)):
+        for name in names:
+            path = directory / name
+            if path.exists():
+                entry = {"url": name, "revision": content_hash(path.read_bytes())}
+                if is_data:
+                    entry["data"] = True
+                manifest.append(entry)
+    return manifest
+
+
+def render_service_worker(manifest: list[dict]) -> str:
+    version = content_hash(json.dumps(manifest, sort_keys=True).encode("utf-8"))
+    return _TEMPLATE.replace("@VERSION@", version).replace("@PRECACHE@", json.dumps(manifest, indent=4))
+
+
+def write_service_worker(directory: Path, shell: Iterable[str], data: Iterable[str] = DATA_CHUNKS) -> Path:
+    """Write ``sw.js`` into ``directory`` for the given shell files and data chunks."""
+    manifest = precache_manifest(directory, shell, data)
+    path = directory / SERVICE_WORKER
+    path.write_text(render_service_worker(manifest), encoding="utf-8")
+    return path
@@ -0,0 +1,732 @@
+"""Caching proxy between the quiz page and a local LLM server.
+
+The AI helper talks to Ollama (``/api/chat``) or an OpenAI-compatible server
+(LM Studio, llama.cpp: ``/v1/chat/completions``). Pointing the page's
+endpoint at this proxy instead serves repeated prompts, such as the same
+"explain this question" request from every user, from an on-disk LRU cache
+keyed by (provider, model, normalised messages). Other requests are
+forwarded unchanged, and every response carries CORS headers, so the page
+also works from ``file://``. Streamed completions (Ollama NDJSON, OpenAI
+SSE) are relayed chunk by chunk as they arrive and cached once complete.
+
+Identical requests arriving while one is being generated share that single
+upstream generation. Generations per model are capped (``--max-concurrent``)
+and the rest wait in a queue served round-robin across clients; streamed
+requests receive their queue position while they wait. Upstream requests
+reuse a pool of keep-alive connections::
+
+    python -m catholic_quiz proxy --backend http://localhost:11434
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from .model import CACHE_DIR
+
+# Chat endpoint -> API flavour
+CHAT_PATHS = {"/api/chat": "ollama", "/v1/chat/completions": "openai"}
+# Model listings used by the page's settings panel; forwarded uncached.
+PASSTHROUGH_PATHS = frozenset({"/api/tags", "/v1/models"})
+STREAM_TYPES = {"ollama": "application/x-ndjson", "openai": "text/event-stream"}
+# Queue and in-flight counters, as JSON.
+STATUS_PATH = "/proxy/status"
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+# The page's AI_MAX_OUTPUT_TOKENS and AI_DEFAULT_CONTEXT.
+MAX_OUTPUT_TOKENS = 1000
+DEFAULT_CONTEXT = 4096
+# What a failed or cut-short upstream exchange raises: socket errors, and
+# http.client's own (a bad status line, a body shorter than announced).
+BACKEND_ERRORS = (OSError, http.client.HTTPException)
+
+
+def normalize_messages(messages: list[dict[str, Any]]) -> list[list[str]]:
+    """``[[role, content], ...]`` with whitespace differences removed.
+
+    Line endings, trailing spaces and surrounding blank lines do not change
+    what the model is asked, so they do not change the cache key.
+    """
+    out = []
+    for message in messages:
+        content = str(message.get("content", "")).replace("\r\n", "\n")
+        content = "\n".join(line.rstrip() for line in content.split("\n")).strip()
+        out.append([str(message.get("role", "")).lower(), content])
+    return out
+
+
+def cache_key(provider: str, model: str, messages: list[dict[str, Any]]) -> str:
+    payload = json.dumps([provider, model, normalize_messages(messages)], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chat_request(provider: str, model: str, messages: list[dict[str, str]], *, stream: bool = False,
+                 context_tokens: int = DEFAULT_CONTEXT) -> tuple[str, dict[str, Any]]:
+    """``(path, body)`` of a chat request to ``provider`` (the page's ollama,
+    lmstudio, llamacpp or custom), as the page's buildAPIRequest makes it."""
+    if provider == "ollama":
+        return "/api/chat", {"model": model, "messages": messages, "stream": stream, "keep_alive": "30m",
+                             "options": {"temperature": 0.7, "num_predict": MAX_OUTPUT_TOKENS,
+                                         "num_ctx": context_tokens}}
+    body = {"model": model, "messages": messages, "temperature": 0.7, "max_tokens": MAX_OUTPUT_TOKENS,
+            "stream": stream}
+    if provider == "llamacpp":
+        body["cache_prompt"] = True
+    return "/v1/chat/completions", body
+
+
+def extract_content(flavour: str, data: dict[str, Any]) -> str | None:
+    """The assistant text of a non-streamed completion (as the page extracts it)."""
+    if flavour == "ollama":
+        return (data.get("message") or {}).get("content")
+    choices = data.get("choices") or [{}]
+    return (choices[0].get("message") or {}).get("content")
+
+
+def stream_delta(flavour: str, line: bytes) -> tuple[str, bool]:
+    """``(text, finished)`` for one line of a streamed completion.
+
+    Ollama streams one JSON object per line, the last with ``"done": true``;
+    OpenAI-compatible servers send SSE ``data:`` lines ending in ``[DONE]``.
+    """
+    line = line.strip()
+    if flavour == "ollama":
+        if not line:
+            return "", False
+        data = json.loads(line)
+        return (data.get("message") or {}).get("content") or "", bool(data.get("done"))
+    if not line.startswith(b"data:"):
+        return "", False
+    payload = line[5:].strip()
+    if payload == b"[DONE]":
+        return "", True
+    choices = json.loads(payload).get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or "", False
+
+
+def completion_body(flavour: str, model: str, content: str) -> str:
+    """A non-streamed response carrying ``content``, in the flavour's format."""
+    message = {"role": "assistant", "content": content}
+    if flavour == "ollama":
+        data = {"model": model, "message": message, "done": True}
+    else:
+        data = {"object": "chat.completion", "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}]}
+    return json.dumps(data, ensure_ascii=False)
+
+
+def stream_body(flavour: str, model: str, content: str) -> bytes:
+    """A complete streamed response carrying ``content`` as a single delta."""
+    message = {"role": "assistant", "content": content}
+    if flavour == "ollama":
+        lines = [{"model": model, "message": message, "done": False},
+                 {"model": model, "message": {"role": "assistant", "content": ""}, "done": True}]
+        return "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8")
+    chunk = {"object": "chat.completion.chunk", "model": model,
+             "choices": [{"index": 0, "delta": message, "finish_reason": "stop"}]}
+    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\ndata: [DONE]\n\n".encode("utf-8")
+
+
+class ResponseCache:
+    """Completed responses on disk, evicted least-recently-used past ``max_bytes``.
+
+    One file per key under ``directory``; recency is the file mtime, which is
+    refreshed on every hit, so the order survives restarts. The index of
+    keys and sizes is kept in memory.
+    """
+
+    __slots__ = ("directory", "max_bytes", "_entries", "_size", "_lock")
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime_ns)
+        self._entries: OrderedDict[str, int] = OrderedDict((p.stem, p.stat().st_size) for p in files)
+        self._size = sum(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError):
+            self.discard(key)
+            return None
+        return entry
+
+    def put(self, key: str, entry: dict[str, Any]) -> None:
+        data = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        path = self._path(key)
+        tmp = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old, size = self._entries.popitem(last=False)
+                self._size -= size
+                self._path(old).unlink(missing_ok=True)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._size -= self._entries.pop(key, 0)
+        self._path(key).unlink(missing_ok=True)
+
+
+class Backend:
+    """The upstream LLM server, reached over a pool of keep-alive connections."""
+
+    __slots__ = ("url", "host", "port", "https", "prefix", "max_idle", "_idle", "_lock")
+
+    def __init__(self, url: str, max_idle: int = 8):
+        parts = urlsplit(url.rstrip("/"))
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"backend must be an http(s) URL, got {url!r}")
+        self.url = url.rstrip("/")
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.prefix = parts.path
+        self.max_idle = max_idle
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=timeout)
+
+    def open(self, method: str, path: str, body: bytes | None = None,
+             timeout: float = 600.0) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send a request; return the connection and the unread response.
+
+        Hand both back through :meth:`release` once the response is read. A
+        pooled connection the server has since closed is retried once on a
+        fresh one.
+        """
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except BaseException as exc:
+                conn.close()
+                if not isinstance(exc, (http.client.RemoteDisconnected, ConnectionError)):
+                    raise
+        conn = self._connect(timeout)
+        try:
+            conn.request(method, self.prefix + path, body=body, headers=headers)
+            return conn, conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+    def release(self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        """Return ``conn`` to the pool if its response was read to the end."""
+        if response.isclosed() and not response.will_close:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    return
+        conn.close()
+
+    def request(self, method: str, path: str, body: bytes | None = None,
+                timeout: float = 600.0) -> tuple[int, str, bytes]:
+        """``(status, content type, body)`` of one upstream request."""
+        conn, response = self.open(method, path, body, timeout)
+        try:
+            return response.status, response.getheader("Content-Type", "application/json"), response.read()
+        finally:
+            self.release(conn, response)
+
+
+class FairQueue:
+    """At most ``limit`` concurrent generations for one model.
+
+    Waiting requests are served round-robin across clients, FIFO within a
+    client, so one user queueing many questions cannot starve the others.
+    The average generation time is tracked to estimate waits.
+    """
+
+    __slots__ = ("limit", "active", "avg_seconds", "_waiting", "_cond")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.avg_seconds: float | None = None
+        # client -> tickets, in the order clients will next be served
+        self._waiting: OrderedDict[str, list[object]] = OrderedDict()
+        self._cond = threading.Condition()
+
+    @property
+    def queued(self) -> int:
+        return sum(map(len, self._waiting.values()))
+
+    def _position(self, client: str, ticket: object) -> int:
+        """How many waiting requests will be admitted before ``ticket``."""
+        rank = self._waiting[client].index(ticket)
+        ahead = rank
+        before = True
+        for other, tickets in self._waiting.items():
+            if other == client:
+                before = False
+            else:
+                ahead += min(len(tickets), rank + 1 if before else rank)
+        return ahead
+
+    def eta(self, position: int) -> float | None:
+        """Rough seconds until a request ``position`` places back starts."""
+        if self.avg_seconds is None:
+            return None
+        return (position // self.limit + 1) * self.avg_seconds
+
+    def acquire(self, client: str, on_wait: Callable[[int, float | None], None] | None = None) -> None:
+        """Block until admitted; ``on_wait(position, eta)`` is called whenever the position changes."""
+        ticket = object()
+        with self._cond:
+            if self.active < self.limit and not self._waiting:
+                self.active += 1
+                return
+            self._waiting.setdefault(client, []).append(ticket)
+            last = None
+            while True:
+                head_client = next(iter(self._waiting))
+                if self.active < self.limit and self._waiting[head_client][0] is ticket:
+                    break
+                position = self._position(client, ticket)
+                if on_wait is not None and position != last:
+                    last = position
+                    on_wait(position, self.eta(position))
+                self._cond.wait(timeout=5.0)
+            self._waiting[client].pop(0)
+            if self._waiting[client]:
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+            self.active += 1
+            self._cond.notify_all()
+
+    def release(self, seconds: float | None = None) -> None:
+        with self._cond:
+            self.active -= 1
+            if seconds is not None:
+                self.avg_seconds = seconds if self.avg_seconds is None else 0.8 * self.avg_seconds + 0.2 * seconds
+            self._cond.notify_all()
+
+
+class Flight:
+    """One upstream generation, shared by every identical request that arrives while it runs.
+
+    The runner thread sets the status, publishes body chunks as they come in
+    and finishes; each client handler replays the chunks from the start.
+    """
+
+    __slots__ = ("status", "content_type", "chunks", "done", "_cond")
+
+    def __init__(self):
+        self.status: int | None = None
+        self.content_type = "application/json"
+        self.chunks: list[bytes] = []
+        self.done = False
+        self._cond = threading.Condition()
+
+    def start(self, status: int, content_type: str) -> None:
+        with self._cond:
+            self.status, self.content_type = status, content_type
+            self._cond.notify_all()
+
+    def publish(self, data: bytes) -> None:
+        with self._cond:
+            self.chunks.append(data)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            if self.status is None:
+                self.status = 502
+                self.chunks.append(json.dumps({"error": {"message": "generation failed"}}).encode("utf-8"))
+            self.done = True
+            self._cond.notify_all()
+
+    def wait_started(self) -> tuple[int, str]:
+        with self._cond:
+            self._cond.wait_for(lambda: self.status is not None)
+            return self.status, self.content_type
+
+    def follow(self):
+        """Yield the published chunks, waiting for new ones until the flight is done."""
+        sent = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.done or len(self.chunks) > sent)
+                chunks, done = self.chunks[sent:], self.done
+            sent += len(chunks)
+            yield from chunks
+            if done and sent == len(self.chunks):
+                return
+
+
+def queue_notice(flavour: str, position: int, eta: float | None) -> bytes:
+    """A stream line telling the client it is waiting for a generation slot.
+
+    NDJSON gets an empty, not-done message carrying a ``queue`` field; SSE
+    gets a comment line, which SSE clients ignore.
+    """
+    queue = {"position": position, "eta": None if eta is None else round(eta, 1)}
+    if flavour == "ollama":
+        line = {"message": {"role": "assistant", "content": ""}, "done": False, "queue": queue}
+        return (json.dumps(line) + "\n").encode("utf-8")
+    return f": queue {json.dumps(queue)}\n\n".encode("utf-8")
+
+
+def stream_error(flavour: str, message: str) -> bytes:
+    """An error line in the flavour's stream format (the page raises it)."""
+    if flavour == "ollama":
+        return (json.dumps({"error": message}) + "\n").encode("utf-8")
+    return f"data: {json.dumps({'error': {'message': message}})}\n\n".encode("utf-8")
+
+
+class ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], backend: Backend, cache: ResponseCache | None,
+                 verbose: bool = False, max_concurrent: int = 1):
+        super().__init__(address, ProxyHandler)
+        self.backend = backend
+        self.cache = cache
+        self.verbose = verbose
+        self.max_concurrent = max_concurrent
+        self.flights: dict[tuple[str, bool], Flight] = {}
+        self.queues: dict[str, FairQueue] = {}
+        self.lock = threading.Lock()
+
+    def queue_for(self, model: str) -> FairQueue:
+        with self.lock:
+            queue = self.queues.get(model)
+            if queue is None:
+                queue = self.queues[model] = FairQueue(self.max_concurrent)
+            return queue
+
+    def join_flight(self, key: tuple[str, bool], start: Callable[[Flight], None]) -> tuple[Flight, bool]:
+        """The in-flight generation for ``key``, starting one if there is none.
+
+        Returns ``(flight, coalesced)``; ``coalesced`` is True when an
+        identical request was already running.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                return flight, True
+            flight = self.flights[key] = Flight()
+        threading.Thread(target=self._run_flight, args=(key, flight, start), daemon=True).start()
+        return flight, False
+
+    def _run_flight(self, key: tuple[str, bool], flight: Flight, start: Callable[[Flight], None]) -> None:
+        try:
+            start(flight)
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.finish()
+
+    def status(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "in_flight": len(self.flights),
+                "cached": len(self.cache) if self.cache is not None else None,
+                "models": {
+                    model: {"active": q.active, "queued": q.queued, "limit": q.limit, "avg_seconds": q.avg_seconds}
+                    for model, q in self.queues.items()
+                },
+            }
+
+
+class Generation:
+    """Runs one chat request upstream on behalf of a :class:`Flight`."""
+
+    __slots__ = ("server", "path", "body", "flavour", "model", "stream", "key", "client")
+
+    def __init__(self, server: ProxyServer, path: str, body: bytes, flavour: str, model: str,
+                 stream: bool, key: str, client: str):
+        self.server = server
+        self.path = path
+        self.body = body
+        self.flavour = flavour
+        self.model = model
+        self.stream = stream
+        self.key = key
+        self.client = client
+
+    def __call__(self, flight: Flight) -> None:
+        queue = self.server.queue_for(self.model)
+
+        def on_wait(position: int, eta: float | None) -> None:
+            # Only streams can carry progress; a plain request just waits.
+            if self.stream:
+                if flight.status is None:
+                    flight.start(200, STREAM_TYPES[self.flavour])
+                flight.publish(queue_notice(self.flavour, position, eta))
+
+        queue.acquire(self.client, on_wait)
+        started = time.perf_counter()
+        elapsed = None
+        try:
+            content = self.relay(flight) if self.stream else self.forward(flight)
+            if content is not None:
+                elapsed = time.perf_counter() - started
+                cache = self.server.cache
+                if cache is not None and content:
+                    body = completion_body(self.flavour, self.model, content) if self.stream else flight.chunks[-1].decode("utf-8")
+                    cache.put(self.key, {"content": content, "body": body})
+        finally:
+            queue.release(elapsed)
+
+    def fail(self, flight: Flight, message: str) -> None:
+        if flight.status is None:
+            flight.start(502, "application/json")
+            flight.publish(json.dumps({"error": {"message": message}}).encode("utf-8"))
+        else:  # a queued stream has already answered 200
+            flight.publish(stream_error(self.flavour, message))
+
+    def forward(self, flight: Flight) -> str | None:
+        backend = self.server.backend
+        try:
+            status, content_type, data = backend.request("POST", self.path, self.body)
+        except BACKEND_ERRORS as exc:
+            self.fail(flight, f"backend {backend.url} unreachable: {exc}")
+            return None
+        flight.start(status, content_type)
+        flight.publish(data)
+        if status != 200:
+            return None
+        try:
+            return extract_content(self.flavour, json.loads(data))
+        except ValueError:
+            return None
+
+    def relay(self, flight: Flight) -> str | None:
+        """Publish a streamed completion chunk by chunk as it arrives.
+
+        Returns the full text once the backend's end marker has been seen,
+        or None if the stream failed or was cut short.
+        """
+        backend = self.server.backend
+        try:
+            conn, response = backend.open("POST", self.path, self.body)
+        except BACKEND_ERRORS as exc:
+            self.fail(flight, f"backend {backend.url} unreachable: {exc}")
+            return None
+        parts: list[str] = []
+        finished = malformed = False
+        pending = b""
+        try:
+            if response.status != 200:
+                message = response.read().decode("utf-8", "replace")
+                if flight.status is None:
+                    flight.start(response.status, response.getheader("Content-Type", "application/json"))
+                    flight.publish(message.encode("utf-8"))
+                else:
+                    flight.publish(stream_error(self.flavour, f"HTTP {response.status}: {message[:200]}"))
+                return None
+            if flight.status is None:
+                flight.start(200, response.getheader("Content-Type", STREAM_TYPES[self.flavour]))
+            while True:
+                data = response.read1(65536)
+                if data:
+                    flight.publish(data)
+                    *lines, pending = (pending + data).split(b"\n")
+                else:
+                    lines, pending = [pending], b""
+                for line in lines:
+                    try:
+                        text, done = stream_delta(self.flavour, line)
+                    except ValueError:
+                        malformed = True
+                        continue
+                    parts.append(text)
+                    finished = finished or done
+                if not data:
+                    break
+        except BACKEND_ERRORS as exc:
+            if pending:  # end the cut-off line, so the error is a line of its own
+                flight.publish(b"\n")
+            self.fail(flight, f"backend stream interrupted: {exc}")
+            return None
+        finally:
+            backend.release(conn, response)
+        return "".join(parts) if finished and not malformed else None
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    server: ProxyServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_cors_headers(self) -> None:
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.send_header("Access-Control-Expose-Headers", "X-Cache")
+
+    def reply(self, status: int, body: bytes, content_type: str = "application/json",
+              cache_status: str | None = None) -> None:
+        self.send_response(status)
+        self.send_cors_headers()
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if cache_status:
+            self.send_header("X-Cache", cache_status)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_chunked(self, content_type: str, cache_status: str) -> None:
+        self.send_response(200)
+        self.send_cors_headers()
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Cache", cache_status)
+        self.end_headers()
+
+    def write_chunk(self, data: bytes) -> None:
+        # wfile is unbuffered: each chunk goes out as soon as it is written.
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+
+    def reply_error(self, status: int, message: str) -> None:
+        self.reply(status, json.dumps({"error": {"message": message}}).encode("utf-8"))
+
+    def do_OPTIONS(self) -> None:
+        self.send_response(204)
+        self.send_cors_headers()
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == STATUS_PATH:
+            self.reply(200, json.dumps(self.server.status()).encode("utf-8"))
+        elif path in PASSTHROUGH_PATHS:
+            self.forward("GET", None)
+        else:
+            self.reply_error(404, f"unknown path {path}")
+
+    def do_POST(self) -> None:
+        path = urlsplit(self.path).path
+        flavour = CHAT_PATHS.get(path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if flavour is None:
+            self.reply_error(404, f"unknown path {path}")
+            return
+        try:
+            request = json.loads(body)
+            messages = request["messages"]
+        except (ValueError, KeyError, TypeError):
+            self.reply_error(400, "expected a JSON chat request with messages")
+            return
+        cache = self.server.cache
+        model = str(request.get("model", ""))
+        stream = bool(request.get("stream"))
+        key = cache_key(f"{flavour}@{self.server.backend.url}", model, messages)
+        if cache is not None:
+            entry = cache.get(key)
+            if entry is not None:
+                if stream:
+                    self.start_chunked(STREAM_TYPES[flavour], "HIT")
+                    self.write_chunk(stream_body(flavour, model, entry["content"]))
+                    self.end_chunked()
+                else:
+                    self.reply(200, entry["body"].encode("utf-8"), cache_status="HIT")
+                return
+        generation = Generation(self.server, self.path, body, flavour, model, stream, key, self.client_address[0])
+        flight, coalesced = self.server.join_flight((key, stream), generation)
+        self.follow(flight, stream, "COALESCED" if coalesced else "MISS")
+
+    def follow(self, flight: Flight, stream: bool, cache_status: str) -> None:
+        """Send the flight's response to this client as it is produced."""
+        status, content_type = flight.wait_started()
+        try:
+            if not stream or status != 200:
+                self.reply(status, b"".join(flight.follow()), content_type, cache_status)
+                return
+            self.start_chunked(content_type, cache_status)
+            for chunk in flight.follow():
+                self.write_chunk(chunk)
+            self.end_chunked()
+        except OSError:
+            # This client went away; the generation carries on for the others
+            # (and for the cache).
+            self.close_connection = True
+
+    def forward(self, method: str, body: bytes | None) -> None:
+        try:
+            status, content_type, data = self.server.backend.request(method, self.path, body)
+        except BACKEND_ERRORS as exc:
+            self.reply_error(502, f"backend {self.server.backend.url} unreachable: {exc}")
+            return
+        self.reply(status, data, content_type)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz proxy", description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="http://localhost:11434",
+                        help="LLM server URL (default: %(default)s, Ollama)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR / "llm",
+                        help="response cache directory (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+                        help="cache size limit in MB (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="forward every request")
+    parser.add_argument("--max-concurrent", type=int, default=1,
+                        help="generations running at once per model; others queue (default: %(default)s)")
+    parser.add_argument("--pool-size", type=int, default=8,
+                        help="idle keep-alive connections kept to the backend (default: %(default)s)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    server = ProxyServer((args.host, args.port), Backend(args.backend, args.pool_size), cache,
+                         args.verbose, max(1, args.max_concurrent))
+    cached = f"{len(cache)} cached response(s)" if cache is not None else "cache disabled"
+    print(f"proxying http://{args.host}:{args.port} -> {args.backend} ({cached})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,181 @@
+"""BM25 retrieval over the page's reference material, for grounding the AI helper.
+
+The passages are the citations (CITATIONS and DEFAULT_CITATIONS), the topic
+readings (QUESTION_TOPICS), the school summaries (SCHOOL_DESC) and the
+representative figures' works (SCHOOL_FIGURES), each deduplicated. The
+build emits the inverted index as typed arrays (see
+``build.emit_retrieval_index``); the page refers back to its own tables for
+the passage texts, so nothing is shipped twice. Query tokenization and
+scoring here are the reference the page's retrievePassages is checked
+against.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from array import array
+from typing import Any, Iterable
+
+from .model import QuizModel
+
+# Okapi BM25 parameters (the usual defaults).
+K1 = 1.2
+B = 0.75
+
+# English function words, left out of every index.
+FUNCTION_WORDS = frozenset("""
+a about after all also an and any are as at be because been before being between both but by can
+could did do does doing during each for from had has have he her his how i if in into is it its
+itself may me more most my no nor not of on one only or other our out over own same she should so
+some such than that the their them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your
+""".split())
+# For retrieval, also the words every AI helper request and most passages
+# share ("explain this question ... theological concepts").
+NOISE_WORDS = frozenset("""
+catholic concept explain help mean meaning option please question simple simpler tell term
+theological theology understand
+""".split())
+STOPWORDS = FUNCTION_WORDS | NOISE_WORDS
+
+_WORD = re.compile(r"[a-z0-9]+")
+_COMBINING = re.compile("[\u0300-\u036f]")
+
+
+def tokenize(text: str, stopwords: frozenset[str] = STOPWORDS) -> list[str]:
+    """Lowercased, accent-folded words without stopwords; plural -s is stripped.
+
+    Mirrors the page's indexTokens; change both together.
+    """
+    text = _COMBINING.sub("", unicodedata.normalize("NFKD", text.lower()))
+    tokens = []
+    for word in _WORD.findall(text):
+        if len(word) < 2 or word in stopwords:
+            continue
+        if len(word) > 3 and word[-1] == "s" and word[-2] not in "sui":
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class Passage:
+    """One retrievable passage; ``ref`` says where the page finds it.
+
+    ``ref`` is ``("c", question key, i)`` for ``CITATIONS[key][i]`` (key
+    ``"default"`` for DEFAULT_CITATIONS), ``("t", key)`` for a
+    QUESTION_TOPICS entry (not the default), ``("s", code)`` for SCHOOL_DESC and ``("f", code)``
+    for SCHOOL_FIGURES.
+    """
+
+    __slots__ = ("ref", "label", "text")
+
+    def __init__(self, ref: tuple, label: str, text: str):
+        self.ref = ref
+        self.label = label
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"Passage({self.ref!r}, {self.label!r})"
+
+
+def collect_passages(model: QuizModel) -> list[Passage]:
+    """The passages in index order, duplicates kept at their first reference.
+
+    The texts are formatted as the page's passageText formats them.
+    """
+    passages: list[Passage] = []
+    seen: set[str] = set()
+
+    def add(ref: tuple, label: str, text: str) -> None:
+        if text not in seen:
+            seen.add(text)
+            passages.append(Passage(ref, label, text))
+
+    citations = [(str(q), cites) for q, cites in sorted(model.citations.items())]
+    for key, cites in citations + [("default", model.default_citations)]:
+        for i, c in enumerate(cites):
+            byline = ", ".join(str(x) for x in (c.author, c.year) if x)
+            text = c.title + (f" ({byline})" if byline else "") + (f". {c.note}" if c.note else "")
+            add(("c", key, i), c.title, text)
+    # The default topic is a generic placeholder with nothing to retrieve.
+    for key, t in sorted(model.topics.items()):
+        add(("t", str(key)), t.topic, f"{t.topic}: {t.description} Further reading: {t.reading}")
+    for school in model.schools:
+        if school.summary:
+            add(("s", school.code), school.name, f"{school.name}: {school.summary}")
+    for school in model.schools:
+        if school.figure:
+            f = school.figure
+            add(("f", school.code), f.name, f"{f.name} ({f.era}, {school.name}). Works: {f.works}")
+    return passages
+
+
+class RetrievalIndex:
+    """Inverted index with BM25 ranking over :func:`collect_passages`.
+
+    Postings are kept per term as parallel arrays of passage ids (ascending)
+    and term frequencies, the layout the page receives.
+    """
+
+    __slots__ = ("passages", "terms", "docs", "freqs", "lengths", "avg_length", "_idf")
+
+    def __init__(self, passages: list[Passage]):
+        self.passages = passages
+        postings: dict[str, dict[int, int]] = {}
+        self.lengths = array("H")
+        for doc, passage in enumerate(passages):
+            tokens = tokenize(passage.text)
+            self.lengths.append(len(tokens))
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[doc] = counts.get(doc, 0) + 1
+        self.terms: dict[str, int] = {term: i for i, term in enumerate(sorted(postings))}
+        self.docs = [array("H", postings[term]) for term in self.terms]
+        self.freqs = [array("B", (min(n, 255) for n in postings[term].values())) for term in self.terms]
+        self.avg_length = sum(self.lengths) / max(1, len(passages))
+        n = len(passages)
+        self._idf = [math.log(1 + (n - len(d) + 0.5) / (len(d) + 0.5)) for d in self.docs]
+
+    @classmethod
+    def from_model(cls, model: QuizModel) -> "RetrievalIndex":
+        return cls(collect_passages(model))
+
+    def search(self, query: str, k: int = 4) -> list[tuple[float, Passage]]:
+        """The ``k`` best passages for ``query`` as ``(score, passage)``, best first."""
+        scores: dict[int, float] = {}
+        lengths, avg = self.lengths, self.avg_length
+        for token in dict.fromkeys(tokenize(query)):
+            t = self.terms.get(token)
+            if t is None:
+                continue
+            idf = self._idf[t]
+            for doc, tf in zip(self.docs[t], self.freqs[t]):
+                norm = K1 * (1 - B + B * lengths[doc] / avg)
+                scores[doc] = scores.get(doc, 0.0) + idf * (tf * (K1 + 1)) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(score, self.passages[doc]) for doc, score in best]
+
+    def js_tables(self) -> dict[str, Any]:
+        """The index as the flat arrays the page loads (see emit_retrieval_index).
+
+        Postings are concatenated in term order; each term's passage ids are
+        stored as gaps from the previous id, which keeps the numbers small.
+        """
+        return {
+            "refs": [list(p.ref) for p in self.passages],
+            "terms": " ".join(self.terms),
+            "counts": array("H", map(len, self.docs)),
+            "gaps": array("H", (doc - prev for d in self.docs for prev, doc in zip((0,) + tuple(d), d))),
+            "freqs": array("B", (tf for f in self.freqs for tf in f)),
+            "lengths": self.lengths,
+        }
+
+
+def format_passages(results: Iterable[tuple[float, Passage]]) -> str:
+    """The reference block appended to the AI helper's system prompt."""
+    lines = [f"- {p.text}" for _, p in results]
+    if not lines:
+        return ""
+    return "Reference passages from the quiz's sources:\n" + "\n".join(lines)
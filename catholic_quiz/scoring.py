@@ -0,0 +1,453 @@
+"""Reference implementation of the page's index-based scoring engine.
+
+This mirrors ``compileWeights``, ``calculateScores``, ``calculateHybridScore``,
+``rankSchools``, ``schoolContributions``, ``schoolImprovements`` and
+``answerSensitivity`` in the page script operation for
+operation, so hybrid scores agree with the browser bit for bit. The build uses it to derive the
+reciprocal tables it emits and to cross-check the JavaScript engine.
+
+:func:`score_batches` has no page counterpart: it scores many respondents at
+once for offline analysis and agrees with :func:`calculate_scores` exactly;
+:func:`batch_hybrid` and :func:`best_schools` turn such a batch into hybrid
+scores and top matches; :func:`hybrid_bounds` gives the range those scores can take.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any, Container, Iterator, Mapping, Sequence
+
+PCT_WEIGHT = 0.65
+MATCH_WEIGHT = 0.35
+
+
+class WeightMatrix:
+    """Option weights flattened into parallel arrays (compressed rows).
+
+    Row ``option_row_base[q] + option`` holds the school weights of that
+    option in ``weight_school``/``weight_value`` between
+    ``weight_row_start[row]`` and ``weight_row_start[row + 1]``. Axis weights
+    are stored per question the same way.
+
+    The transpose is kept too: the rows that weight school ``s`` are
+    ``school_entry_row``/``school_entry_value`` between
+    ``school_entry_start[s]`` and ``school_entry_start[s + 1]``, in row order,
+    and ``row_question`` maps a row back to its question.
+    """
+
+    __slots__ = (
+        "school_codes",
+        "axis_codes",
+        "option_row_base",
+        "weight_row_start",
+        "weight_school",
+        "weight_value",
+        "axis_row_start",
+        "axis_weight_axis",
+        "axis_weight_value",
+        "row_question",
+        "school_entry_start",
+        "school_entry_row",
+        "school_entry_value",
+        "inv_max_possible",
+        "inv_question_count",
+        "eligible",
+    )
+
+    @classmethod
+    def from_tables(cls, tables: Mapping[str, Any]) -> "WeightMatrix":
+        self = cls()
+        self.school_codes = [code for code, _ in tables["SCHOOLS"]]
+        self.axis_codes = [code for code, _ in tables["AXES"]]
+        school_index = {code: i for i, code in enumerate(self.school_codes)}
+        axis_index = {code: i for i, code in enumerate(self.axis_codes)}
+
+        self.option_row_base = array("H")
+        self.weight_row_start = array("H", [0])
+        self.weight_school = array("B")
+        self.weight_value = array("b")
+        self.axis_row_start = array("H", [0])
+        self.axis_weight_axis = array("B")
+        self.axis_weight_value = array("b")
+        self.row_question = array("H")
+        for q_index, q in enumerate(tables["QUESTIONS"]):
+            self.option_row_base.append(len(self.weight_row_start) - 1)
+            for _text, weights in q["options"]:
+                self.row_question.append(q_index)
+                for code, w in weights.items():
+                    s = school_index.get(code)
+                    if s is None:
+                        continue
+                    self.weight_school.append(s)
+                    self.weight_value.append(w)
+                self.weight_row_start.append(len(self.weight_school))
+            for ax, w in (q.get("axis_weights") or {}).items():
+                a = axis_index.get(ax)
+                if a is None:
+                    continue
+                self.axis_weight_axis.append(a)
+                self.axis_weight_value.append(w)
+            self.axis_row_start.append(len(self.axis_weight_axis))
+        self._transpose()
+
+        max_possible = tables["MAX_POSSIBLE_SCORES"]
+        counts = tables["SCHOOL_QUESTION_COUNTS"]
+        threshold = tables["MIN_QUESTIONS_THRESHOLD"]
+        # Same fallbacks as the old per-code lookups: ``MAX_POSSIBLE_SCORES[code] || 1``.
+        self.inv_max_possible = array("d", (1 / (max_possible.get(c) or 1) for c in self.school_codes))
+        self.inv_question_count = array("d", (1 / (counts.get(c) or 1) for c in self.school_codes))
+        self.eligible = array("B", ((counts.get(c) or 0) >= threshold for c in self.school_codes))
+        return self
+
+    def _transpose(self) -> None:
+        """Fill the school -> rows index from the row -> schools one (a counting sort)."""
+        start = array("H", bytes(2 * (len(self.school_codes) + 1)))
+        for s in self.weight_school:
+            start[s + 1] += 1
+        for s in range(len(self.school_codes)):
+            start[s + 1] += start[s]
+        fill = array("H", start)
+        self.school_entry_row = array("H", bytes(2 * len(self.weight_school)))
+        self.school_entry_value = array("b", bytes(len(self.weight_school)))
+        for row in range(len(self.weight_row_start) - 1):
+            for k in range(self.weight_row_start[row], self.weight_row_start[row + 1]):
+                s = self.weight_school[k]
+                self.school_entry_row[fill[s]] = row
+                self.school_entry_value[fill[s]] = self.weight_value[k]
+                fill[s] += 1
+        self.school_entry_start = start
+
+    @property
+    def school_count(self) -> int:
+        return len(self.school_codes)
+
+    def option_count(self, q: int) -> int:
+        end = self.option_row_base[q + 1] if q + 1 < len(self.option_row_base) else len(self.weight_row_start) - 1
+        return end - self.option_row_base[q]
+
+
+class ScoreSheet:
+    """Raw per-school scores, match counts and axis totals for one respondent."""
+
+    __slots__ = ("scores", "match_counts", "axis_scores")
+
+    def __init__(self, matrix: WeightMatrix):
+        self.scores = array("d", bytes(8 * matrix.school_count))
+        self.match_counts = array("H", bytes(2 * matrix.school_count))
+        self.axis_scores = array("d", bytes(8 * len(matrix.axis_codes)))
+
+
+def calculate_scores(
+    matrix: WeightMatrix, selected: Sequence[int], answers: Sequence[int | None]
+) -> ScoreSheet:
+    """Score ``answers[i]`` (an option index or None) for question ``selected[i]``."""
+    sheet = ScoreSheet(matrix)
+    scores, counts, axis_scores = sheet.scores, sheet.match_counts, sheet.axis_scores
+    row_start, school, value = matrix.weight_row_start, matrix.weight_school, matrix.weight_value
+    axis_start, axis_of, axis_value = matrix.axis_row_start, matrix.axis_weight_axis, matrix.axis_weight_value
+    for q, ans in zip(selected, answers):
+        if ans is None:
+            continue
+        row = matrix.option_row_base[q] + ans
+        for k in range(row_start[row], row_start[row + 1]):
+            s = school[k]
+            scores[s] += value[k]
+            counts[s] += 1
+        for k in range(axis_start[q], axis_start[q + 1]):
+            axis_scores[axis_of[k]] += axis_value[k]
+    return sheet
+
+
+def hybrid_scores(matrix: WeightMatrix, sheet: ScoreSheet) -> array:
+    """Hybrid affinity (0-100) for every school, in SCHOOLS order."""
+    inv_max, inv_count = matrix.inv_max_possible, matrix.inv_question_count
+    return array(
+        "d",
+        (
+            (PCT_WEIGHT * (raw * inv_max[s]) + MATCH_WEIGHT * (n * inv_count[s])) * 100
+            for s, (raw, n) in enumerate(zip(sheet.scores, sheet.match_counts))
+        ),
+    )
+
+
+def rank_schools(matrix: WeightMatrix, hybrid: Sequence[float]) -> list[int]:
+    """Eligible school indices by descending hybrid score; ties keep SCHOOLS order."""
+    ranked = [s for s in range(matrix.school_count) if matrix.eligible[s]]
+    ranked.sort(key=hybrid.__getitem__, reverse=True)
+    return ranked
+
+
+# Respondents scored per block by score_batches: big enough to amortize the
+# per-row work, small enough that each block's integers stay in cache.
+BATCH_BLOCK = 16384
+_LANE = 0x10000
+_CHOSEN = [bytes(int(b == option + 1) for b in range(256)) for option in range(255)]
+_ANSWERED = bytes([0] + [1] * 255)
+
+
+class ScoreBatch:
+    """Scores for a block of respondents, one array per school or axis.
+
+    ``scores[s][r]``, ``match_counts[s][r]`` and ``axis_scores[a][r]`` are
+    what :func:`calculate_scores` gives respondent ``r`` of the block.
+    """
+
+    __slots__ = ("size", "scores", "match_counts", "axis_scores")
+
+    def __init__(self, size: int, scores: list[array], match_counts: list[array], axis_scores: list[array]):
+        self.size = size
+        self.scores = scores
+        self.match_counts = match_counts
+        self.axis_scores = axis_scores
+
+
+def score_batches(matrix: WeightMatrix, selected: Sequence[int], columns: Sequence[bytes],
+                  block: int = BATCH_BLOCK) -> Iterator[ScoreBatch]:
+    """Score many respondents at once, yielding a :class:`ScoreBatch` per ``block``.
+
+    ``columns[i]`` holds every respondent's answer to question
+    ``selected[i]``, one byte each: the option index plus one, or 0 when
+    unanswered.
+
+    Each respondent is a 32-bit lane of one big integer per school: a row's
+    weight times the row's 0/1 lane mask adds to every respondent at once.
+    The low 16 bits of a lane hold the raw score (at most 128 per question,
+    hence the limit on ``selected``), the high 16 bits the match count.
+    """
+    if len(selected) > 255:
+        raise ValueError(f"at most 255 questions can be batch scored, got {len(selected)}")
+    n = len(columns[0]) if columns else 0
+    if any(len(column) != n for column in columns):
+        raise ValueError("answer columns differ in length")
+    row_start, school, value = matrix.weight_row_start, matrix.weight_school, matrix.weight_value
+    axis_start, axis_of, axis_value = matrix.axis_row_start, matrix.axis_weight_axis, matrix.axis_weight_value
+    for lo in range(0, n, block):
+        size = min(block, n - lo)
+        spread = bytearray(4 * size)
+        totals = [0] * matrix.school_count
+        axis_totals = [0] * len(matrix.axis_codes)
+        for q, column in zip(selected, columns):
+            spread[0::4] = column[lo:lo + size]
+            lanes = bytes(spread)
+            base = matrix.option_row_base[q]
+            for option in range(matrix.option_count(q)):
+                row = base + option
+                if row_start[row] == row_start[row + 1]:
+                    continue
+                chosen = int.from_bytes(lanes.translate(_CHOSEN[option]), "little")
+                for k in range(row_start[row], row_start[row + 1]):
+                    totals[school[k]] += (value[k] + _LANE) * chosen
+            if axis_start[q] < axis_start[q + 1]:
+                answered = int.from_bytes(lanes.translate(_ANSWERED), "little")
+                for k in range(axis_start[q], axis_start[q + 1]):
+                    axis_totals[axis_of[k]] += axis_value[k] * answered
+        # Offsetting each low half by 2**15 makes it non-negative, so the halves
+        # separate; flipping that bit back leaves it in two's complement.
+        offset = int.from_bytes(b"\x00\x80\x00\x00" * size, "little")
+        unpacked = []
+        for total in totals + axis_totals:
+            lanes16 = array("h")
+            lanes16.frombytes(((total + offset) ^ offset).to_bytes(4 * size, "little"))
+            unpacked.append(lanes16)
+        schools = unpacked[:matrix.school_count]
+        yield ScoreBatch(size, [a[0::2] for a in schools], [a[1::2] for a in schools],
+                         [a[0::2] for a in unpacked[matrix.school_count:]])
+
+
+def batch_hybrid(matrix: WeightMatrix, batch: ScoreBatch, s: int) -> list[float]:
+    """School ``s``'s hybrid score for each respondent of ``batch``."""
+    a, b = matrix.inv_max_possible[s], matrix.inv_question_count[s]
+    # The same expression as hybrid_scores, so scores and ties agree exactly.
+    return [(PCT_WEIGHT * (raw * a) + MATCH_WEIGHT * (n * b)) * 100
+            for raw, n in zip(batch.scores[s], batch.match_counts[s])]
+
+
+def hybrid_bounds(matrix: WeightMatrix) -> list[tuple[float, float]]:
+    """The lowest and highest hybrid score each school can get, in SCHOOLS order.
+
+    Each question adds independently, so the bounds sum each question's
+    worst and best option (or no answer). They can pass 0-100: weights can be
+    negative, and MAX_POSSIBLE_SCORES or SCHOOL_QUESTION_COUNTS can be below
+    what the questions allow.
+    """
+    low = [0.0] * matrix.school_count
+    high = [0.0] * matrix.school_count
+    row_start, school, value = matrix.weight_row_start, matrix.weight_school, matrix.weight_value
+    inv_max, inv_count = matrix.inv_max_possible, matrix.inv_question_count
+    for q, base in enumerate(matrix.option_row_base):
+        worst: dict[int, float] = {}
+        best: dict[int, float] = {}
+        for row in range(base, base + matrix.option_count(q)):
+            for k in range(row_start[row], row_start[row + 1]):
+                s = school[k]
+                h = (PCT_WEIGHT * (value[k] * inv_max[s]) + MATCH_WEIGHT * inv_count[s]) * 100
+                worst[s] = min(worst.get(s, 0.0), h)
+                best[s] = max(best.get(s, 0.0), h)
+        for s, h in worst.items():
+            low[s] += h
+        for s, h in best.items():
+            high[s] += h
+    return list(zip(low, high))
+
+
+def best_schools(matrix: WeightMatrix, batch: ScoreBatch) -> tuple[list[int], list[float]]:
+    """Each respondent's top match in ``batch`` (``rank_schools(...)[0]``) and its hybrid score.
+
+    A respondent with no eligible school gets -1 and -inf.
+    """
+    top = [-1] * batch.size
+    best = [-math.inf] * batch.size
+    for s in range(matrix.school_count):
+        if not matrix.eligible[s]:
+            continue
+        hybrid = batch_hybrid(matrix, batch, s)
+        # Strictly greater: on a tie the earlier school stays on top, as in rank_schools.
+        for r in [r for r, h, m in zip(range(batch.size), hybrid, best) if h > m]:
+            best[r] = hybrid[r]
+            top[r] = s
+    return top, best
+
+
+def answer_rows(matrix: WeightMatrix, selected: Sequence[int], answers: Sequence[int | None]) -> array:
+    """The chosen option row per question (-1 where unanswered or not asked)."""
+    rows = array("h", [-1]) * len(matrix.option_row_base)
+    for q, ans in zip(selected, answers):
+        if ans is not None:
+            rows[q] = matrix.option_row_base[q] + ans
+    return rows
+
+
+def school_contributions(matrix: WeightMatrix, rows: Sequence[int], s: int) -> list[tuple[int, int, int]]:
+    """``(question, option, weight)`` of the chosen answers that weight school ``s``.
+
+    Largest weight first; ties keep question order. Only the school's own
+    entries in the reverse index are visited.
+    """
+    found = []
+    for k in range(matrix.school_entry_start[s], matrix.school_entry_start[s + 1]):
+        row = matrix.school_entry_row[k]
+        q = matrix.row_question[row]
+        if rows[q] == row:
+            found.append((q, row - matrix.option_row_base[q], matrix.school_entry_value[k]))
+    found.sort(key=lambda entry: -entry[2])
+    return found
+
+
+def answer_improvements(matrix: WeightMatrix, rows: Sequence[int], asked: Container[int], s: int,
+                        option_counts: Sequence[int], limit: int = 3) -> list[tuple[int, int, float]]:
+    """The changed answers that would raise school ``s``'s hybrid score most.
+
+    ``(question, option, gain)`` with ``gain`` in hybrid points, at most one
+    per asked question, best first. A question's rows are contiguous, so its
+    entries in the reverse index are too; only ``s``'s entries are visited.
+    ``option_counts[q]`` is the number of options of question ``q``.
+    """
+    pct = PCT_WEIGHT * matrix.inv_max_possible[s]
+    match = MATCH_WEIGHT * matrix.inv_question_count[s]
+    entry_row, entry_value = matrix.school_entry_row, matrix.school_entry_value
+    found = []
+    k, end = matrix.school_entry_start[s], matrix.school_entry_start[s + 1]
+    while k < end:
+        q = matrix.row_question[entry_row[k]]
+        group_end = k
+        current = matched = 0
+        while group_end < end and matrix.row_question[entry_row[group_end]] == q:
+            if entry_row[group_end] == rows[q]:
+                current, matched = entry_value[group_end], 1
+            group_end += 1
+        if q in asked:
+            base = matrix.option_row_base[q]
+            best = None
+            for j in range(k, group_end):
+                if entry_row[j] == rows[q]:
+                    continue
+                gain = (pct * (entry_value[j] - current) + match * (1 - matched)) * 100
+                if gain > 0 and (best is None or gain > best[2]):
+                    best = (q, entry_row[j] - base, gain)
+            # Dropping a negative weight: any option that does not weight s.
+            if matched and current < 0 and group_end - k < option_counts[q]:
+                gain = (pct * -current - match) * 100
+                if gain > 0 and (best is None or gain > best[2]):
+                    weighted = {entry_row[j] - base for j in range(k, group_end)}
+                    best = (q, next(o for o in range(option_counts[q]) if o not in weighted), gain)
+            if best:
+                found.append(best)
+        k = group_end
+    found.sort(key=lambda entry: -entry[2])
+    return found[:limit]
+
+
+def answer_sensitivity(matrix: WeightMatrix, sheet: ScoreSheet, hybrid: Sequence[float], ranked: Sequence[int],
+                       selected: Sequence[int], answers: Sequence[int | None]) -> list[tuple[int, int, int, float]]:
+    """How each single answer change would affect the top match.
+
+    For every answered question and every other option: ``(question, option,
+    rival, margin)``, where ``rival`` is the best school other than the
+    current top after the change and ``margin`` its hybrid score minus the
+    top's. The top match flips when ``margin > 0``, or ``margin == 0`` and the
+    rival comes first in SCHOOLS order (ties keep SCHOOLS order).
+
+    Moving from row ``a`` to row ``b`` only changes the schools those two
+    rows weight, so each candidate is scored from deltas on the score arrays,
+    and the best unchanged school is the first untouched one in ``ranked``.
+    """
+    if len(ranked) < 2:
+        return []
+    top = ranked[0]
+    row_start, school, value = matrix.weight_row_start, matrix.weight_school, matrix.weight_value
+    inv_max, inv_count, eligible = matrix.inv_max_possible, matrix.inv_question_count, matrix.eligible
+    scores, counts = sheet.scores, sheet.match_counts
+    delta: dict[int, list[int]] = {}
+    results = []
+    for q, ans in zip(selected, answers):
+        if ans is None:
+            continue
+        base = matrix.option_row_base[q]
+        for option in range(matrix.option_count(q)):
+            if option == ans:
+                continue
+            delta.clear()
+            for row, sign in ((base + ans, -1), (base + option, 1)):
+                for k in range(row_start[row], row_start[row + 1]):
+                    d = delta.setdefault(school[k], [0, 0])
+                    d[0] += sign * value[k]
+                    d[1] += sign
+            top_score = hybrid[top]
+            rival, rival_score = -1, 0.0
+            for s, (dw, dn) in delta.items():
+                h = (PCT_WEIGHT * ((scores[s] + dw) * inv_max[s]) + MATCH_WEIGHT * ((counts[s] + dn) * inv_count[s])) * 100
+                if s == top:
+                    top_score = h
+                elif eligible[s] and (rival < 0 or h > rival_score or h == rival_score and s < rival):
+                    rival, rival_score = s, h
+            for s in ranked:
+                if s != top and s not in delta:
+                    if rival < 0 or hybrid[s] > rival_score or hybrid[s] == rival_score and s < rival:
+                        rival, rival_score = s, hybrid[s]
+                    break
+            results.append((q, option, rival, rival_score - top_score))
+    return results
+
+
+def derived_school_stats(tables: Mapping[str, Any]) -> tuple[dict[str, int], dict[str, int]]:
+    """Recompute ``MAX_POSSIBLE_SCORES`` and ``SCHOOL_QUESTION_COUNTS`` from QUESTIONS.
+
+    The maximum is the sum over questions of the best option weight for the
+    school; the count is the number of questions with any option weighting it.
+    """
+    codes = [code for code, _ in tables["SCHOOLS"]]
+    max_possible = dict.fromkeys(codes, 0)
+    counts = dict.fromkeys(codes, 0)
+    for q in tables["QUESTIONS"]:
+        best: dict[str, int] = {}
+        for _text, weights in q["options"]:
+            for code, w in weights.items():
+                if code in max_possible and w > best.get(code, 0):
+                    best[code] = w
+                elif code in max_possible:
+                    best.setdefault(code, 0)
+        for code, w in best.items():
+            max_possible[code] += w
+            counts[code] += 1
+    return max_possible, counts
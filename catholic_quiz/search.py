@@ -0,0 +1,165 @@
+"""Full-text search over the schools, questions and answer options.
+
+Every school (code, name and summary), question and option is a document.
+An option document also carries the codes of the schools it gives points
+to, so ``search SSPX`` lists where that school scores. Words are tokenized
+as for retrieval (see :func:`catholic_quiz.retrieval.tokenize`), keeping
+everything but function words; the last query word also matches as a
+prefix, so ``molin`` finds "Molinist". Documents matching more of the
+query words rank first.
+
+Postings are stored per term as a count followed by the gaps between
+ascending document ids, all as LEB128 varints in a single byte string. The
+build ships that string base64-encoded to the page's search box::
+
+    python -m catholic_quiz search where does SSPX score
+"""
+
+from __future__ import annotations
+
+import base64
+import bisect
+import time
+from pathlib import Path
+
+from .model import CACHE_DIR, SOURCE_PAGE, QuizModel, load_model
+from .retrieval import FUNCTION_WORDS, tokenize
+
+SCHOOL = "school"
+QUESTION = "question"
+OPTION = "option"
+
+
+def encode_varints(values: list[int], out: bytearray) -> None:
+    for value in values:
+        while value >= 0x80:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+class Hit:
+    """A matching document: ``key`` is a school code, a question index or a
+    ``(question, option)`` pair, depending on ``kind``."""
+
+    __slots__ = ("doc", "kind", "key", "text")
+
+    def __init__(self, doc: int, kind: str, key, text: str):
+        self.doc = doc
+        self.kind = kind
+        self.key = key
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"Hit({self.kind!r}, {self.key!r})"
+
+
+class SearchIndex:
+    """Inverted index over the page's documents, in page document-id order.
+
+    Ids ``0 .. len(schools)`` are the schools, then the questions, then
+    every option in question order; the page derives the same numbering from
+    its own tables.
+    """
+
+    __slots__ = ("model", "options", "terms", "postings")
+
+    def __init__(self, model: QuizModel):
+        self.model = model
+        self.options = [(q.index, o) for q in model.questions for o in range(len(q.options))]
+        texts = [f"{s.code} {s.name} {s.summary}" for s in model.schools]
+        texts += [q.text for q in model.questions]
+        texts += [
+            " ".join([option.text] + [code for code, w in option.weights.items() if w > 0])
+            for q in model.questions for option in q.options
+        ]
+        postings: dict[str, list[int]] = {}
+        for doc, text in enumerate(texts):
+            for token in dict.fromkeys(tokenize(text, FUNCTION_WORDS)):
+                postings.setdefault(token, []).append(doc)
+        self.terms = sorted(postings)
+        self.postings = [postings[term] for term in self.terms]
+
+    def encode(self) -> bytes:
+        """The postings as one varint stream: per term, its count then its id gaps."""
+        out = bytearray()
+        for docs in self.postings:
+            encode_varints([len(docs)], out)
+            encode_varints([doc - prev for prev, doc in zip([0] + docs, docs)], out)
+        return bytes(out)
+
+    def encode_base64(self) -> str:
+        return base64.b64encode(self.encode()).decode("ascii")
+
+    def matching(self, token: str, prefix: bool = False) -> set[int]:
+        """Documents containing ``token`` (or, with ``prefix``, any term starting with it)."""
+        i = bisect.bisect_left(self.terms, token)
+        docs: set[int] = set()
+        while i < len(self.terms) and (self.terms[i] == token or prefix and self.terms[i].startswith(token)):
+            docs.update(self.postings[i])
+            i += 1
+            if not prefix:
+                break
+        return docs
+
+    def search(self, query: str, limit: int | None = None) -> list[Hit]:
+        """Documents containing any query word, those matching the most words first.
+
+        Ties keep document order: schools, then questions, then options.
+        """
+        tokens = list(dict.fromkeys(tokenize(query, FUNCTION_WORDS)))
+        if not tokens:
+            return []
+        prefix = not query[-1:].isspace()
+        matched: dict[int, int] = {}
+        for i, token in enumerate(tokens):
+            for doc in self.matching(token, prefix and i == len(tokens) - 1):
+                matched[doc] = matched.get(doc, 0) + 1
+        ranked = sorted(matched, key=lambda doc: (-matched[doc], doc))
+        return [self.hit(doc) for doc in ranked[:limit]]
+
+    def hit(self, doc: int) -> Hit:
+        schools, questions = self.model.schools, self.model.questions
+        if doc < len(schools):
+            school = schools[doc]
+            return Hit(doc, SCHOOL, school.code, f"{school.name}: {school.summary}")
+        q = doc - len(schools)
+        if q < len(questions):
+            return Hit(doc, QUESTION, q, questions[q].text)
+        q, o = self.options[q - len(questions)]
+        return Hit(doc, OPTION, (q, o), questions[q].options[o].text)
+
+
+def format_hit(model: QuizModel, hit: Hit, codes: set[str]) -> str:
+    if hit.kind == SCHOOL:
+        return f"{hit.key:<10} {hit.text}"
+    if hit.kind == QUESTION:
+        return f"{f'Q{hit.key + 1}':<10} {hit.text}"
+    q, o = hit.key
+    weights = model.questions[q].options[o].weights
+    scored = " ".join(f"{code} {weights[code]:+d}" for code in sorted(codes & weights.keys()))
+    return f"{f'Q{q + 1}.{o + 1}':<10} {hit.text}" + (f" [{scored}]" if scored else "")
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz search", description=__doc__.splitlines()[0])
+    parser.add_argument("query", nargs="+", help="words to look for; the last may be a prefix")
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    parser.add_argument("-n", "--limit", type=int, default=50, help="results to show (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="cache_dir", action="store_const", const=None, default=CACHE_DIR,
+                        help="parse the page even if a cached parse is up to date")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    model = load_model(args.source, cache_dir=args.cache_dir)
+    index = SearchIndex(model)
+    hits = index.search(" ".join(args.query))
+    elapsed = (time.perf_counter() - started) * 1000
+    # Query words that name schools, to show the weight each option gives them.
+    codes = {word.upper() for word in args.query} & model.school_index.keys()
+    for hit in hits[:args.limit]:
+        print(format_hit(model, hit, codes))
+    more = f", showing {args.limit}" if len(hits) > args.limit else ""
+    print(f"{len(hits)} result(s){more} in {elapsed:.1f} ms")
+    return 0 if hits else 1
@@ -0,0 +1,214 @@
+"""Decode and score shareable results links.
+
+The page's "Copy Share Link" button puts a respondent's answers in the
+link's fragment, ``index.html#r=<token>``, and the page scores them again
+when the link is opened. The token is base64url (unpadded) of:
+
+* a version byte (:data:`SHARE_VERSION`);
+* the first :data:`BANK_BYTES` bytes of the bank hash
+  (:func:`catholic_quiz.model.bank_hash`), so links made against another
+  question bank are refused instead of misread;
+* a form byte: :data:`FULL_FORM` when every question was asked, or
+  :data:`MASKED_FORM` followed by a bitmask of the asked questions
+  (question 0 in the low bit of the first byte);
+* for each asked question in question order, the option + 1 (0 if
+  unanswered) in just enough bits for the question's option count, packed
+  from the low bit up.
+
+A full 154-question quiz fits in about 60 bytes. This module reads and
+writes the same format as ``encodeResults``/``decodeResults`` in the page,
+and scores links in bulk, one line per link with its top schools::
+
+    python -m catholic_quiz share 'https://example.org/quiz/#r=AT...'
+    python -m catholic_quiz share --file links.txt --top 3 > results.tsv
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import itertools
+import math
+import re
+import sys
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+from .model import CACHE_DIR, SOURCE_PAGE, bank_hash, load_tables_cached
+from .scoring import WeightMatrix, calculate_scores, hybrid_scores, rank_schools
+
+SHARE_VERSION = 1
+BANK_BYTES = 3
+FULL_FORM = 0
+MASKED_FORM = 1
+
+_LINK_TOKEN = re.compile(r"#r=([A-Za-z0-9_-]+)$")
+_BARE_TOKEN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+class ShareError(ValueError):
+    """A results token that is malformed or belongs to another question bank."""
+
+
+class ShareCodec:
+    """Encoder and decoder of results tokens for one question bank."""
+
+    __slots__ = ("option_counts", "bank")
+
+    def __init__(self, option_counts: Sequence[int], bank: str):
+        self.option_counts = list(option_counts)
+        self.bank = bytes.fromhex(bank[:2 * BANK_BYTES])
+
+    @classmethod
+    def from_tables(cls, tables: dict[str, Any]) -> "ShareCodec":
+        return cls([len(q["options"]) for q in tables["QUESTIONS"]], bank_hash(tables))
+
+    def encode(self, selected: Sequence[int], answers: Sequence[int | None]) -> str:
+        """The token for ``answers`` (an option or None per position) to the ``selected`` questions."""
+        answer_of: dict[int, int | None] = dict(zip(selected, answers))
+        count = len(self.option_counts)
+        full = len(answer_of) == count
+        out = bytearray([SHARE_VERSION, *self.bank, FULL_FORM if full else MASKED_FORM])
+        if not full:
+            mask = sum(1 << q for q in answer_of)
+            out += mask.to_bytes(math.ceil(count / 8), "little")
+        acc = bits = 0
+        for q in range(count):
+            if q not in answer_of:
+                continue
+            answer = answer_of[q]
+            acc |= (0 if answer is None else answer + 1) << bits
+            bits += self.option_counts[q].bit_length()
+        out += acc.to_bytes(math.ceil(bits / 8), "little")
+        return base64.urlsafe_b64encode(bytes(out)).rstrip(b"=").decode("ascii")
+
+    def decode(self, token: str | bytes) -> tuple[list[int], list[int | None]]:
+        """``(selected, answers)`` from a token (or its :func:`token_bytes`); raises
+        :class:`ShareError` if it cannot be read."""
+        data = token_bytes(token) if isinstance(token, str) else token
+        header = BANK_BYTES + 2
+        if data[1:1 + BANK_BYTES] != self.bank:
+            raise ShareError(f"made with another question bank ({data[1:1 + BANK_BYTES].hex()}, "
+                             f"expected {self.bank.hex()})")
+        count = len(self.option_counts)
+        form, pos = data[header - 1], header
+        if form == FULL_FORM:
+            asked = range(count)
+        elif form == MASKED_FORM:
+            size = math.ceil(count / 8)
+            mask = int.from_bytes(data[pos:pos + size], "little")
+            asked = [q for q in range(count) if mask >> q & 1]
+            pos += size
+        else:
+            raise ShareError(f"unknown form {form}")
+        acc = int.from_bytes(data[pos:], "little")
+        available = 8 * (len(data) - pos)
+        selected: list[int] = []
+        answers: list[int | None] = []
+        for q in asked:
+            width = self.option_counts[q].bit_length()
+            available -= width
+            if available < 0:
+                raise ShareError("truncated")
+            value = acc & ((1 << width) - 1)
+            acc >>= width
+            if value > self.option_counts[q]:
+                raise ShareError(f"question {q + 1} has no option {value}")
+            selected.append(q)
+            answers.append(None if value == 0 else value - 1)
+        if not selected:
+            raise ShareError("no questions")
+        return selected, answers
+
+    def decode_columns(
+        self, tokens: Sequence[bytes]
+    ) -> tuple[list[bytearray], list[tuple[int, list[int], list[int | None]]]]:
+        """Decode many tokens for :func:`~catholic_quiz.scoring.score_batches`.
+
+        Returns one answer column per question (0 where a respondent was not
+        asked or did not answer) and, for each token that could be read, its
+        position in ``tokens`` with its ``(selected, answers)``; the others are
+        left out of both.
+        """
+        decoded = []
+        for i, token in enumerate(tokens):
+            try:
+                decoded.append((i, *self.decode(token)))
+            except ShareError:
+                continue
+        columns = [bytearray(len(decoded)) for _ in self.option_counts]
+        for r, (_, selected, answers) in enumerate(decoded):
+            for q, answer in zip(selected, answers):
+                if answer is not None:
+                    columns[q][r] = answer + 1
+        return columns, decoded
+
+
+def token_bytes(token: str) -> bytes:
+    """The raw bytes of a token, checked only for its version and header."""
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError) as exc:
+        raise ShareError(f"not base64url: {exc}") from None
+    if len(data) < BANK_BYTES + 2 or data[0] != SHARE_VERSION:
+        raise ShareError("unknown token version")
+    return data
+
+
+def link_token(link: str) -> str:
+    """The token of a results link, or of a bare token."""
+    link = link.strip()
+    if _BARE_TOKEN.fullmatch(link):
+        return link
+    m = _LINK_TOKEN.search(link)
+    if m is None:
+        raise ShareError("no #r= token in link")
+    return m.group(1)
+
+
+def read_links(paths: Iterable[Path]) -> Iterator[str]:
+    """The non-blank lines of each file (``-`` is stdin), read as they are needed."""
+    for path in paths:
+        fh = sys.stdin if str(path) == "-" else open(path, encoding="utf-8")
+        try:
+            yield from (line.strip() for line in fh if line.strip())
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz share", description=__doc__.splitlines()[0])
+    parser.add_argument("links", nargs="*", help="results links or bare tokens")
+    parser.add_argument("--file", action="append", default=[], type=Path,
+                        help="read links from this file, one per line ('-' for stdin; repeatable)")
+    parser.add_argument("--top", type=int, default=5, help="schools to list per link (default: %(default)s)")
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="cache_dir", action="store_const", const=None, default=CACHE_DIR,
+                        help="parse the page even if a cached parse is up to date")
+    args = parser.parse_args(argv)
+    if not args.links and not args.file:
+        parser.error("give links or --file")
+
+    tables, _ = load_tables_cached(args.source, cache_dir=args.cache_dir)
+    codec = ShareCodec.from_tables(tables)
+    matrix = WeightMatrix.from_tables(tables)
+    print("\t".join(["link", "asked", "answered", *(f"top{i + 1}" for i in range(args.top))]))
+    failed = 0
+    for n, link in enumerate(itertools.chain(args.links, read_links(args.file)), 1):
+        try:
+            selected, answers = codec.decode(link_token(link))
+        except ShareError as exc:
+            print(f"link {n}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        hybrid = hybrid_scores(matrix, calculate_scores(matrix, selected, answers))
+        ranked = rank_schools(matrix, hybrid)[:args.top]
+        answered = sum(a is not None for a in answers)
+        cells = [f"{matrix.school_codes[s]} {hybrid[s]:.2f}" for s in ranked]
+        print("\t".join([str(n), str(len(selected)), str(answered), *cells]))
+    if failed:
+        print(f"{failed} link(s) could not be read", file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,483 @@
+"""Aggregate statistics over stored submissions, in sketches that shards can merge.
+
+Scans the segments written by :mod:`catholic_quiz.ingest` once and keeps:
+
+* per question, how often it was asked and how often each option was chosen
+  (exact counts);
+* per school, a fixed-bin :class:`Histogram` of respondents' hybrid scores,
+  over the range the school's scores can take;
+* per axis, a :class:`QuantileDigest` (t-digest style) of the axis scores;
+* a :class:`CountMin` sketch of how often two schools are both among a
+  respondent's top :data:`CO_MATCHES` matches.
+
+Every part merges by adding counts, so segments can be scanned in parallel
+(``--jobs``), or on different machines, and the results combined. Saved
+statistics (``--save``) merge later without rescanning (``--merge``)::
+
+    python -m catholic_quiz stats                           # scan submissions/ and report
+    python -m catholic_quiz stats -j 4 --save shard.json    # one process per segment
+    python -m catholic_quiz stats --merge a.json b.json     # combine saved shards
+
+Submissions made with another question bank are skipped (and counted).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from .ingest import SUBMISSIONS_DIR, Record, read_records, segment_paths
+from .model import SOURCE_PAGE, load_tables_cached
+from .scoring import BATCH_BLOCK, WeightMatrix, batch_hybrid, hybrid_bounds, score_batches
+from .share import ShareCodec
+
+STATS_VERSION = 2
+HISTOGRAM_BINS = 50
+DIGEST_COMPRESSION = 200
+COUNT_MIN_WIDTH = 4096
+COUNT_MIN_DEPTH = 4
+# Pairs among each respondent's first CO_MATCHES matches are counted as co-occurring.
+CO_MATCHES = 3
+
+
+class Histogram:
+    """Counts of values in ``bins`` equal bins over [lo, hi].
+
+    Values outside the range are counted in ``below`` and ``above`` rather
+    than in the end bins, so a range that turns out too narrow shows up
+    instead of skewing the tails.
+    """
+
+    __slots__ = ("lo", "hi", "counts", "below", "above", "total")
+
+    def __init__(self, lo: float, hi: float, bins: int):
+        if not hi > lo:
+            raise ValueError(f"empty histogram range [{lo}, {hi}]")
+        self.lo = lo
+        self.hi = hi
+        self.counts = [0] * bins
+        self.below = 0
+        self.above = 0
+        self.total = 0.0
+
+    @property
+    def count(self) -> int:
+        return self.below + sum(self.counts) + self.above
+
+    def add_many(self, values: Sequence[float]) -> None:
+        counts, lo, hi, last = self.counts, self.lo, self.hi, len(self.counts) - 1
+        scale = len(self.counts) / (hi - lo)
+        for value in values:
+            if value < lo:
+                self.below += 1
+            elif value > hi:
+                self.above += 1
+            else:
+                i = int((value - lo) * scale)
+                counts[i if i < last else last] += 1
+        self.total += sum(values)
+
+    def mean(self) -> float:
+        count = self.count
+        return self.total / count if count else math.nan
+
+    def quantile(self, q: float) -> float:
+        """The value below which a fraction ``q`` of values lie, spreading each bin's values evenly.
+
+        A quantile among the values out of range is given as ``lo`` or ``hi``.
+        """
+        count = self.count
+        if not count:
+            return math.nan
+        width = (self.hi - self.lo) / len(self.counts)
+        target, seen = q * count, self.below
+        if self.below and target <= seen:
+            return self.lo
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= target:
+                return self.lo + width * (i + (target - seen) / n)
+            seen += n
+        return self.hi
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        if (other.lo, other.hi, len(other.counts)) != (self.lo, self.hi, len(self.counts)):
+            raise ValueError("histograms have different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.below += other.below
+        self.above += other.above
+        self.total += other.total
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"lo": self.lo, "hi": self.hi, "counts": self.counts,
+                "below": self.below, "above": self.above, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Histogram":
+        histogram = cls(data["lo"], data["hi"], len(data["counts"]))
+        histogram.counts = list(data["counts"])
+        histogram.below = data["below"]
+        histogram.above = data["above"]
+        histogram.total = data["total"]
+        return histogram
+
+
+class QuantileDigest:
+    """Approximate quantiles of a stream: a merging t-digest.
+
+    Values are buffered, then merged into weighted centroids whose size is
+    bounded by the arcsine scale function, so centroids stay small near the
+    tails and quantiles there stay accurate. ``compression`` bounds the
+    number of centroids (to about ``compression / 2``).
+    """
+
+    __slots__ = ("compression", "means", "weights", "low", "high", "_buffer")
+
+    def __init__(self, compression: int = DIGEST_COMPRESSION):
+        self.compression = compression
+        self.means: list[float] = []
+        self.weights: list[float] = []
+        self.low = math.inf
+        self.high = -math.inf
+        self._buffer: list[float] = []
+
+    @property
+    def count(self) -> float:
+        return sum(self.weights) + len(self._buffer)
+
+    def add_many(self, values: Iterable[float]) -> None:
+        self._buffer.extend(values)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k: float) -> float:
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        self.low = min(self.low, min(self._buffer))
+        self.high = max(self.high, max(self._buffer))
+        self._merge_centroids(itertools.chain(zip(self.means, self.weights), ((x, 1) for x in self._buffer)))
+        self._buffer = []
+
+    def _merge_centroids(self, centroids: Iterable[tuple[float, float]]) -> None:
+        """Replace the centroids by ``(mean, weight)`` pairs merged as far as the scale function allows."""
+        points = sorted(centroids)
+        total = sum(w for _, w in points)
+        means, weights = [], []
+        mean, weight = points[0]
+        done = 0
+        limit = total * self._q(self._k(0) + 1)
+        for x, w in points[1:]:
+            if done + weight + w <= limit:
+                weight += w
+                mean += (x - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                done += weight
+                limit = total * self._q(self._k(done / total) + 1)
+                mean, weight = x, w
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def mean(self) -> float:
+        self._compress()
+        total = sum(self.weights)
+        return sum(m * w for m, w in zip(self.means, self.weights)) / total if total else math.nan
+
+    def quantile(self, q: float) -> float:
+        """Interpolated between centroid centres, and out to the exact minimum and maximum at the ends."""
+        self._compress()
+        if not self.weights:
+            return math.nan
+        means, weights = self.means, self.weights
+        target = q * sum(weights)
+        centre = weights[0] / 2
+        if target <= centre:
+            return self.low + (means[0] - self.low) * (target / centre)
+        for i in range(1, len(means)):
+            following = centre + (weights[i - 1] + weights[i]) / 2
+            if target <= following:
+                return means[i - 1] + (means[i] - means[i - 1]) * (target - centre) / (following - centre)
+            centre = following
+        tail = sum(weights) - centre
+        return means[-1] + (self.high - means[-1]) * min(1.0, (target - centre) / tail)
+
+    def merge(self, other: "QuantileDigest") -> "QuantileDigest":
+        if other.compression != self.compression:
+            raise ValueError("digests have different compression")
+        self._compress()
+        other._compress()
+        if other.weights:
+            self.low = min(self.low, other.low)
+            self.high = max(self.high, other.high)
+            self._merge_centroids(itertools.chain(zip(self.means, self.weights), zip(other.means, other.weights)))
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        self._compress()
+        return {"compression": self.compression, "means": self.means, "weights": self.weights,
+                "low": self.low if self.weights else None, "high": self.high if self.weights else None}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "QuantileDigest":
+        digest = cls(data["compression"])
+        digest.means = list(data["means"])
+        digest.weights = list(data["weights"])
+        if digest.weights:
+            digest.low, digest.high = data["low"], data["high"]
+        return digest
+
+
+class CountMin:
+    """Approximate counts of keys in a ``depth`` x ``width`` count-min sketch.
+
+    Estimates never undercount; with probability ``1 - exp(-depth)`` one
+    overcounts by at most :attr:`error`. Keys are hashed with BLAKE2b rather
+    than :func:`hash`, so sketches from different processes line up.
+    """
+
+    __slots__ = ("width", "depth", "rows", "total")
+
+    def __init__(self, width: int = COUNT_MIN_WIDTH, depth: int = COUNT_MIN_DEPTH):
+        if not 1 <= depth <= 16:
+            raise ValueError("depth must be 1-16")
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    @property
+    def error(self) -> float:
+        return math.e / self.width * self.total
+
+    def _cells(self, key: bytes) -> list[int]:
+        digest = hashlib.blake2b(key, digest_size=4 * self.depth).digest()
+        return [int.from_bytes(digest[i:i + 4], "little") % self.width for i in range(0, 4 * self.depth, 4)]
+
+    def add(self, key: bytes, n: int = 1) -> None:
+        for row, cell in zip(self.rows, self._cells(key)):
+            row[cell] += n
+        self.total += n
+
+    def estimate(self, key: bytes) -> int:
+        return min(row[cell] for row, cell in zip(self.rows, self._cells(key)))
+
+    def merge(self, other: "CountMin") -> "CountMin":
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("count-min sketches have different dimensions")
+        self.rows = [[a + b for a, b in zip(mine, theirs)] for mine, theirs in zip(self.rows, other.rows)]
+        self.total += other.total
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"width": self.width, "depth": self.depth, "rows": self.rows, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CountMin":
+        sketch = cls(data["width"], data["depth"])
+        sketch.rows = [list(row) for row in data["rows"]]
+        sketch.total = data["total"]
+        return sketch
+
+
+def pair_key(a: str, b: str) -> bytes:
+    """The :class:`CountMin` key of two schools, in either order."""
+    return "\t".join(sorted((a, b))).encode("utf-8")
+
+
+class QuizStats:
+    """Statistics of the submissions made against one question bank; see the module docstring."""
+
+    __slots__ = ("bank", "school_codes", "axis_codes", "submissions", "skipped",
+                 "asked", "chosen", "school_scores", "axis_scores", "co_matches")
+
+    def __init__(self, codec: ShareCodec, matrix: WeightMatrix):
+        self.bank = codec.bank.hex()
+        self.school_codes = list(matrix.school_codes)
+        self.axis_codes = list(matrix.axis_codes)
+        self.submissions = 0
+        self.skipped = 0
+        self.asked = [0] * len(codec.option_counts)
+        self.chosen = [[0] * n for n in codec.option_counts]
+        # Hybrid scores are not confined to 0-100 (see hybrid_bounds), so each
+        # school's bins cover its own achievable range, in whole points.
+        self.school_scores = [Histogram(math.floor(lo), max(math.ceil(hi), math.floor(lo) + 1), HISTOGRAM_BINS)
+                              for lo, hi in hybrid_bounds(matrix)]
+        self.axis_scores = [QuantileDigest() for _ in self.axis_codes]
+        self.co_matches = CountMin()
+
+    def add(self, codec: ShareCodec, matrix: WeightMatrix, payloads: Sequence[bytes]) -> None:
+        """Count one batch of stored tokens."""
+        columns, decoded = codec.decode_columns(payloads)
+        self.submissions += len(decoded)
+        self.skipped += len(payloads) - len(decoded)
+        asked = self.asked
+        for _, selected, _ in decoded:
+            for q in selected:
+                asked[q] += 1
+        for column, chosen in zip(columns, self.chosen):
+            for option in range(len(chosen)):
+                chosen[option] += column.count(option + 1)
+
+        eligible = [s for s in range(matrix.school_count) if matrix.eligible[s]]
+        codes = self.school_codes
+        for batch in score_batches(matrix, range(len(columns)), [bytes(c) for c in columns], BATCH_BLOCK):
+            hybrid = []
+            for s in eligible:
+                scores = batch_hybrid(matrix, batch, s)
+                self.school_scores[s].add_many(scores)
+                hybrid.append(scores)
+            for digest, scores in zip(self.axis_scores, batch.axis_scores):
+                digest.add_many(scores)
+            # nlargest is stable like sorted(), so ties keep SCHOOLS order, as in rank_schools.
+            positions = range(len(eligible))
+            for row in zip(*hybrid):
+                top = heapq.nlargest(CO_MATCHES, positions, key=row.__getitem__)
+                for a, b in itertools.combinations(top, 2):
+                    self.co_matches.add(pair_key(codes[eligible[a]], codes[eligible[b]]))
+
+    def merge(self, other: "QuizStats") -> "QuizStats":
+        """Add ``other``'s counts to these; both must be for the same question bank."""
+        if (other.bank, other.school_codes, other.axis_codes) != (self.bank, self.school_codes, self.axis_codes):
+            raise ValueError(f"statistics for question bank {other.bank} cannot be merged into {self.bank}")
+        self.submissions += other.submissions
+        self.skipped += other.skipped
+        self.asked = [a + b for a, b in zip(self.asked, other.asked)]
+        self.chosen = [[a + b for a, b in zip(mine, theirs)] for mine, theirs in zip(self.chosen, other.chosen)]
+        for mine, theirs in zip(self.school_scores + self.axis_scores, other.school_scores + other.axis_scores):
+            mine.merge(theirs)
+        self.co_matches.merge(other.co_matches)
+        return self
+
+    def top_pairs(self, limit: int) -> list[tuple[str, str, int]]:
+        """The ``limit`` school pairs most often among the top matches together, by estimated count."""
+        pairs = [(self.co_matches.estimate(pair_key(a, b)), a, b)
+                 for a, b in itertools.combinations(self.school_codes, 2)]
+        return [(a, b, n) for n, a, b in heapq.nlargest(limit, pairs, key=lambda pair: pair[0]) if n]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": STATS_VERSION, "bank": self.bank,
+            "schools": self.school_codes, "axes": self.axis_codes,
+            "submissions": self.submissions, "skipped": self.skipped,
+            "asked": self.asked, "chosen": self.chosen,
+            "school_scores": [h.to_dict() for h in self.school_scores],
+            "axis_scores": [d.to_dict() for d in self.axis_scores],
+            "co_matches": self.co_matches.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "QuizStats":
+        if data.get("version") != STATS_VERSION:
+            raise ValueError(f"unsupported statistics version {data.get('version')}")
+        stats = cls.__new__(cls)
+        stats.bank = data["bank"]
+        stats.school_codes = data["schools"]
+        stats.axis_codes = data["axes"]
+        stats.submissions = data["submissions"]
+        stats.skipped = data["skipped"]
+        stats.asked = data["asked"]
+        stats.chosen = data["chosen"]
+        stats.school_scores = [Histogram.from_dict(h) for h in data["school_scores"]]
+        stats.axis_scores = [QuantileDigest.from_dict(d) for d in data["axis_scores"]]
+        stats.co_matches = CountMin.from_dict(data["co_matches"])
+        return stats
+
+
+def aggregate_records(records: Iterable[Record], tables: dict[str, Any]) -> QuizStats:
+    """Statistics of ``records``, read and scored :data:`BATCH_BLOCK` at a time."""
+    codec = ShareCodec.from_tables(tables)
+    matrix = WeightMatrix.from_tables(tables)
+    stats = QuizStats(codec, matrix)
+    records = iter(records)
+    while batch := list(itertools.islice(records, BATCH_BLOCK)):
+        stats.add(codec, matrix, [record.payload for record in batch])
+    return stats
+
+
+def aggregate_segment(path: Path, source: Path) -> QuizStats:
+    """Statistics of one segment: the unit of work of a ``--jobs`` worker."""
+    tables, _ = load_tables_cached(source)
+    return aggregate_records((record for _, record in read_records(path)), tables)
+
+
+def format_report(stats: QuizStats, top: int) -> list[str]:
+    lines = [f"{stats.submissions:,} submission(s)"
+             + (f"; skipped {stats.skipped:,} from another question bank" if stats.skipped else "")]
+    lines.append(f"\n{'question':>8} {'asked':>9} {'answered':>8}  option shares")
+    for q, (asked, chosen) in enumerate(zip(stats.asked, stats.chosen)):
+        answered = sum(chosen)
+        shares = " ".join(f"{n / answered:4.0%}" for n in chosen) if answered else ""
+        lines.append(f"{q + 1:>8} {asked:>9,} {answered / asked if asked else 0:>8.0%}  {shares}")
+    lines.append(f"\n{'school':<10} {'mean':>6} {'p10':>6} {'p50':>6} {'p90':>6}   hybrid score")
+    schools = [(code, h) for code, h in zip(stats.school_codes, stats.school_scores) if h.count]
+    for code, h in sorted(schools, key=lambda item: -item[1].mean()):
+        lines.append(f"{code:<10} {h.mean():>6.1f} {h.quantile(.1):>6.1f} {h.quantile(.5):>6.1f} {h.quantile(.9):>6.1f}")
+    outside = sum(h.below + h.above for _, h in schools)
+    if outside:
+        lines.append(f"({outside:,} score(s) fell outside their school's histogram range; "
+                     "their percentiles are clipped to it)")
+    lines.append(f"\n{'axis':<10} {'mean':>6} {'p10':>6} {'p50':>6} {'p90':>6}   axis score")
+    for code, d in zip(stats.axis_codes, stats.axis_scores):
+        lines.append(f"{code:<10} {d.mean():>6.1f} {d.quantile(.1):>6.1f} {d.quantile(.5):>6.1f} {d.quantile(.9):>6.1f}")
+    sketch = stats.co_matches
+    lines.append(f"\ntop-{CO_MATCHES} co-matches (counts may be over by up to {sketch.error:,.0f})")
+    for a, b, n in stats.top_pairs(top):
+        share = n / stats.submissions if stats.submissions else 0
+        lines.append(f"{a:<10} {b:<10} {n:>9,} {share:>6.1%}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz stats", description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", default=SUBMISSIONS_DIR, type=Path,
+                        help="segment directory written by ingest (default: %(default)s)")
+    parser.add_argument("--merge", nargs="+", type=Path, metavar="FILE",
+                        help="merge statistics saved with --save instead of scanning segments")
+    parser.add_argument("--save", type=Path, metavar="FILE", help="write the statistics as JSON")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="segments scanned at once (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=10, help="co-match pairs to list (default: %(default)s)")
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.merge:
+            shards = [QuizStats.from_dict(json.loads(path.read_text(encoding="utf-8"))) for path in args.merge]
+        else:
+            paths = segment_paths(args.segments)
+            if not paths:
+                print(f"no segments in {args.segments}", file=sys.stderr)
+                return 1
+            tables, _ = load_tables_cached(args.source)
+            if args.jobs > 1:
+                with ProcessPoolExecutor(min(args.jobs, len(paths))) as pool:
+                    shards = list(pool.map(aggregate_segment, paths, itertools.repeat(args.source)))
+            else:
+                shards = [aggregate_records((record for path in paths for _, record in read_records(path)), tables)]
+        stats = reduce(QuizStats.merge, shards)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    if args.save:
+        args.save.write_text(json.dumps(stats.to_dict()), encoding="utf-8")
+    print("\n".join(format_report(stats, args.top)))
+    return 0
@@ -0,0 +1,254 @@
+"""Score stored submissions into SQLite, with dashboard aggregates kept up to date.
+
+Reads the segments written by :mod:`catholic_quiz.ingest`, scores each new
+submission and adds it to ``results.sqlite``. The database runs in WAL mode,
+so dashboards can read while submissions are added. Each batch goes in one
+transaction: its submission rows (``executemany``), the changes it makes
+to the aggregate tables, and how far into its segment ingestion has got.
+An interrupted run therefore leaves nothing half-counted, and the next run
+picks up where it stopped::
+
+    python -m catholic_quiz store                 # add new submissions, then report
+    python -m catholic_quiz store --report-only --weeks 4
+
+The aggregates are materialized tables, updated by adding each batch's
+counts and totals rather than by re-reading ``submissions``:
+
+``weekly_top_matches(week, school, submissions)``
+    how often each school was the top match, per week (the Monday, UTC);
+``axis_positions(length, axis, submissions, position_total, score_total)``
+    per quiz length and axis, the sums behind the average axis position
+    (the 0-100 marker of the results page) and raw axis score; the
+    ``axis_averages`` view divides them out.
+
+Submissions made with another question bank cannot be scored against this
+one and are skipped (and counted).
+"""
+
+from __future__ import annotations
+
+import datetime
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from .ingest import SUBMISSIONS_DIR, Record, read_records, segment_paths
+from .model import QUIZ_LENGTHS, SOURCE_PAGE, QuizModel, load_tables_cached
+from .scoring import BATCH_BLOCK, WeightMatrix, best_schools, score_batches
+from .share import ShareCodec
+
+DATABASE = SUBMISSIONS_DIR / "results.sqlite"
+# Axes without an AXIS_MULTIPLIER entry are drawn with this one (see renderAxes).
+DEFAULT_AXIS_MULTIPLIER = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    received INTEGER NOT NULL,      -- ms since the epoch
+    week TEXT NOT NULL,             -- Monday of that week (UTC), YYYY-MM-DD
+    length INTEGER NOT NULL,        -- quiz length offered, nearest to the questions asked
+    asked INTEGER NOT NULL,
+    answered INTEGER NOT NULL,
+    top_school TEXT NOT NULL,
+    top_score REAL NOT NULL,
+    token BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS weekly_top_matches (
+    week TEXT NOT NULL,
+    school TEXT NOT NULL,
+    submissions INTEGER NOT NULL,
+    PRIMARY KEY (week, school)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS axis_positions (
+    length INTEGER NOT NULL,
+    axis TEXT NOT NULL,
+    submissions INTEGER NOT NULL,
+    position_total REAL NOT NULL,
+    score_total INTEGER NOT NULL,
+    PRIMARY KEY (length, axis)
+) WITHOUT ROWID;
+CREATE VIEW IF NOT EXISTS axis_averages AS
+    SELECT length, axis, submissions,
+           position_total / submissions AS average_position,
+           CAST(score_total AS REAL) / submissions AS average_score
+    FROM axis_positions;
+CREATE TABLE IF NOT EXISTS ingest_progress (
+    segment TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+
+def week_of(timestamp: int) -> str:
+    """The Monday (UTC) of the week containing ``timestamp`` (ms), as YYYY-MM-DD."""
+    day = datetime.date(1970, 1, 1) + datetime.timedelta(milliseconds=timestamp)
+    return (day - datetime.timedelta(days=day.weekday())).isoformat()
+
+
+def nominal_length(asked: int) -> int:
+    """The quiz length offered that a form of ``asked`` questions came from."""
+    return min(QUIZ_LENGTHS, key=lambda length: (abs(length - asked), length))
+
+
+class ResultsStore:
+    """Scored submissions and their aggregates in one SQLite database."""
+
+    def __init__(self, path: str | Path, tables: dict[str, Any]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last transactions on power loss, never corruption.
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.codec = ShareCodec.from_tables(tables)
+        self.matrix = WeightMatrix.from_tables(tables)
+        model = QuizModel(tables)
+        self.axes = [(axis.code, axis.multiplier or DEFAULT_AXIS_MULTIPLIER) for axis in model.axes]
+
+    def close(self) -> None:
+        self.db.close()
+
+    def progress(self) -> dict[str, int]:
+        """How far into each segment submissions have been added, in bytes."""
+        return dict(self.db.execute("SELECT segment, offset FROM ingest_progress"))
+
+    def add(self, records: Iterable[Record], progress: tuple[str, int] | None = None) -> tuple[int, int]:
+        """Score and store ``records``, updating the aggregates, in one transaction.
+
+        ``progress`` (segment name, offset) is recorded in the same
+        transaction. Returns ``(stored, skipped)``.
+        """
+        m = self.matrix
+        records = list(records)
+        columns, decoded = self.codec.decode_columns([record.payload for record in records])
+        rows = []
+        for i, selected, answers in decoded:
+            record = records[i]
+            answered = sum(answer is not None for answer in answers)
+            rows.append([record.timestamp, week_of(record.timestamp), nominal_length(len(selected)),
+                         len(selected), answered, record.payload])
+
+        weekly: Counter[tuple[str, str]] = Counter()
+        axis_totals: dict[tuple[int, str], list] = {}
+        start = 0
+        for batch in score_batches(m, range(len(columns)), [bytes(c) for c in columns], BATCH_BLOCK):
+            top, best = best_schools(m, batch)
+            for r in range(batch.size):
+                row = rows[start + r]
+                school = m.school_codes[top[r]]
+                row[6:6] = [school, best[r]]
+                weekly[row[1], school] += 1
+                for a, (axis, multiplier) in enumerate(self.axes):
+                    score = batch.axis_scores[a][r]
+                    totals = axis_totals.setdefault((row[2], axis), [0, 0.0, 0])
+                    totals[0] += 1
+                    totals[1] += max(0, min(100, 50 + score * multiplier))
+                    totals[2] += score
+            start += batch.size
+
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO submissions (received, week, length, asked, answered, top_school, top_score, token)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [row[:5] + row[6:8] + [row[5]] for row in rows],
+            )
+            self.db.executemany(
+                "INSERT INTO weekly_top_matches VALUES (?, ?, ?) ON CONFLICT (week, school)"
+                " DO UPDATE SET submissions = submissions + excluded.submissions",
+                [(week, school, n) for (week, school), n in weekly.items()],
+            )
+            self.db.executemany(
+                "INSERT INTO axis_positions VALUES (?, ?, ?, ?, ?) ON CONFLICT (length, axis) DO UPDATE SET"
+                " submissions = submissions + excluded.submissions,"
+                " position_total = position_total + excluded.position_total,"
+                " score_total = score_total + excluded.score_total",
+                [(length, axis, *totals) for (length, axis), totals in axis_totals.items()],
+            )
+            if progress is not None:
+                self.db.execute("INSERT OR REPLACE INTO ingest_progress VALUES (?, ?)", progress)
+        return len(rows), len(records) - len(rows)
+
+    def ingest(self, directory: Path, batch_size: int = BATCH_BLOCK) -> tuple[int, int]:
+        """Add every record not yet stored from the segments in ``directory``; ``(stored, skipped)``."""
+        done = self.progress()
+        stored = skipped = 0
+        for path in segment_paths(directory):
+            for records, end in _chunks(read_records(path, done.get(path.name, 0)), batch_size):
+                added, passed = self.add(records, (path.name, end))
+                stored += added
+                skipped += passed
+        return stored, skipped
+
+    def top_matches_by_week(self, weeks: int | None = None, limit: int = 5) -> list[tuple[str, str, int, float]]:
+        """``(week, school, submissions, share)`` for each week's ``limit`` most frequent top matches,
+        the latest ``weeks`` weeks (all if None), newest first."""
+        # The oldest week shown; '' (every week) when there are fewer than ``weeks``.
+        recent = "" if weeks is None else """WHERE week >= COALESCE(
+            (SELECT DISTINCT week FROM weekly_top_matches ORDER BY week DESC LIMIT 1 OFFSET ?), '')"""
+        rows = self.db.execute(f"""
+            SELECT week, school, submissions, CAST(submissions AS REAL) / SUM(submissions) OVER (PARTITION BY week)
+            FROM weekly_top_matches {recent}
+            ORDER BY week DESC, submissions DESC, school""", () if weeks is None else (weeks - 1,)).fetchall()
+        shown: Counter[str] = Counter()
+        out = []
+        for week, school, n, share in rows:
+            shown[week] += 1
+            if shown[week] <= limit:
+                out.append((week, school, n, share))
+        return out
+
+    def axis_averages(self) -> list[tuple[int, str, int, float, float]]:
+        """``(length, axis, submissions, average position, average score)``, by length then axis order."""
+        order = {axis: a for a, (axis, _) in enumerate(self.axes)}
+        rows = self.db.execute("SELECT * FROM axis_averages").fetchall()
+        return sorted(rows, key=lambda row: (row[0], order.get(row[1], len(order)), row[1]))
+
+
+def _chunks(records: Iterator[tuple[int, Record]], size: int) -> Iterator[tuple[list[Record], int]]:
+    """``records`` in lists of up to ``size``, each with the offset just past its last record."""
+    chunk: list[Record] = []
+    end = 0
+    for offset, record in records:
+        chunk.append(record)
+        end = offset + record.size
+        if len(chunk) == size:
+            yield chunk, end
+            chunk = []
+    if chunk:
+        yield chunk, end
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz store", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DATABASE, type=Path, help="database (default: %(default)s)")
+    parser.add_argument("--segments", default=SUBMISSIONS_DIR, type=Path,
+                        help="segment directory written by ingest (default: %(default)s)")
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    parser.add_argument("--report-only", action="store_true", help="do not add new submissions first")
+    parser.add_argument("--weeks", type=int, default=8, help="weeks of top matches to show (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=5, help="top matches to show per week (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    tables, _ = load_tables_cached(args.source)
+    store = ResultsStore(args.db, tables)
+    try:
+        if not args.report_only:
+            started = time.perf_counter()
+            stored, skipped = store.ingest(args.segments)
+            elapsed = time.perf_counter() - started
+            print(f"added {stored:,} submission(s) in {elapsed:.1f}s"
+                  + (f"; skipped {skipped:,} from another question bank" if skipped else ""))
+        print(f"\n{'week':<10}  {'school':<10} {'count':>8} {'share':>6}")
+        for week, school, n, share in store.top_matches_by_week(args.weeks, args.top):
+            print(f"{week:<10}  {school:<10} {n:>8,} {share:>6.1%}")
+        print(f"\n{'length':>6}  {'axis':<10} {'count':>8} {'position':>8} {'score':>7}")
+        for length, axis, n, position, score in store.axis_averages():
+            print(f"{length:>6}  {axis:<10} {n:>8,} {position:>8.1f} {score:>+7.2f}")
+    finally:
+        store.close()
+    return 0
@@ -0,0 +1,185 @@
+"""Schema and cross-reference checks over the quiz data tables.
+
+Every table is parsed once (recording entry locations), the code sets are
+indexed into dicts/sets once, and each table is then walked a single time.
+All problems are collected rather than stopping at the first, so one run
+reports everything that needs fixing::
+
+    catholic_quiz_IMPROVED.py:1524: QUESTIONS[12].options[3]: unknown school code 'THOMS'
+
+A run takes about 60 ms when the page has to be parsed (``--no-cache``) and
+about 5 ms from the parse cache; the checks themselves take about 2 ms.
+"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, Mapping
+
+from .model import ALL_TABLES, CACHE_DIR, SOURCE_PAGE, CategoryIndex, SourceMap, load_tables, load_tables_cached
+
+# The typed scoring arrays store school/axis indices in Uint8Array and
+# weights in Int8Array.
+MAX_CODES = 255
+WEIGHT_RANGE = range(-128, 128)
+
+HETERODOXY_LEVELS = frozenset(
+    {"condemned", "schismatic", "problematic", "irregular", "non-catholic", "caution", "historical"}
+)
+REQUIRED_FIELDS = {
+    "SCHOOL_DESC": ("summary",),
+    "SCHOOL_FIGURES": ("figure", "era", "bio", "works"),
+    "HETERODOXY_STATUS": ("level", "title", "warning", "documents", "guidance"),
+    "QUESTION_TOPICS": ("topic", "description", "reading", "geminiPrompt"),
+}
+
+
+class Issue:
+    __slots__ = ("where", "path", "message")
+
+    def __init__(self, where: str, path: str, message: str):
+        self.where = where
+        self.path = path
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"{self.where}: {self.path}: {self.message}"
+
+
+def _path(table: str, path: tuple) -> str:
+    return table + "".join(f"[{p}]" if isinstance(p, int) else f".{p}" for p in path)
+
+
+class Validator:
+    def __init__(self, tables: Mapping[str, Any], source_map: SourceMap):
+        self.tables = tables
+        self.source_map = source_map
+        self.issues: list[Issue] = []
+
+    def error(self, table: str, path: tuple, message: str) -> None:
+        self.issues.append(Issue(self.source_map.where(table, *path), _path(table, path), message))
+
+    def run(self) -> list[Issue]:
+        t = self.tables
+        schools = self.code_index("SCHOOLS")
+        axes = self.code_index("AXES")
+        self.check_questions(schools, axes)
+        self.check_categories()
+        for name in ("MAX_POSSIBLE_SCORES", "SCHOOL_QUESTION_COUNTS", "SCHOOL_DESC", "SCHOOL_FIGURES"):
+            self.check_keyed_by(name, schools, owner="SCHOOLS")
+        self.check_keyed_by("HETERODOXY_STATUS", schools)
+        for name in ("AXIS_ENDPOINTS", "AXIS_MULTIPLIER"):
+            self.check_keyed_by(name, axes, owner="AXES")
+        for code, status in t["HETERODOXY_STATUS"].items():
+            if isinstance(status, dict) and status.get("level") not in HETERODOXY_LEVELS:
+                self.error("HETERODOXY_STATUS", (code, "level"), f"unknown level {status.get('level')!r}")
+        question_keys = {str(q) for q in range(len(t["QUESTIONS"]))}
+        self.check_keyed_by("QUESTION_TOPICS", question_keys | {"default"})
+        if "default" not in t["QUESTION_TOPICS"]:
+            self.error("QUESTION_TOPICS", (), "missing the 'default' topic used as fallback")
+        self.check_keyed_by("CITATIONS", question_keys)
+        return self.issues
+
+    def code_index(self, table: str) -> dict[str, int]:
+        """``{code: index}`` for a ``[[code, name], ...]`` table; reports duplicates."""
+        index: dict[str, int] = {}
+        for i, entry in enumerate(self.tables[table]):
+            if not (isinstance(entry, list) and len(entry) == 2 and all(isinstance(x, str) for x in entry)):
+                self.error(table, (i,), "expected [code, name]")
+                continue
+            if entry[0] in index:
+                self.error(table, (i,), f"duplicate code {entry[0]!r} (first at index {index[entry[0]]})")
+            else:
+                index[entry[0]] = i
+        if len(index) > MAX_CODES:
+            self.error(table, (), f"{len(index)} codes; the scoring arrays hold at most {MAX_CODES}")
+        return index
+
+    def check_questions(self, schools: Mapping[str, int], axes: Mapping[str, int]) -> None:
+        for q, question in enumerate(self.tables["QUESTIONS"]):
+            if not isinstance(question, dict):
+                self.error("QUESTIONS", (q,), "expected an object")
+                continue
+            if not isinstance(question.get("text"), str) or not question["text"].strip():
+                self.error("QUESTIONS", (q, "text"), "missing question text")
+            options = question.get("options")
+            if not isinstance(options, list) or len(options) < 2:
+                self.error("QUESTIONS", (q, "options"), "expected at least two options")
+                options = []
+            for o, option in enumerate(options):
+                where = (q, "options", o)
+                if not (isinstance(option, list) and len(option) == 2 and isinstance(option[0], str)
+                        and isinstance(option[1], dict)):
+                    self.error("QUESTIONS", where, "expected [text, {SCHOOL: weight, ...}]")
+                    continue
+                for code, w in option[1].items():
+                    if code not in schools:
+                        hint = " (an AXES code; axis weights belong in axis_weights)" if code in axes else ""
+                        self.error("QUESTIONS", where, f"unknown school code {code!r}{hint}")
+                    if not isinstance(w, int) or w not in WEIGHT_RANGE:
+                        self.error("QUESTIONS", where, f"weight {w!r} for {code!r} is not an integer in -128..127")
+            axis_weights = question.get("axis_weights", {})
+            if not isinstance(axis_weights, dict):
+                self.error("QUESTIONS", (q, "axis_weights"), "expected an object")
+                continue
+            for ax, w in axis_weights.items():
+                if ax not in axes:
+                    self.error("QUESTIONS", (q, "axis_weights"), f"unknown axis code {ax!r}")
+                if not isinstance(w, int) or w not in WEIGHT_RANGE:
+                    self.error("QUESTIONS", (q, "axis_weights"), f"weight {w!r} for {ax!r} is not an integer in -128..127")
+
+    def check_categories(self) -> None:
+        index = CategoryIndex.from_tables(self.tables)
+        for path, message in index.problems:
+            self.error("CATEGORIES", path, message)
+
+    def check_keyed_by(self, table: str, keys: Any, owner: str | None = None) -> None:
+        """Every key of ``table`` is in ``keys``.
+
+        With ``owner`` (the table ``keys`` indexes), every key must also have
+        an entry; misses are reported at the owner's row.
+        """
+        entries = self.tables[table]
+        required = REQUIRED_FIELDS.get(table, ())
+        for key, value in entries.items():
+            if key not in keys:
+                self.error(table, (key,), f"{key!r} does not refer to a known entry")
+            missing = [f for f in required if not isinstance(value, dict) or not value.get(f)]
+            if missing:
+                self.error(table, (key,), f"missing {', '.join(missing)}")
+        if owner:
+            for code, i in keys.items():
+                if code not in entries:
+                    self.error(owner, (i,), f"{code!r} has no {table} entry")
+
+
+def validate_source(source: str, filename: str | Path = SOURCE_PAGE.name) -> tuple[list[Issue], dict[str, Any]]:
+    """Parse and validate a page source; return the issues and the parsed tables."""
+    source_map = SourceMap(source, filename)
+    tables = load_tables(source, ALL_TABLES, source_map)
+    return Validator(tables, source_map).run(), tables
+
+
+def validate_path(path: str | Path = SOURCE_PAGE, *,
+                  cache_dir: str | Path | None = CACHE_DIR) -> tuple[list[Issue], dict[str, Any], SourceMap]:
+    """Like :func:`validate_source` for a file, reusing the parse cache."""
+    tables, source_map = load_tables_cached(path, ALL_TABLES, cache_dir=cache_dir)
+    return Validator(tables, source_map).run(), tables, source_map
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m catholic_quiz validate", description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SOURCE_PAGE, type=Path, help="page source (default: %(default)s)")
+    parser.add_argument("--no-cache", dest="cache_dir", action="store_const", const=None, default=CACHE_DIR,
+                        help="parse the page even if a cached parse is up to date")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    issues, _, _ = validate_path(args.source, cache_dir=args.cache_dir)
+    elapsed = (time.perf_counter() - started) * 1000
+    for issue in issues:
+        print(issue)
+    print(f"{len(issues)} issue(s) in {elapsed:.1f} ms")
+    return 1 if issues else 0
@@ -249,7 +249,8 @@
             letter-spacing: 0.05em;
         }
         .ai-settings select,
-        .ai-settings input[type="text"] {
+        .ai-settings input[type="text"],
+        .ai-settings input[type="number"] {
             width: 100%;
             padding: 0.5rem 0.65rem;
             background: rgba(255,255,255,0.07);
@@ -260,7 +261,8 @@
             font-size: 0.8rem;
         }
         .ai-settings select:focus,
-        .ai-settings input[type="text"]:focus {
+        .ai-settings input[type="text"]:focus,
+        .ai-settings input[type="number"]:focus {
             outline: none;
             border-color: var(--gold);
             background: rgba(255,255,255,0.12);
@@ -357,6 +359,17 @@
         .length-label { font-size: 0.8rem; color: var(--ink-light); text-align: center; }
         .length-label small { color: var(--gold); }
         .length-note { font-size: 0.85rem; color: var(--ink-light); font-style: italic; margin-top: 1rem; margin-bottom: 0; }
+
+        /* Search */
+        .search-section { margin: 1.5rem 0 0; padding: 1.25rem; background: white; border-radius: 12px; box-shadow: 0 2px 10px var(--shadow); border: 1px solid var(--gold-light); text-align: left; }
+        .search-section h3 { font-family: 'Cinzel', serif; font-size: 1.1rem; color: var(--crimson); margin-bottom: 0.75rem; text-align: center; }
+        .search-section input { width: 100%; padding: 0.6rem 0.8rem; border: 1px solid var(--gold-light); border-radius: 6px; font-family: inherit; font-size: 0.95rem; }
+        .search-section input:focus { outline: none; border-color: var(--gold); }
+        .search-results { max-height: 320px; overflow-y: auto; margin-top: 0.5rem; }
+        .search-result { padding: 0.5rem 0.25rem; border-bottom: 1px solid var(--parchment); font-size: 0.9rem; color: var(--ink); }
+        .search-result-ref { display: inline-block; min-width: 4.5rem; font-family: 'JetBrains Mono', monospace; font-size: 0.75rem; color: var(--crimson); }
+        .search-result-weights { font-family: 'JetBrains Mono', monospace; font-size: 0.75rem; color: var(--gold); }
+        .search-summary { font-size: 0.8rem; color: var(--ink-light); font-style: italic; margin-top: 0.5rem; }
         
         .start-btn { font-family: 'Cinzel', serif; font-size: 1.1rem; padding: 0.9rem 2.5rem; background: linear-gradient(135deg, var(--crimson), var(--crimson-dark)); color: white; border: none; border-radius: 8px; cursor: pointer; transition: all 0.3s ease; text-transform: uppercase; letter-spacing: 0.1em; margin-top: 1rem; }
         .start-btn:hover { transform: translateY(-3px); box-shadow: 0 8px 25px rgba(139, 21, 56, 0.4); }
@@ -593,6 +606,20 @@
         .rank-num.top-3 { color: var(--crimson); }
         .school-name { font-weight: 500; }
         .school-name .question-count { font-weight: 400; font-size: 0.75rem; color: var(--ink-light); margin-left: 0.5rem; }
+        .school-contributors { font-weight: 400; font-size: 0.72rem; color: var(--ink-light); margin-top: 2px; }
+        .school-contributors span { white-space: nowrap; cursor: help; }
+
+        /* Score attribution */
+        .attribution { border-bottom: 1px solid var(--parchment); padding: 0.65rem 0; }
+        .attribution summary { cursor: pointer; font-weight: 500; color: var(--ink); }
+        .attribution-score { font-family: 'JetBrains Mono', monospace; font-size: 0.8rem; color: var(--ink-light); margin-left: 0.5rem; }
+        .attribution-label { font-family: 'Cinzel', serif; font-size: 0.75rem; text-transform: uppercase; letter-spacing: 0.05em; color: var(--crimson); margin: 0.75rem 0 0.35rem; }
+        .attribution-list { list-style: none; padding: 0; margin: 0; }
+        .attribution-list li { font-size: 0.85rem; color: var(--ink); padding: 0.2rem 0; line-height: 1.4; }
+        .attribution-weight { display: inline-block; min-width: 3.2rem; font-family: 'JetBrains Mono', monospace; font-size: 0.8rem; color: var(--gold); }
+        .attribution-weight.negative { color: var(--crimson); }
+        .attribution-note { font-size: 0.85rem; color: var(--ink-light); line-height: 1.5; margin-bottom: 0.35rem; }
+        .attribution-q { font-family: 'Cinzel', serif; font-size: 0.75rem; color: var(--ink-light); margin-right: 0.35rem; }
         .score-bar-container { width: 100%; max-width: 180px; }
         .score-bar { height: 8px; background: var(--parchment); border-radius: 4px; overflow: hidden; }
         .score-bar-fill { height: 100%; background: linear-gradient(90deg, var(--crimson), var(--gold)); border-radius: 4px; }
@@ -607,7 +634,7 @@
         .axis-labels { position: absolute; top: 0; left: 0; right: 0; bottom: 0; display: flex; justify-content: space-between; align-items: center; padding: 0 0.65rem; font-size: 0.65rem; color: var(--ink-light); z-index: 1; }
         .axis-marker { position: absolute; top: 2px; bottom: 2px; width: 18px; background: var(--crimson); border-radius: 9px; transition: left 0.5s ease; box-shadow: 0 2px 6px rgba(139, 21, 56, 0.4); }
         
-        .retake-section { text-align: center; margin-top: 1.5rem; padding-top: 1.5rem; border-top: 1px solid var(--gold-light); }
+        .retake-section { display: flex; flex-wrap: wrap; justify-content: center; gap: 0.75rem; margin-top: 1.5rem; padding-top: 1.5rem; border-top: 1px solid var(--gold-light); }
         .hidden { display: none !important; }
         @keyframes fadeIn { from { opacity: 0; transform: translateY(10px); } to { opacity: 1; transform: translateY(0); } }
         
@@ -653,7 +680,7 @@
         <div class="quiz-panel" id="quiz-panel">
             <header>
                 <h1>Catholic Theology Schools Quiz</h1>
-                <p class="subtitle">150 Questions · 95 Schools of Thought · Hybrid Scoring</p>
+                <p class="subtitle">154 Questions · 95 Schools of Thought · Hybrid Scoring</p>
                 <div class="cross-divider"><span>✝</span></div>
             </header>
 
@@ -661,7 +688,7 @@
                 <h2>Find Your Theological Home</h2>
                 <p>This comprehensive quiz explores your positions on grace, predestination, ecclesiology, moral theology, liturgy, and more.</p>
                 <div class="stats">
-                    <div class="stat"><div class="stat-value">146</div><div class="stat-label">Questions</div></div>
+                    <div class="stat"><div class="stat-value">154</div><div class="stat-label">Questions</div></div>
                     <div class="stat"><div class="stat-value">95</div><div class="stat-label">Schools</div></div>
                     <div class="stat"><div class="stat-value">8</div><div class="stat-label">Axes</div></div>
                 </div>
@@ -669,53 +696,59 @@
                 <div class="quiz-length-section">
                     <h3>Choose Quiz Length</h3>
                     <div class="length-options">
-                        <label class="length-option" onclick="setQuizLength(24)">
-                            <input type="radio" name="length" value="24">
+                        <label class="length-option" onclick="setQuizLength(26)">
+                            <input type="radio" name="length" value="26">
                             <div class="length-card">
-                                <span class="length-number">24</span>
-                                <span class="length-label">Quick<br><small>~6 min</small></span>
+                                <span class="length-number">26</span>
+                                <span class="length-label">Quick<br><small>~7 min</small></span>
                             </div>
                         </label>
-                        <label class="length-option" onclick="setQuizLength(49)">
-                            <input type="radio" name="length" value="49">
+                        <label class="length-option" onclick="setQuizLength(51)">
+                            <input type="radio" name="length" value="51">
                             <div class="length-card">
-                                <span class="length-number">49</span>
-                                <span class="length-label">Short<br><small>~12 min</small></span>
+                                <span class="length-number">51</span>
+                                <span class="length-label">Short<br><small>~13 min</small></span>
                             </div>
                         </label>
-                        <label class="length-option" onclick="setQuizLength(73)">
-                            <input type="radio" name="length" value="73">
+                        <label class="length-option" onclick="setQuizLength(77)">
+                            <input type="radio" name="length" value="77">
                             <div class="length-card">
-                                <span class="length-number">73</span>
-                                <span class="length-label">Medium<br><small>~18 min</small></span>
+                                <span class="length-number">77</span>
+                                <span class="length-label">Medium<br><small>~19 min</small></span>
                             </div>
                         </label>
-                        <label class="length-option" onclick="setQuizLength(97)">
-                            <input type="radio" name="length" value="97">
+                        <label class="length-option" onclick="setQuizLength(103)">
+                            <input type="radio" name="length" value="103">
                             <div class="length-card">
-                                <span class="length-number">97</span>
-                                <span class="length-label">Long<br><small>~24 min</small></span>
+                                <span class="length-number">103</span>
+                                <span class="length-label">Long<br><small>~26 min</small></span>
                             </div>
                         </label>
-                        <label class="length-option" onclick="setQuizLength(122)">
-                            <input type="radio" name="length" value="122">
+                        <label class="length-option" onclick="setQuizLength(128)">
+                            <input type="radio" name="length" value="128">
                             <div class="length-card">
-                                <span class="length-number">122</span>
-                                <span class="length-label">Extended<br><small>~30 min</small></span>
+                                <span class="length-number">128</span>
+                                <span class="length-label">Extended<br><small>~32 min</small></span>
                             </div>
                         </label>
-                        <label class="length-option" onclick="setQuizLength(146)">
-                            <input type="radio" name="length" value="146" checked>
+                        <label class="length-option" onclick="setQuizLength(154)">
+                            <input type="radio" name="length" value="154" checked>
                             <div class="length-card">
-                                <span class="length-number">146</span>
-                                <span class="length-label">Complete<br><small>~38 min</small></span>
+                                <span class="length-number">154</span>
+                                <span class="length-label">Complete<br><small>~39 min</small></span>
                             </div>
                         </label>
                     </div>
-                    <p class="length-note">Questions are organized into 10 theological categories. Quiz lengths scale in equal intervals of ~24 questions.</p>
+                    <p class="length-note">Questions are organized into 10 theological categories. Quiz lengths scale in equal intervals of ~26 questions.</p>
                 </div>
                 
                 <button class="start-btn" onclick="startQuiz()">Begin the Quiz</button>
+
+                <div class="search-section">
+                    <h3>Search Questions &amp; Schools</h3>
+                    <input type="search" id="search-input" placeholder="e.g. Molina, infallibility, SSPX" autocomplete="off" aria-label="Search questions and schools" oninput="renderSearchResults()">
+                    <div id="search-results" class="search-results" aria-live="polite"></div>
+                </div>
             </div>
 
             <div id="quiz-screen" class="hidden">
@@ -723,8 +756,8 @@
                 
                 <div class="progress-section">
                     <div class="progress-header">
-                        <span class="progress-text" id="progress-text">Question 1 of 146</span>
-                        <span class="progress-count" id="answered-count">Answered: 0 / 146</span>
+                        <span class="progress-text" id="progress-text">Question 1 of 154</span>
+                        <span class="progress-count" id="answered-count">Answered: 0 / 154</span>
                     </div>
                     <div class="progress-bar"><div class="progress-fill" id="progress-fill" style="width: 0%"></div></div>
                 </div>
@@ -735,7 +768,10 @@
                         <span class="question-category-tag" id="question-category-tag">Grace & Predestination</span>
                     </div>
                     <p class="question-text" id="question-text"></p>
-                    <div class="options" id="options"></div>
+                    <div class="options" id="options">
+                        <!-- @generated:begin option-shell -->
+                        <!-- @generated:end option-shell -->
+                    </div>
                     
                     <div class="citation-section" id="citation-section">
                         <button class="citation-toggle" id="citation-toggle" onclick="toggleCitation()">
@@ -771,6 +807,7 @@
                 <div class="tabs">
                     <button class="tab-btn active" onclick="showTab('rankings', this)">All Rankings</button>
                     <button class="tab-btn" onclick="showTab('axes', this)">Theological Axes</button>
+                    <button class="tab-btn" onclick="showTab('explain', this)">Explain My Score</button>
                 </div>
                 
                 <div id="rankings-tab" class="tab-content active">
@@ -789,8 +826,20 @@
                         <div id="axes-content"></div>
                     </div>
                 </div>
+
+                <div id="explain-tab" class="tab-content">
+                    <div class="axes-card">
+                        <h3>What Shaped Your Top Matches</h3>
+                        <div id="explain-content"></div>
+                    </div>
+                    <div class="axes-card">
+                        <h3>How Close Was It?</h3>
+                        <div id="sensitivity-content"></div>
+                    </div>
+                </div>
                 
                 <div class="retake-section">
+                    <button class="nav-btn primary" onclick="shareResults(this)">Copy Share Link</button>
                     <button class="nav-btn secondary" onclick="retakeQuiz()">Take Quiz Again</button>
                 </div>
             </div>
@@ -826,12 +875,20 @@
                     </div>
                     <div id="ai-model-list" class="ai-model-list"></div>
                 </div>
+                <div class="ai-settings-group">
+                    <label class="ai-settings-label">Context window (tokens)</label>
+                    <input type="number" id="ai-context" value="4096" min="2048" step="1024" onchange="saveAISettings()" />
+                </div>
                 <div class="ai-settings-group">
                     <button class="ai-test-btn" onclick="testConnection()">Test Connection</button>
                     <span id="ai-test-status" class="ai-test-status"></span>
                 </div>
                 <div class="ai-settings-hint">
-                    Install <a href="https://ollama.com" target="_blank" rel="noopener">Ollama</a>, then run: <code>ollama run llama3.2</code>
+                    <strong>Setup:</strong> Install <a href="https://ollama.com" target="_blank" rel="noopener">Ollama</a>, then run:<br>
+                    <code>OLLAMA_ORIGINS="*" ollama serve</code><br>
+                    <code>ollama run llama3.2</code><br><br>
+                    <strong>Tip:</strong> Serve this file locally to avoid CORS issues:<br>
+                    <code>python3 -m http.server 8888</code>
                 </div>
             </div>
             <div class="ai-messages" id="ai-messages">
@@ -853,6 +910,8 @@
         🤖
     </button>
 
+    <!-- @generated:begin lazy-tables -->
+    <!-- @generated:end lazy-tables -->
     <script>
 
 // Schools from original quiz
@@ -1121,7 +1180,20 @@ const SCHOOL_DESC = {
     "ORIENTAL": {"summary": "Oriental Orthodox: Non-Chalcedonian churches (Coptic, Ethiopian, Armenian, Syriac), miaphysite Christology, ancient apostolic traditions.", "affirmations": ["Miaphysite Christology", "Reject Chalcedon's 'two natures' language", "Three Ecumenical Councils only", "Ancient liturgical traditions"]},
 };
 
-// Public figures and descriptions for each school
+// Tables only needed once results or sources are shown. The build moves them
+// out of this script into JSON blocks (<script type="application/json"
+// id="table-NAME">) that the browser does not parse at startup; read them
+// through lazyTable('NAME'), not by name.
+const lazyTables = {};
+
+function lazyTable(name) {
+    if (!(name in lazyTables)) {
+        lazyTables[name] = JSON.parse(document.getElementById('table-' + name).textContent);
+    }
+    return lazyTables[name];
+}
+
+// Public figures and descriptions for each school (lazy)
 const SCHOOL_FIGURES = {
     "AUG": { figure: "St. Augustine of Hippo", era: "354–430", bio: "Bishop, Doctor of Grace, and philosophical theologian. Born in North Africa to St. Monica, his dramatic conversion (Confessions VIII) from Manichaeism transformed Western Christianity. His anti-Pelagian works (De Gratia et Libero Arbitrio, De Praedestinatione Sanctorum) defined Catholic teaching on grace, original sin, and predestination. Influence spans Catholic, Orthodox, and Protestant traditions.", works: "Confessions, City of God, On Grace and Free Will" },
     "AUGP": { figure: "Prosper of Aquitaine", era: "c. 390–455", bio: "Lay theologian and defender of Augustine's strict predestinarian views against Semi-Pelagians.", works: "The Call of All Nations, Grace and Free Will" },
@@ -1230,17 +1302,10 @@ const SCHOOL_FIGURES = {
     "ORIENTAL": { figure: "St. Cyril of Alexandria", era: "c. 376–444", bio: "His Christological formula is normative for Oriental Orthodoxy.", works: "Twelve Anathemas" }
 };
 
-// Legacy compatibility - PATRON_SAINTS now references SCHOOL_FIGURES
-const PATRON_SAINTS = Object.fromEntries(
-    Object.entries(SCHOOL_FIGURES).map(([code, data]) => [
-        code, 
-        { primary: [data.figure, data.era], why: data.bio }
-    ])
-);
-
 // =============================================
 // HETERODOXY WARNINGS
 // =============================================
+// Warnings for schools outside or at odds with the Church (lazy)
 const HETERODOXY_STATUS = {
     "JANS": {
         level: "condemned",
@@ -2688,7 +2753,7 @@ const QUESTIONS = [
     {
         "text": "Carmelite spirituality (Teresa of Ávila, John of the Cross) emphasizes:",
         "options": [
-            ["Interior prayer and mystical union - the soul's journey through mansions to divine marriage. (Carmelite)", {"CARM": 6, "EUCHMYST": 3, "CHART": 2, "PIETY": 3}],
+            ["Interior prayer and mystical union - the soul's journey through mansions to divine marriage. (Carmelite)", {"CARM": 6, "EUCHMYST": 3, "CHART": 2}],
             ["Valuable for contemplatives but most Catholics need active, engaged spirituality. (Jesuit, Dominican)", {"JES": 3, "DOM": 2, "SDB": 2, "OPUS": 2}],
             ["The 'dark night' teaches detachment from consolations - demanding but transformative. (Carmelite)", {"CARM": 5, "OCSO": 3, "CHART": 3, "CP": 2}],
             ["Mysticism is dangerous without strong doctrinal grounding and ecclesial oversight. (Neo-Scholastic, Traditionalist)", {"NEOSCH": 3, "TRAD": 2, "DOM": 2, "CARM": -2}],
@@ -3935,7 +4000,7 @@ const QUESTION_TOPICS = {
 function getQuestionTopic(qIndex) {
     return QUESTION_TOPICS[qIndex] || QUESTION_TOPICS.default;
 }
-// Citations database
+// Citations database (lazy)
 const CITATIONS = {
   "0": [
     {
@@ -4476,8 +4541,86 @@ const DEFAULT_CITATIONS = [
 ];
 
 function getCitationsForQuestion(index) {
-    return CITATIONS[index] || DEFAULT_CITATIONS;
+    return lazyTable('CITATIONS')[index] || DEFAULT_CITATIONS;
+}
+
+// =============================================
+// SCORING ENGINE TABLES
+// =============================================
+
+// Schools and axes are addressed by their index in SCHOOLS / AXES; codes are
+// only looked up again when results are rendered.
+const SCHOOL_CODES = SCHOOLS.map(([code]) => code);
+const SCHOOL_COUNT = SCHOOL_CODES.length;
+const SCHOOL_INDEX = Object.fromEntries(SCHOOL_CODES.map((code, i) => [code, i]));
+const AXIS_CODES = AXES.map(([code]) => code);
+const AXIS_INDEX = Object.fromEntries(AXIS_CODES.map((code, i) => [code, i]));
+
+// @generated:begin
+// Filled in by catholic_quiz_build.py (SCHOOL_INV_MAX_POSSIBLE,
+// SCHOOL_INV_QUESTION_COUNT, SCHOOL_ELIGIBLE, OPTION_SLOTS, ROMAN_NUMERALS,
+// QUESTION_CATEGORY); see index.html.
+// @generated:end
+
+// Option weights flattened into parallel typed arrays. Row
+// OPTION_ROW_BASE[q] + option holds the weights of that option in
+// WEIGHT_SCHOOL/WEIGHT_VALUE[WEIGHT_ROW_START[row] .. WEIGHT_ROW_START[row + 1]).
+// Codes missing from SCHOOLS are dropped, as the old hasOwnProperty check did.
+//
+// The reverse index lists, per school, the rows that weight it: entries
+// SCHOOL_ENTRY_ROW/SCHOOL_ENTRY_VALUE[SCHOOL_ENTRY_START[s] .. SCHOOL_ENTRY_START[s + 1]),
+// in row order. ROW_QUESTION maps a row back to its question.
+const OPTION_ROW_BASE = new Uint16Array(QUESTIONS.length);
+const AXIS_ROW_START = new Uint16Array(QUESTIONS.length + 1);
+let WEIGHT_ROW_START, WEIGHT_SCHOOL, WEIGHT_VALUE, AXIS_WEIGHT_AXIS, AXIS_WEIGHT_VALUE;
+let ROW_QUESTION, SCHOOL_ENTRY_START, SCHOOL_ENTRY_ROW, SCHOOL_ENTRY_VALUE;
+
+function compileWeights() {
+    const rowStart = [0], schoolIdx = [], values = [], axisIdx = [], axisValues = [], rowQuestion = [];
+    QUESTIONS.forEach((q, qIndex) => {
+        OPTION_ROW_BASE[qIndex] = rowStart.length - 1;
+        q.options.forEach(opt => {
+            rowQuestion.push(qIndex);
+            for (const code in opt[1]) {
+                const s = SCHOOL_INDEX[code];
+                if (s === undefined) continue;
+                schoolIdx.push(s);
+                values.push(opt[1][code]);
+            }
+            rowStart.push(schoolIdx.length);
+        });
+        for (const ax in q.axis_weights || {}) {
+            const a = AXIS_INDEX[ax];
+            if (a === undefined) continue;
+            axisIdx.push(a);
+            axisValues.push(q.axis_weights[ax]);
+        }
+        AXIS_ROW_START[qIndex + 1] = axisIdx.length;
+    });
+    WEIGHT_ROW_START = Uint16Array.from(rowStart);
+    WEIGHT_SCHOOL = Uint8Array.from(schoolIdx);
+    WEIGHT_VALUE = Int8Array.from(values);
+    AXIS_WEIGHT_AXIS = Uint8Array.from(axisIdx);
+    AXIS_WEIGHT_VALUE = Int8Array.from(axisValues);
+    ROW_QUESTION = Uint16Array.from(rowQuestion);
+
+    // Transpose with a counting sort: count entries per school, prefix-sum,
+    // then place the rows in order.
+    SCHOOL_ENTRY_START = new Uint16Array(SCHOOL_COUNT + 1);
+    for (let k = 0; k < WEIGHT_SCHOOL.length; k++) SCHOOL_ENTRY_START[WEIGHT_SCHOOL[k] + 1]++;
+    for (let s = 0; s < SCHOOL_COUNT; s++) SCHOOL_ENTRY_START[s + 1] += SCHOOL_ENTRY_START[s];
+    const fill = SCHOOL_ENTRY_START.slice();
+    SCHOOL_ENTRY_ROW = new Uint16Array(WEIGHT_SCHOOL.length);
+    SCHOOL_ENTRY_VALUE = new Int8Array(WEIGHT_SCHOOL.length);
+    for (let row = 0; row + 1 < WEIGHT_ROW_START.length; row++) {
+        for (let k = WEIGHT_ROW_START[row]; k < WEIGHT_ROW_START[row + 1]; k++) {
+            const slot = fill[WEIGHT_SCHOOL[k]]++;
+            SCHOOL_ENTRY_ROW[slot] = row;
+            SCHOOL_ENTRY_VALUE[slot] = WEIGHT_VALUE[k];
+        }
+    }
 }
+compileWeights();
 
 // =============================================
 // QUIZ STATE
@@ -4485,14 +4628,20 @@ function getCitationsForQuestion(index) {
 
 let currentQuestion = 0;
 let answers = [];
-let scores = {};
-let axisScores = {};
+let scores = new Float64Array(SCHOOL_COUNT);
+let axisScores = new Float64Array(AXIS_CODES.length);
 let selectedQuestions = [];
-let quizLength = 146;
+let quizLength = 154;
 let currentCategoryIndex = 0;
 let categoryQuestions = {}; // Maps category id to selected question indices
 let aiMessages = [];
 
+// Indexes over the current selection, rebuilt by indexSelection()
+let questionPosition = new Int16Array(QUESTIONS.length).fill(-1); // question index -> position, -1 if not selected
+let positionCategory = new Uint8Array(0); // position -> CATEGORIES index
+let categoryAnswered = new Uint16Array(CATEGORIES.length);
+let answeredCount = 0;
+
 // =============================================
 // QUIZ LENGTH AND SELECTION
 // =============================================
@@ -4545,10 +4694,9 @@ function selectQuestionsForQuiz(count) {
 // =============================================
 
 function initScores() {
-    scores = {};
-    SCHOOLS.forEach(([code]) => scores[code] = 0);
-    axisScores = {};
-    AXES.forEach(([code]) => axisScores[code] = 0);
+    scores.fill(0);
+    matchCounts.fill(0);
+    axisScores.fill(0);
 }
 
 
@@ -4567,12 +4715,20 @@ function initScores() {
     }
 
 function startQuiz() {
-    document.getElementById('start-screen').classList.add('hidden');
-    document.getElementById('quiz-screen').classList.remove('hidden');
     initScores();
     selectedQuestions = selectQuestionsForQuiz(quizLength);
     answers = new Array(selectedQuestions.length).fill(null);
+    indexSelection();
     currentQuestion = 0;
+    saveProgressForm();
+    openQuiz();
+}
+
+// Show the quiz screen for the current selection. The navigation is built
+// with the answers already given marked, so a resumed session renders once.
+function openQuiz() {
+    document.getElementById('start-screen').classList.add('hidden');
+    document.getElementById('quiz-screen').classList.remove('hidden');
     currentCategoryIndex = 0;
     buildCategoryNav();
     buildQuestionNav();
@@ -4583,53 +4739,60 @@ function startQuiz() {
 // CATEGORY NAVIGATION
 // =============================================
 
+function indexSelection() {
+    questionPosition.fill(-1);
+    positionCategory = new Uint8Array(selectedQuestions.length);
+    selectedQuestions.forEach((qIdx, pos) => {
+        questionPosition[qIdx] = pos;
+        positionCategory[pos] = QUESTION_CATEGORY[qIdx];
+    });
+    categoryAnswered.fill(0);
+    answeredCount = 0;
+}
+
+// CATEGORIES index -> { btn, progress }; undefined when nothing was selected from it
+let categoryButtons = [];
+let activeCategory = -1;
+
 function buildCategoryNav() {
     const nav = document.getElementById('category-nav');
     nav.innerHTML = '';
+    categoryButtons = [];
+    activeCategory = -1;
     
     CATEGORIES.forEach((cat, idx) => {
         const catQs = categoryQuestions[cat.id] || [];
         if (catQs.length === 0) return;
         
         const btn = document.createElement('button');
-        btn.className = 'cat-btn' + (idx === 0 ? ' active' : '');
+        btn.className = categoryAnswered[idx] === catQs.length ? 'cat-btn completed' : 'cat-btn';
         btn.onclick = () => jumpToCategory(idx);
         btn.innerHTML = `
             <span class="cat-icon">${cat.icon}</span>
             ${cat.shortName}
-            <span class="cat-progress">0/${catQs.length}</span>
+            <span class="cat-progress">${categoryAnswered[idx]}/${catQs.length}</span>
         `;
         btn.dataset.catIdx = idx;
         nav.appendChild(btn);
+        categoryButtons[idx] = { btn, progress: btn.querySelector('.cat-progress') };
     });
 }
 
-function updateCategoryNav() {
-    const buttons = document.querySelectorAll('.cat-btn');
-    buttons.forEach(btn => {
-        const idx = parseInt(btn.dataset.catIdx);
-        const cat = CATEGORIES[idx];
-        const catQs = categoryQuestions[cat.id] || [];
-        
-        // Count answered in this category
-        let answered = 0;
-        catQs.forEach(qIdx => {
-            const selIdx = selectedQuestions.indexOf(qIdx);
-            if (selIdx !== -1 && answers[selIdx] !== null) answered++;
-        });
-        
-        // Update progress
-        const progressSpan = btn.querySelector('.cat-progress');
-        if (progressSpan) progressSpan.textContent = `${answered}/${catQs.length}`;
-        
-        // Mark as completed
-        btn.classList.toggle('completed', answered === catQs.length && catQs.length > 0);
-        
-        // Mark current category
-        const currentQIdx = selectedQuestions[currentQuestion];
-        const isCurrentCat = catQs.includes(currentQIdx);
-        btn.classList.toggle('active', isCurrentCat);
-    });
+// Refresh the progress counter of one category after an answer
+function updateCategoryProgress(catIdx) {
+    const entry = categoryButtons[catIdx];
+    if (!entry) return;
+    const total = categoryQuestions[CATEGORIES[catIdx].id].length;
+    const answered = categoryAnswered[catIdx];
+    entry.progress.textContent = `${answered}/${total}`;
+    entry.btn.classList.toggle('completed', answered === total);
+}
+
+function setActiveCategory(catIdx) {
+    if (catIdx === activeCategory) return;
+    if (categoryButtons[activeCategory]) categoryButtons[activeCategory].btn.classList.remove('active');
+    if (categoryButtons[catIdx]) categoryButtons[catIdx].btn.classList.add('active');
+    activeCategory = catIdx;
 }
 
 function jumpToCategory(catIdx) {
@@ -4638,8 +4801,7 @@ function jumpToCategory(catIdx) {
     if (catQs.length === 0) return;
     
     // Find first question of this category in selected questions
-    const firstQIdx = catQs[0];
-    const selIdx = selectedQuestions.indexOf(firstQIdx);
+    const selIdx = questionPosition[catQs[0]];
     if (selIdx !== -1) {
         currentQuestion = selIdx;
         renderQuestion();
@@ -4648,74 +4810,112 @@ function jumpToCategory(catIdx) {
 }
 
 function getCategoryForQuestion(qIdx) {
-    for (const cat of CATEGORIES) {
-        if (cat.questions.includes(qIdx)) return cat;
-    }
-    return CATEGORIES[0];
+    return CATEGORIES[QUESTION_CATEGORY[qIdx]];
 }
 
 // =============================================
 // QUESTION NAVIGATION
 // =============================================
 
+let questionDots = [];
+let currentDot = -1;
+
 function buildQuestionNav() {
     const nav = document.getElementById('question-nav');
     nav.innerHTML = '';
+    questionDots = [];
+    currentDot = -1;
     for (let i = 0; i < selectedQuestions.length; i++) {
         const dot = document.createElement('div');
-        dot.className = 'q-dot';
+        dot.className = answers[i] === null ? 'q-dot' : 'q-dot answered';
         dot.textContent = i + 1;
         dot.onclick = () => jumpToQuestion(i);
         nav.appendChild(dot);
+        questionDots.push(dot);
     }
-    updateQuestionNav();
 }
 
+// Move the "current" marker; only the previous and new dot are touched
 function updateQuestionNav() {
-    const dots = document.querySelectorAll('.q-dot');
-    dots.forEach((dot, i) => {
-        dot.classList.remove('answered', 'current');
-        if (answers[i] !== null) dot.classList.add('answered');
-        if (i === currentQuestion) dot.classList.add('current');
-    });
-    updateCategoryNav();
+    if (currentDot !== currentQuestion) {
+        if (questionDots[currentDot]) questionDots[currentDot].classList.remove('current');
+        questionDots[currentQuestion].classList.add('current');
+        currentDot = currentQuestion;
+    }
+    setActiveCategory(positionCategory[currentQuestion]);
+}
+
+function updateProgress() {
+    const total = selectedQuestions.length;
+    document.getElementById('progress-text').textContent = `Question ${currentQuestion + 1} of ${total}`;
+    document.getElementById('answered-count').textContent = `Answered: ${answeredCount} / ${total}`;
+    document.getElementById('progress-fill').style.width = `${(answeredCount / total) * 100}%`;
 }
 
 // =============================================
 // QUESTION RENDERING
 // =============================================
 
+// The option labels in #options are a static shell emitted by the build
+// (OPTION_SLOTS of them, all hidden). Navigation patches their text and
+// classes in place instead of rebuilding the list, touching only the nodes
+// that change.
+let optionSlots = null;
+let shownOptionCount = 0;  // the shell starts with every slot hidden
+let shownOptionsFor = -1;  // question index whose texts are in the shell
+let shownSelection = -1;   // slot currently marked selected
+
+function getOptionSlots() {
+    if (!optionSlots) {
+        optionSlots = Array.from(document.querySelectorAll('#options .option'), label => ({
+            label,
+            text: label.querySelector('.option-text'),
+            value: null
+        }));
+    }
+    return optionSlots;
+}
+
+function renderOptions(qIndex, selected) {
+    const slots = getOptionSlots();
+    if (shownOptionsFor !== qIndex) {
+        const opts = QUESTIONS[qIndex].options;
+        for (let i = 0; i < opts.length; i++) {
+            if (slots[i].value !== opts[i][0]) {
+                slots[i].text.textContent = opts[i][0];
+                slots[i].value = opts[i][0];
+            }
+        }
+        for (let i = opts.length; i < shownOptionCount; i++) slots[i].label.classList.add('hidden');
+        for (let i = shownOptionCount; i < opts.length; i++) slots[i].label.classList.remove('hidden');
+        shownOptionCount = opts.length;
+        shownOptionsFor = qIndex;
+    }
+    markSelectedOption(selected === null ? -1 : selected);
+}
+
+function markSelectedOption(index) {
+    if (index === shownSelection) return;
+    const slots = getOptionSlots();
+    if (shownSelection !== -1) slots[shownSelection].label.classList.remove('selected');
+    if (index !== -1) slots[index].label.classList.add('selected');
+    shownSelection = index;
+}
+
+let citationsShownFor = -1;
+
 function renderQuestion() {
     const qIndex = selectedQuestions[currentQuestion];
     const q = QUESTIONS[qIndex];
-    const cat = getCategoryForQuestion(qIndex);
+    const cat = CATEGORIES[positionCategory[currentQuestion]];
     
-    // Update progress
-    document.getElementById('progress-text').textContent = `Question ${currentQuestion + 1} of ${selectedQuestions.length}`;
-    const answeredCount = answers.filter(a => a !== null).length;
-    document.getElementById('answered-count').textContent = `Answered: ${answeredCount} / ${selectedQuestions.length}`;
-    document.getElementById('progress-fill').style.width = `${(answeredCount / selectedQuestions.length) * 100}%`;
-    
-    // Roman numerals
-    const romanNumerals = ['I','II','III','IV','V','VI','VII','VIII','IX','X','XI','XII','XIII','XIV','XV','XVI','XVII','XVIII','XIX','XX','XXI','XXII','XXIII','XXIV','XXV','XXVI','XXVII','XXVIII','XXIX','XXX','XXXI','XXXII','XXXIII','XXXIV','XXXV','XXXVI','XXXVII','XXXVIII','XXXIX','XL','XLI','XLII','XLIII','XLIV','XLV','XLVI','XLVII','XLVIII','XLIX','L','LI','LII','LIII','LIV','LV','LVI','LVII','LVIII','LIX','LX','LXI','LXII','LXIII','LXIV','LXV','LXVI','LXVII','LXVIII','LXIX','LXX','LXXI','LXXII','LXXIII','LXXIV','LXXV','LXXVI','LXXVII','LXXVIII','LXXIX','LXXX','LXXXI','LXXXII','LXXXIII','LXXXIV','LXXXV','LXXXVI','LXXXVII','LXXXVIII','LXXXIX','XC','XCI','XCII','XCIII','XCIV','XCV','XCVI','XCVII','XCVIII','XCIX','C','CI','CII','CIII','CIV','CV','CVI','CVII','CVIII','CIX','CX','CXI','CXII','CXIII','CXIV','CXV','CXVI','CXVII','CXVIII','CXIX','CXX','CXXI','CXXII','CXXIII','CXXIV','CXXV','CXXVI','CXXVII'];
-    
-    document.getElementById('question-number').textContent = `Question ${romanNumerals[currentQuestion] || currentQuestion + 1}`;
+    updateProgress();
+    document.getElementById('question-number').textContent = `Question ${ROMAN_NUMERALS[currentQuestion]}`;
     document.getElementById('question-category-tag').textContent = `${cat.icon} ${cat.shortName}`;
     document.getElementById('question-text').textContent = q.text;
     
-    // Options
-    const optionsDiv = document.getElementById('options');
-    optionsDiv.innerHTML = '';
-    q.options.forEach((opt, i) => {
-        const option = document.createElement('label');
-        option.className = 'option' + (answers[currentQuestion] === i ? ' selected' : '');
-        option.innerHTML = `<input type="radio" name="answer" value="${i}"><div class="option-radio"></div><span class="option-text">${opt[0]}</span>`;
-        option.onclick = () => selectOption(i);
-        optionsDiv.appendChild(option);
-    });
-    
-    // Citations
-    renderCitations(qIndex);
+    renderOptions(qIndex, answers[currentQuestion]);
+    scheduleProgressSave();
     
     // Navigation buttons
     document.getElementById('prev-btn').disabled = currentQuestion === 0;
@@ -4731,7 +4931,7 @@ function renderQuestion() {
     
     updateQuestionNav();
     
-    // Close citation panel on new question
+    // Close citation panel on new question; it is re-rendered when opened
     document.getElementById('citation-toggle').classList.remove('open');
     document.getElementById('citation-content').classList.remove('open');
 }
@@ -4791,6 +4991,11 @@ function copyGeminiPrompt(element) {
 }
 
 function toggleCitation() {
+    const qIndex = selectedQuestions[currentQuestion];
+    if (citationsShownFor !== qIndex) {
+        renderCitations(qIndex);
+        citationsShownFor = qIndex;
+    }
     const toggle = document.getElementById('citation-toggle');
     const content = document.getElementById('citation-content');
     toggle.classList.toggle('open');
@@ -4802,12 +5007,17 @@ function toggleCitation() {
 // =============================================
 
 function selectOption(index) {
+    if (answers[currentQuestion] === null) {
+        const catIdx = positionCategory[currentQuestion];
+        answeredCount++;
+        categoryAnswered[catIdx]++;
+        questionDots[currentQuestion].classList.add('answered');
+        updateCategoryProgress(catIdx);
+        updateProgress();
+    }
     answers[currentQuestion] = index;
-    document.querySelectorAll('.option').forEach((opt, i) => opt.classList.toggle('selected', i === index));
-    updateQuestionNav();
-    const answeredCount = answers.filter(a => a !== null).length;
-    document.getElementById('answered-count').textContent = `Answered: ${answeredCount} / ${selectedQuestions.length}`;
-    document.getElementById('progress-fill').style.width = `${(answeredCount / selectedQuestions.length) * 100}%`;
+    markSelectedOption(index);
+    scheduleProgressSave(currentQuestion);
 }
 
 function nextQuestion() {
@@ -4836,85 +5046,354 @@ function jumpToQuestion(index) {
     window.scrollTo(0, 0);
 }
 
+// =============================================
+// SAVED PROGRESS
+// =============================================
+
+// The session is checkpointed to localStorage so that a reload resumes it.
+// The form (bank hash, length, selected questions) is written once per quiz.
+// Answers are kept one hex digit per position (option + 1, 0 = unanswered)
+// in blocks of PROGRESS_BLOCK positions; only the blocks whose answers
+// changed are rewritten, PROGRESS_DEBOUNCE_MS after the last change.
+const PROGRESS_KEY = 'catholicQuizProgress';
+const PROGRESS_BLOCK = 32;
+const PROGRESS_DEBOUNCE_MS = 400;
+const dirtyProgressBlocks = new Set();
+let progressTimer = null;
+let progressSaved = false;
+
+function storeProgress(key, value) {
+    try {
+        localStorage.setItem(key, value);
+    } catch { /* storage disabled or full: the session is just not saved */ }
+}
+
+function clearProgress() {
+    clearTimeout(progressTimer);
+    progressTimer = null;
+    dirtyProgressBlocks.clear();
+    progressSaved = false;
+    try {
+        localStorage.removeItem(PROGRESS_KEY);
+        localStorage.removeItem(`${PROGRESS_KEY}.position`);
+        for (let b = 0; b * PROGRESS_BLOCK < QUESTIONS.length; b++) localStorage.removeItem(`${PROGRESS_KEY}.${b}`);
+    } catch { /* nothing was saved */ }
+}
+
+function saveProgressForm() {
+    clearProgress();
+    storeProgress(PROGRESS_KEY, JSON.stringify({ bank: BANK_HASH, length: quizLength, questions: selectedQuestions }));
+    progressSaved = true;
+}
+
+// Note a changed answer (or, without a position, just the current question)
+function scheduleProgressSave(position = -1) {
+    if (!progressSaved) return;
+    if (position >= 0) dirtyProgressBlocks.add(Math.floor(position / PROGRESS_BLOCK));
+    clearTimeout(progressTimer);
+    progressTimer = setTimeout(flushProgress, PROGRESS_DEBOUNCE_MS);
+}
+
+function flushProgress() {
+    clearTimeout(progressTimer);
+    progressTimer = null;
+    if (!progressSaved) return;
+    for (const b of dirtyProgressBlocks) {
+        let digits = '';
+        const end = Math.min(answers.length, (b + 1) * PROGRESS_BLOCK);
+        for (let pos = b * PROGRESS_BLOCK; pos < end; pos++) {
+            digits += answers[pos] === null ? '0' : (answers[pos] + 1).toString(16);
+        }
+        storeProgress(`${PROGRESS_KEY}.${b}`, digits);
+    }
+    dirtyProgressBlocks.clear();
+    storeProgress(`${PROGRESS_KEY}.position`, String(currentQuestion));
+}
+
+// The saved session, or null if there is none. A session recorded against
+// another question bank (BANK_HASH differs) cannot be read back and is dropped.
+function loadProgress() {
+    let form, blocks = [], position;
+    try {
+        form = JSON.parse(localStorage.getItem(PROGRESS_KEY));
+        if (!form) return null;
+        for (let b = 0; b * PROGRESS_BLOCK < (form.questions || []).length; b++) {
+            blocks.push(localStorage.getItem(`${PROGRESS_KEY}.${b}`) || '');
+        }
+        position = parseInt(localStorage.getItem(`${PROGRESS_KEY}.position`), 10);
+    } catch { return null; }
+    const questions = form.questions;
+    if (form.bank !== BANK_HASH || !Array.isArray(questions) || questions.length === 0 ||
+        !questions.every(q => Number.isInteger(q) && q >= 0 && q < QUESTIONS.length)) {
+        clearProgress();
+        return null;
+    }
+    const saved = new Array(questions.length).fill(null);
+    blocks.forEach((digits, b) => {
+        for (let i = 0; i < digits.length && b * PROGRESS_BLOCK + i < saved.length; i++) {
+            const pos = b * PROGRESS_BLOCK + i;
+            const option = parseInt(digits[i], 16) - 1;
+            if (option >= 0 && option < QUESTIONS[questions[pos]].options.length) saved[pos] = option;
+        }
+    });
+    return {
+        length: form.length,
+        questions,
+        answers: saved,
+        position: position >= 0 && position < questions.length ? position : 0
+    };
+}
+
+// Reopen a saved session where it was left; false if there is none
+function resumeQuiz() {
+    const saved = loadProgress();
+    if (!saved) return false;
+    setQuizLength(saved.length);
+    initScores();
+    selectedQuestions = saved.questions;
+    categoryQuestions = {};
+    CATEGORIES.forEach(cat => { categoryQuestions[cat.id] = []; });
+    selectedQuestions.forEach(q => categoryQuestions[CATEGORIES[QUESTION_CATEGORY[q]].id].push(q));
+    answers = saved.answers;
+    indexSelection();
+    answers.forEach((answer, pos) => {
+        if (answer === null) return;
+        answeredCount++;
+        categoryAnswered[positionCategory[pos]]++;
+    });
+    currentQuestion = saved.position;
+    progressSaved = true;
+    openQuiz();
+    return true;
+}
+
 // =============================================
 // SCORING AND RESULTS
 // =============================================
 
 // Track how many questions the user answered that contributed to each school
-let matchCounts = {};
+let matchCounts = new Uint16Array(SCHOOL_COUNT);
+// Chosen option row per question index (-1 if not answered) and the
+// question's position in the form (-1 if not asked), filled by indexAnswers()
+const answerRows = new Int16Array(QUESTIONS.length);
+const answerPositions = new Int16Array(QUESTIONS.length);
+// Hybrid score per school index, filled by rankSchools()
+const hybridScores = new Float64Array(SCHOOL_COUNT);
 
 function calculateScores() {
     initScores();
-    // Reset match counts
-    matchCounts = {};
-    Object.keys(scores).forEach(code => matchCounts[code] = 0);
-    
-    answers.forEach((ans, i) => {
-        if (ans === null) return;
+    for (let i = 0; i < answers.length; i++) {
+        const ans = answers[i];
+        if (ans === null) continue;
         const qIndex = selectedQuestions[i];
-        const q = QUESTIONS[qIndex];
-        const weights = q.options[ans][1];
-        Object.entries(weights).forEach(([code, w]) => {
-            if (scores.hasOwnProperty(code)) {
-                scores[code] += w;
-                matchCounts[code]++;  // Count this as a match for this school
-            }
-        });
-        Object.entries(q.axis_weights || {}).forEach(([ax, w]) => {
-            if (axisScores.hasOwnProperty(ax)) axisScores[ax] += w;
-        });
-    });
+        const row = OPTION_ROW_BASE[qIndex] + ans;
+        for (let k = WEIGHT_ROW_START[row], end = WEIGHT_ROW_START[row + 1]; k < end; k++) {
+            const s = WEIGHT_SCHOOL[k];
+            scores[s] += WEIGHT_VALUE[k];
+            matchCounts[s]++;  // Count this as a match for this school
+        }
+        for (let k = AXIS_ROW_START[qIndex], end = AXIS_ROW_START[qIndex + 1]; k < end; k++) {
+            axisScores[AXIS_WEIGHT_AXIS[k]] += AXIS_WEIGHT_VALUE[k];
+        }
+    }
 }
 
 // Hybrid scoring formula: 65% percentage of max + 35% match rate
-// Returns a score from 0-100
-function calculateHybridScore(code) {
-    const rawScore = scores[code] || 0;
-    const maxPossible = MAX_POSSIBLE_SCORES[code] || 1;
-    const questionCount = SCHOOL_QUESTION_COUNTS[code] || 1;
-    const matches = matchCounts[code] || 0;
-    
-    const pctOfMax = rawScore / maxPossible;
-    const matchRate = matches / questionCount;
-    
+// Returns a score from 0-100 for the school at index s
+function calculateHybridScore(s) {
+    const pctOfMax = scores[s] * SCHOOL_INV_MAX_POSSIBLE[s];
+    const matchRate = matchCounts[s] * SCHOOL_INV_QUESTION_COUNT[s];
+
     // Weighted average: 65% raw percentage, 35% match rate
     return (0.65 * pctOfMax + 0.35 * matchRate) * 100;
 }
 
+// School indices sorted by hybrid score, skipping schools with fewer than
+// MIN_QUESTIONS_THRESHOLD questions. Ties keep SCHOOLS order.
+function rankSchools() {
+    const ranked = [];
+    for (let s = 0; s < SCHOOL_COUNT; s++) {
+        hybridScores[s] = calculateHybridScore(s);
+        if (SCHOOL_ELIGIBLE[s]) ranked.push(s);
+    }
+    return ranked.sort((a, b) => hybridScores[b] - hybridScores[a]);
+}
+
+function indexAnswers() {
+    answerRows.fill(-1);
+    answerPositions.fill(-1);
+    for (let i = 0; i < answers.length; i++) {
+        const qIndex = selectedQuestions[i];
+        answerPositions[qIndex] = i;
+        if (answers[i] !== null) answerRows[qIndex] = OPTION_ROW_BASE[qIndex] + answers[i];
+    }
+}
+
+// The user's answers that weight school s, as { q, option, weight }, largest
+// weight first (ties keep question order). Walks only the school's entries
+// in the reverse index.
+function schoolContributions(s) {
+    const found = [];
+    for (let k = SCHOOL_ENTRY_START[s], end = SCHOOL_ENTRY_START[s + 1]; k < end; k++) {
+        const row = SCHOOL_ENTRY_ROW[k];
+        const q = ROW_QUESTION[row];
+        if (answerRows[q] === row) found.push({ q, option: row - OPTION_ROW_BASE[q], weight: SCHOOL_ENTRY_VALUE[k] });
+    }
+    return found.sort((a, b) => b.weight - a.weight);
+}
+
+// The changed answers that would raise school s's hybrid score most, as
+// { q, option, gain } with gain in hybrid points: at most one per asked
+// question, best first. A question's rows are contiguous, so its entries in
+// the reverse index are too, and only s's entries are visited.
+function schoolImprovements(s, limit = 3) {
+    const pct = 0.65 * SCHOOL_INV_MAX_POSSIBLE[s];
+    const match = 0.35 * SCHOOL_INV_QUESTION_COUNT[s];
+    const found = [];
+    for (let k = SCHOOL_ENTRY_START[s], end = SCHOOL_ENTRY_START[s + 1], groupEnd; k < end; k = groupEnd) {
+        const q = ROW_QUESTION[SCHOOL_ENTRY_ROW[k]];
+        let current = 0, matched = 0;
+        for (groupEnd = k; groupEnd < end && ROW_QUESTION[SCHOOL_ENTRY_ROW[groupEnd]] === q; groupEnd++) {
+            if (SCHOOL_ENTRY_ROW[groupEnd] === answerRows[q]) {
+                current = SCHOOL_ENTRY_VALUE[groupEnd];
+                matched = 1;
+            }
+        }
+        if (answerPositions[q] < 0) continue;
+        const base = OPTION_ROW_BASE[q];
+        let best = null;
+        for (let j = k; j < groupEnd; j++) {
+            if (SCHOOL_ENTRY_ROW[j] === answerRows[q]) continue;
+            const gain = (pct * (SCHOOL_ENTRY_VALUE[j] - current) + match * (1 - matched)) * 100;
+            if (gain > 0 && (!best || gain > best.gain)) best = { q, option: SCHOOL_ENTRY_ROW[j] - base, gain };
+        }
+        // Dropping a negative weight: any option that does not weight s
+        const optionCount = QUESTIONS[q].options.length;
+        if (matched && current < 0 && groupEnd - k < optionCount) {
+            const gain = (pct * -current - match) * 100;
+            if (gain > 0 && (!best || gain > best.gain)) {
+                const weighted = new Set();
+                for (let j = k; j < groupEnd; j++) weighted.add(SCHOOL_ENTRY_ROW[j] - base);
+                let option = 0;
+                while (weighted.has(option)) option++;
+                best = { q, option, gain };
+            }
+        }
+        if (best) found.push(best);
+    }
+    return found.sort((a, b) => b.gain - a.gain).slice(0, limit);
+}
+
+// How each single answer change would affect the top match: for every
+// answered question and every other option, { q, option, rival, margin }
+// where rival is the best school other than the current top after the change
+// and margin its hybrid score minus the top's. The top flips when margin > 0,
+// or margin === 0 and the rival comes first in SCHOOLS order.
+//
+// Moving from row a to row b only changes the schools those rows weight, so
+// each candidate is scored from deltas on scores/matchCounts, and the best
+// unchanged school is the first untouched one in ranked.
+const sensitivityDelta = new Float64Array(SCHOOL_COUNT);
+const sensitivityCountDelta = new Int16Array(SCHOOL_COUNT);
+const sensitivityTouched = new Uint8Array(SCHOOL_COUNT);
+
+function answerSensitivity(ranked) {
+    if (ranked.length < 2) return [];
+    const top = ranked[0];
+    const results = [];
+    const touched = [];
+    const touch = (row, sign) => {
+        for (let k = WEIGHT_ROW_START[row], end = WEIGHT_ROW_START[row + 1]; k < end; k++) {
+            const s = WEIGHT_SCHOOL[k];
+            if (!sensitivityTouched[s]) {
+                sensitivityTouched[s] = 1;
+                touched.push(s);
+            }
+            sensitivityDelta[s] += sign * WEIGHT_VALUE[k];
+            sensitivityCountDelta[s] += sign;
+        }
+    };
+    for (let i = 0; i < answers.length; i++) {
+        if (answers[i] === null) continue;
+        const q = selectedQuestions[i];
+        const base = OPTION_ROW_BASE[q];
+        for (let option = 0; option < QUESTIONS[q].options.length; option++) {
+            if (option === answers[i]) continue;
+            touched.length = 0;
+            touch(base + answers[i], -1);
+            touch(base + option, 1);
+            let topScore = hybridScores[top], rival = -1, rivalScore = 0;
+            for (const s of touched) {
+                const pctOfMax = (scores[s] + sensitivityDelta[s]) * SCHOOL_INV_MAX_POSSIBLE[s];
+                const matchRate = (matchCounts[s] + sensitivityCountDelta[s]) * SCHOOL_INV_QUESTION_COUNT[s];
+                const h = (0.65 * pctOfMax + 0.35 * matchRate) * 100;
+                if (s === top) topScore = h;
+                else if (SCHOOL_ELIGIBLE[s] && (rival < 0 || h > rivalScore || h === rivalScore && s < rival)) {
+                    rival = s;
+                    rivalScore = h;
+                }
+            }
+            for (const s of ranked) {
+                if (s === top || sensitivityTouched[s]) continue;
+                if (rival < 0 || hybridScores[s] > rivalScore || hybridScores[s] === rivalScore && s < rival) {
+                    rival = s;
+                    rivalScore = hybridScores[s];
+                }
+                break;
+            }
+            results.push({ q, option, rival, margin: rivalScore - topScore });
+            for (const s of touched) {
+                sensitivityTouched[s] = 0;
+                sensitivityDelta[s] = 0;
+                sensitivityCountDelta[s] = 0;
+            }
+        }
+    }
+    return results;
+}
+
+// "Q. VII +5" labels for a school's strongest positive contributions
+function contributorsHTML(s, limit) {
+    const top = schoolContributions(s).filter(c => c.weight > 0).slice(0, limit);
+    if (!top.length) return '';
+    return '<div class="school-contributors">Top answers: ' + top.map(c =>
+        `<span title="${QUESTIONS[c.q].text.replace(/"/g, '&quot;')} → ${QUESTIONS[c.q].options[c.option][0].replace(/"/g, '&quot;')}">Q.&nbsp;${ROMAN_NUMERALS[answerPositions[c.q]]}&nbsp;+${c.weight}</span>`
+    ).join(' · ') + '</div>';
+}
+
 function showResults() {
-    const answeredCount = answers.filter(a => a !== null).length;
     if (answeredCount < selectedQuestions.length / 2) {
         if (!confirm(`You've only answered ${answeredCount} of ${selectedQuestions.length} questions. Show results anyway?`)) return;
     }
+    renderResults();
+}
+
+function renderResults() {
     calculateScores();
+    indexAnswers();
+    const ranked = rankSchools();
     document.getElementById('quiz-screen').classList.add('hidden');
     document.getElementById('results-screen').style.display = 'block';
-    renderTopMatch();
-    renderRankings();
+    renderTopMatch(ranked);
+    renderRankings(ranked);
     renderAxes();
+    renderAttribution(ranked);
+    renderSensitivity(ranked);
     window.scrollTo(0, 0);
 }
 
-function renderTopMatch() {
-    const ranked = Object.entries(scores)
-        .filter(([code, score]) => (SCHOOL_QUESTION_COUNTS[code] || 0) >= MIN_QUESTIONS_THRESHOLD)
-        .sort((a, b) => {
-            // Sort by hybrid score
-            const hybridA = calculateHybridScore(a[0]);
-            const hybridB = calculateHybridScore(b[0]);
-            return hybridB - hybridA;
-        });
-    const [topCode, topScore] = ranked[0];
-    const maxPossible = MAX_POSSIBLE_SCORES[topCode] || topScore;
+function renderTopMatch(ranked) {
+    const top = ranked[0];
+    const topCode = SCHOOL_CODES[top];
     const questionCount = SCHOOL_QUESTION_COUNTS[topCode] || 0;
-    const matches = matchCounts[topCode] || 0;
-    const hybridScore = calculateHybridScore(topCode);
-    const pctOfMax = Math.round((topScore / maxPossible) * 100);
-    const matchRate = Math.round((matches / questionCount) * 100);
+    const matches = matchCounts[top];
+    const hybridScore = hybridScores[top];
+    const pctOfMax = Math.round(scores[top] * SCHOOL_INV_MAX_POSSIBLE[top] * 100);
+    const matchRate = Math.round(matches * SCHOOL_INV_QUESTION_COUNT[top] * 100);
     const name = SCHOOL_NAME[topCode] || topCode;
     const desc = SCHOOL_DESC[topCode] || {};
-    const figureData = SCHOOL_FIGURES[topCode] || {};
-    const heterodoxy = HETERODOXY_STATUS[topCode];
+    const figureData = lazyTable('SCHOOL_FIGURES')[topCode] || {};
+    const heterodoxy = lazyTable('HETERODOXY_STATUS')[topCode];
     
     // Build figure section with enhanced data
     let figureHTML = '';
@@ -4959,29 +5438,22 @@ function renderTopMatch() {
     `;
 }
 
-function renderRankings() {
-    // Sort by hybrid score (65% pct of max + 35% match rate)
-    // Filter out schools with fewer than MIN_QUESTIONS_THRESHOLD questions
-    const ranked = Object.entries(scores)
-        .filter(([code, score]) => (SCHOOL_QUESTION_COUNTS[code] || 0) >= MIN_QUESTIONS_THRESHOLD)
-        .sort((a, b) => {
-            const hybridA = calculateHybridScore(a[0]);
-            const hybridB = calculateHybridScore(b[0]);
-            return hybridB - hybridA;
-        });
+function renderRankings(ranked) {
+    // Ranked by hybrid score (65% pct of max + 35% match rate); schools with
+    // fewer than MIN_QUESTIONS_THRESHOLD questions were filtered by rankSchools()
     const tbody = document.getElementById('rankings-body');
     tbody.innerHTML = '';
-    ranked.slice(0, 20).forEach(([code, score], i) => {
-        const maxPossible = MAX_POSSIBLE_SCORES[code] || score || 1;
+    ranked.slice(0, 20).forEach((s, i) => {
+        const code = SCHOOL_CODES[s];
         const questionCount = SCHOOL_QUESTION_COUNTS[code] || 0;
-        const matches = matchCounts[code] || 0;
-        const hybridScore = calculateHybridScore(code);
-        const pctOfMax = Math.round((score / maxPossible) * 100);
-        const matchRate = Math.round((matches / questionCount) * 100);
+        const matches = matchCounts[s];
+        const hybridScore = hybridScores[s];
+        const pctOfMax = Math.round(scores[s] * SCHOOL_INV_MAX_POSSIBLE[s] * 100);
+        const matchRate = Math.round(matches * SCHOOL_INV_QUESTION_COUNT[s] * 100);
         const tr = document.createElement('tr');
         tr.innerHTML = `
             <td class="rank-num ${i < 3 ? 'top-3' : ''}">${i + 1}</td>
-            <td class="school-name">${SCHOOL_NAME[code] || code}<span class="question-count">(${matches}/${questionCount} Qs)</span></td>
+            <td class="school-name">${SCHOOL_NAME[code] || code}<span class="question-count">(${matches}/${questionCount} Qs)</span>${contributorsHTML(s, 3)}</td>
             <td class="score-bar-container">
                 <div class="score-bar"><div class="score-bar-fill" style="width: ${hybridScore}%"></div></div>
                 <div class="score-value">${hybridScore.toFixed(1)}% (${pctOfMax}% pts, ${matchRate}% match)</div>
@@ -4991,11 +5463,73 @@ function renderRankings() {
     });
 }
 
+// "Explain my score": for each of the top schools, the answers that counted
+// towards it and the changes that would have raised it most. Each school
+// costs one walk over its reverse-index entries.
+const ATTRIBUTION_SCHOOLS = 5;
+
+function renderAttribution(ranked) {
+    const answerLabel = (q, option) =>
+        `<span class="attribution-q">Q. ${ROMAN_NUMERALS[answerPositions[q]]}</span>${QUESTIONS[q].options[option][0]}`;
+    document.getElementById('explain-content').innerHTML = ranked.slice(0, ATTRIBUTION_SCHOOLS).map((s, i) => {
+        const code = SCHOOL_CODES[s];
+        const counted = schoolContributions(s).map(c => `
+            <li><span class="attribution-weight ${c.weight < 0 ? 'negative' : ''}">${c.weight > 0 ? '+' : ''}${c.weight}</span>${answerLabel(c.q, c.option)}</li>`).join('');
+        const better = schoolImprovements(s).map(c => `
+            <li><span class="attribution-weight">+${c.gain.toFixed(1)}%</span>${answerLabel(c.q, c.option)}</li>`).join('');
+        return `
+            <details class="attribution" ${i === 0 ? 'open' : ''}>
+                <summary>${i + 1}. ${SCHOOL_NAME[code] || code}<span class="attribution-score">${hybridScores[s].toFixed(1)}%</span></summary>
+                <div class="attribution-label">Your answers that counted (${matchCounts[s]})</div>
+                <ul class="attribution-list">${counted || '<li>None of your answers weighed on this school.</li>'}</ul>
+                ${better ? `<div class="attribution-label">Answers that would have raised it most</div><ul class="attribution-list">${better}</ul>` : ''}
+            </details>
+        `;
+    }).join('');
+}
+
+// Closest alternatives: the single answer changes that would give a
+// different top match, the strongest per rival school. Without any, the
+// change that would bring a rival closest.
+const SENSITIVITY_SHOWN = 5;
+
+function renderSensitivity(ranked) {
+    const container = document.getElementById('sensitivity-content');
+    const results = answerSensitivity(ranked);
+    const top = ranked[0];
+    const flips = (r) => r.margin > 0 || r.margin === 0 && r.rival < top;
+    const byRival = new Map();
+    for (const r of results) {
+        if (flips(r) && !(byRival.get(r.rival)?.margin >= r.margin)) byRival.set(r.rival, r);
+    }
+    const change = r => `<span class="attribution-q">Q. ${ROMAN_NUMERALS[answerPositions[r.q]]}</span>${QUESTIONS[r.q].options[r.option][0]}`;
+    const schoolName = s => SCHOOL_NAME[SCHOOL_CODES[s]] || SCHOOL_CODES[s];
+    // An exact tie still flips the ranking (the earlier school wins it), but has no lead to show.
+    const outcome = r => r.margin > 0
+        ? `would lead by ${r.margin < 0.05 ? 'less than 0.1' : r.margin.toFixed(1)} pts`
+        : 'would tie with it and rank first';
+    const topName = schoolName(top);
+    if (byRival.size) {
+        const shown = [...byRival.values()].sort((a, b) => b.margin - a.margin).slice(0, SENSITIVITY_SHOWN);
+        container.innerHTML = `
+            <div class="attribution-label">Single answers that would change your top match</div>
+            <ul class="attribution-list">${shown.map(r => `
+                <li><strong>${schoolName(r.rival)}</strong> ${outcome(r)} if you had answered:<br>${change(r)}</li>`).join('')}
+            </ul>`;
+        return;
+    }
+    const closest = results.reduce((best, r) => (!best || r.margin > best.margin ? r : best), null);
+    container.innerHTML = closest ? `
+        <p class="attribution-note">No single answer change would displace ${topName}. The closest:
+        <strong>${schoolName(closest.rival)}</strong> would come within ${(-closest.margin).toFixed(1)} pts if you had answered:</p>
+        <ul class="attribution-list"><li>${change(closest)}</li></ul>` : '';
+}
+
 function renderAxes() {
     const container = document.getElementById('axes-content');
     container.innerHTML = '';
-    AXES.forEach(([code, name]) => {
-        const score = axisScores[code] || 0;
+    AXES.forEach(([code, name], a) => {
+        const score = axisScores[a];
         const mult = AXIS_MULTIPLIER[code] || 3;
         const [lo, hi] = AXIS_ENDPOINTS[code] || ['Low', 'High'];
         const normalized = Math.max(0, Math.min(100, 50 + score * mult));
@@ -5023,11 +5557,128 @@ function showTab(tabName, btn) {
 }
 
 function retakeQuiz() {
+    if (location.hash) history.replaceState(null, '', location.pathname + location.search);
     document.getElementById('results-screen').style.display = 'none';
+    // Results from someone else's link are not this visitor's quiz: leave
+    // their own saved progress alone, and go back to it if there is any.
+    if (viewingSharedResults) {
+        viewingSharedResults = false;
+        if (resumeQuiz()) return;
+    } else {
+        clearProgress();
+    }
     document.getElementById('start-screen').classList.remove('hidden');
     window.scrollTo(0, 0);
 }
 
+// =============================================
+// SHARED RESULTS
+// =============================================
+
+// A results link carries the answers in its fragment (#r=...), and whoever
+// opens it scores them again; nothing goes to a server. The token is
+// base64url of: a version byte; the first SHARE_BANK_BYTES bytes of
+// BANK_HASH; a form byte (0: every question was asked, 1: a bitmask of the
+// asked questions follows, question 0 in the low bit); then, for each asked
+// question in question order, option + 1 (0 if unanswered) in just enough
+// bits for its option count, packed from the low bit up.
+// catholic_quiz/share.py reads and writes the same format.
+const SHARE_VERSION = 1;
+const SHARE_BANK_BYTES = 3;
+let viewingSharedResults = false; // the results shown came from a #r= link
+
+function shareBankBytes() {
+    return Array.from({ length: SHARE_BANK_BYTES }, (_, i) => parseInt(BANK_HASH.substr(2 * i, 2), 16));
+}
+
+function encodeResults(selected, given) {
+    const answerOf = new Int16Array(QUESTIONS.length).fill(-2);  // -2: not asked, -1: unanswered
+    selected.forEach((q, pos) => { answerOf[q] = given[pos] === null ? -1 : given[pos]; });
+    const everything = selected.length === QUESTIONS.length;
+    const bytes = [SHARE_VERSION, ...shareBankBytes(), everything ? 0 : 1];
+    if (!everything) {
+        for (let q = 0; q < QUESTIONS.length; q += 8) {
+            let mask = 0;
+            for (let b = 0; b < 8 && q + b < QUESTIONS.length; b++) if (answerOf[q + b] !== -2) mask |= 1 << b;
+            bytes.push(mask);
+        }
+    }
+    let acc = 0, bits = 0;
+    for (let q = 0; q < QUESTIONS.length; q++) {
+        if (answerOf[q] === -2) continue;
+        acc |= (answerOf[q] + 1) << bits;
+        bits += 32 - Math.clz32(QUESTIONS[q].options.length);
+        for (; bits >= 8; bits -= 8, acc >>>= 8) bytes.push(acc & 0xff);
+    }
+    if (bits > 0) bytes.push(acc);
+    return btoa(String.fromCharCode(...bytes)).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+}
+
+// { selected, answers } from a token, or null if it is damaged or was made
+// with another question bank
+function decodeResults(token) {
+    let bytes;
+    try {
+        bytes = Uint8Array.from(atob(token.replace(/-/g, '+').replace(/_/g, '/')), c => c.charCodeAt(0));
+    } catch { return null; }
+    let pos = SHARE_BANK_BYTES + 2;
+    if (bytes.length < pos || bytes[0] !== SHARE_VERSION) return null;
+    if (shareBankBytes().some((byte, i) => bytes[1 + i] !== byte)) return null;
+    const form = bytes[pos - 1];
+    let mask = null;
+    if (form === 1) {
+        mask = bytes.subarray(pos, pos + Math.ceil(QUESTIONS.length / 8));
+        pos += mask.length;
+    } else if (form !== 0) {
+        return null;
+    }
+    const selected = [], given = [];
+    let acc = 0, bits = 0;
+    for (let q = 0; q < QUESTIONS.length; q++) {
+        if (mask && !(mask[q >> 3] >> (q & 7) & 1)) continue;
+        const count = QUESTIONS[q].options.length, width = 32 - Math.clz32(count);
+        for (; bits < width; bits += 8) {
+            if (pos >= bytes.length) return null;
+            acc |= bytes[pos++] << bits;
+        }
+        const value = acc & ((1 << width) - 1);
+        acc >>>= width;
+        bits -= width;
+        if (value > count) return null;
+        selected.push(q);
+        given.push(value === 0 ? null : value - 1);
+    }
+    return selected.length ? { selected, answers: given } : null;
+}
+
+function shareResults(button) {
+    const link = `${location.href.split('#')[0]}#r=${encodeResults(selectedQuestions, answers)}`;
+    navigator.clipboard.writeText(link).then(() => {
+        const original = button.textContent;
+        button.textContent = '✓ Link copied';
+        setTimeout(() => { button.textContent = original; }, 1500);
+    }).catch(() => prompt('Copy this link to share your results:', link));
+}
+
+// Show the results a #r= link carries; false if the page was not opened from one
+function openSharedResults() {
+    const m = /^#r=([A-Za-z0-9_-]+)$/.exec(location.hash);
+    if (!m) return false;
+    const shared = decodeResults(m[1]);
+    if (!shared) {
+        alert('This results link is damaged or was made with a different version of the quiz.');
+        return false;
+    }
+    initScores();
+    selectedQuestions = shared.selected;
+    answers = shared.answers;
+    indexSelection();
+    viewingSharedResults = true;
+    document.getElementById('start-screen').classList.add('hidden');
+    renderResults();
+    return true;
+}
+
 // =============================================
 // AI HELPER FUNCTIONS
 // =============================================
@@ -5059,7 +5710,25 @@ function handleAIKeydown(event) {
     }
 }
 
-function askAIToExplain() {
+// Pre-generated explanations (python -m catholic_quiz explain), loaded on
+// first use. Resolves to {} if the chunk is missing.
+const EXPLANATIONS_URL = 'explanations.js';
+let explanationsLoading = null;
+
+function loadExplanations() {
+    if (!explanationsLoading) {
+        explanationsLoading = new Promise(resolve => {
+            const script = document.createElement('script');
+            script.src = EXPLANATIONS_URL;
+            script.onload = () => resolve(window.QUIZ_EXPLANATIONS || {});
+            script.onerror = () => resolve({});
+            document.head.appendChild(script);
+        });
+    }
+    return explanationsLoading;
+}
+
+async function askAIToExplain() {
     const qIndex = selectedQuestions[currentQuestion];
     const q = QUESTIONS[qIndex];
     const cat = getCategoryForQuestion(qIndex);
@@ -5071,18 +5740,319 @@ function askAIToExplain() {
     }
     
     // Send automatic explanation request
-    const message = `Please explain this question in simpler terms: "${q.text}" 
+    const message = `Please explain this question in simpler terms: "${q.text}"
 
 This question is about ${cat.name}. Help me understand the theological concepts and what each option means.`;
+
+    // Show the stored answer if there is one; follow-ups go to the live model
+    const explanation = (await loadExplanations())[qIndex];
+    if (explanation) {
+        addAIMessage(message, 'user');
+        addAIMessage(explanation.text, 'assistant');
+        recordAIExchange(message, explanation.text);
+        return;
+    }
     
     document.getElementById('ai-input').value = message;
     sendAIMessage();
 }
 
+// =============================================
+// SEARCH
+// =============================================
+
+const SEARCH_RESULT_LIMIT = 40;
+let searchIndex = null;
+
+// Decodes SEARCH_POSTINGS on first use (see catholic_quiz/search.py).
+// Document ids run over the schools, then the questions, then every option.
+function loadSearchIndex() {
+    if (searchIndex) return searchIndex;
+    const bytes = Uint8Array.from(atob(SEARCH_POSTINGS), c => c.charCodeAt(0));
+    let pos = 0;
+    const varint = () => {
+        let value = 0, shift = 0, byte;
+        do {
+            byte = bytes[pos++];
+            value += (byte & 0x7f) * 2 ** shift;
+            shift += 7;
+        } while (byte & 0x80);
+        return value;
+    };
+    const terms = SEARCH_TERMS.split(' ');
+    const start = new Uint32Array(terms.length + 1);
+    const docs = [];
+    for (let t = 0; t < terms.length; t++) {
+        const count = varint();
+        for (let i = 0, doc = 0; i < count; i++) docs.push(doc += varint());
+        start[t + 1] = docs.length;
+    }
+    const options = [];
+    QUESTIONS.forEach((q, qi) => q.options.forEach((_, o) => options.push([qi, o])));
+    searchIndex = { terms, start, docs: Uint16Array.from(docs), options, stopwords: new Set(FUNCTION_WORDS.split(' ')) };
+    return searchIndex;
+}
+
+// Calls visit(doc) for each document containing the token (or, with prefix,
+// any term that starts with it).
+function forEachSearchMatch(index, token, prefix, visit) {
+    const { terms, start, docs } = index;
+    let lo = 0, hi = terms.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (terms[mid] < token) lo = mid + 1; else hi = mid;
+    }
+    for (let t = lo; t < terms.length && (terms[t] === token || prefix && terms[t].startsWith(token)); t++) {
+        for (let p = start[t]; p < start[t + 1]; p++) visit(docs[p]);
+        if (!prefix) break;
+    }
+}
+
+// Documents containing any query word, those matching the most words first;
+// the last word also matches as a prefix unless the query ends in a space.
+function searchQuiz(query, limit = Infinity) {
+    const index = loadSearchIndex();
+    const tokens = [...new Set(indexTokens(query, index.stopwords))];
+    const prefix = !/\s$/.test(query);
+    const matched = new Map();
+    tokens.forEach((token, i) => {
+        const seen = new Set();
+        forEachSearchMatch(index, token, prefix && i === tokens.length - 1, doc => {
+            if (seen.has(doc)) return;
+            seen.add(doc);
+            matched.set(doc, (matched.get(doc) || 0) + 1);
+        });
+    });
+    const ranked = [...matched.keys()].sort((a, b) => matched.get(b) - matched.get(a) || a - b);
+    return ranked.slice(0, limit).map(doc => {
+        if (doc < SCHOOLS.length) return { doc, kind: 'school', code: SCHOOLS[doc][0] };
+        if (doc < SCHOOLS.length + QUESTIONS.length) return { doc, kind: 'question', q: doc - SCHOOLS.length };
+        const [q, o] = index.options[doc - SCHOOLS.length - QUESTIONS.length];
+        return { doc, kind: 'option', q, o };
+    });
+}
+
+function renderSearchResults() {
+    const query = document.getElementById('search-input').value;
+    const container = document.getElementById('search-results');
+    if (!query.trim()) {
+        container.innerHTML = '';
+        return;
+    }
+    const hits = searchQuiz(query);
+    // Query words that name schools: show the weight each option gives them
+    const codes = query.toUpperCase().split(/\s+/).filter(word => word in SCHOOL_NAME);
+    let html = hits.slice(0, SEARCH_RESULT_LIMIT).map(hit => {
+        if (hit.kind === 'school') {
+            return `<div class="search-result"><span class="search-result-ref">${hit.code}</span> <strong>${SCHOOL_NAME[hit.code]}</strong>: ${SCHOOL_DESC[hit.code]?.summary || ''}</div>`;
+        }
+        if (hit.kind === 'question') {
+            return `<div class="search-result"><span class="search-result-ref">Q${hit.q + 1}</span> ${QUESTIONS[hit.q].text}</div>`;
+        }
+        const [text, weights] = QUESTIONS[hit.q].options[hit.o];
+        const scored = codes.filter(code => code in weights).map(code => `${code} ${weights[code] > 0 ? '+' : ''}${weights[code]}`);
+        return `<div class="search-result"><span class="search-result-ref">Q${hit.q + 1}.${hit.o + 1}</span> ${text}${scored.length ? ` <span class="search-result-weights">[${scored.join(' ')}]</span>` : ''}</div>`;
+    }).join('');
+    const shown = Math.min(hits.length, SEARCH_RESULT_LIMIT);
+    html += `<div class="search-summary">${hits.length === 0 ? 'No matches' : `${hits.length} match${hits.length === 1 ? '' : 'es'}${hits.length > shown ? `, showing ${shown}` : ''}`}</div>`;
+    container.innerHTML = html;
+}
+
+// =============================================
+// AI PROMPT ASSEMBLY
+// =============================================
+
+const AI_MAX_OUTPUT_TOKENS = 1000;
+// Conversation turns kept in memory; how many are sent depends on the budget.
+const AI_HISTORY_LIMIT = 40;
+// Chat templates add a few tokens of role markup around every message.
+const AI_MESSAGE_OVERHEAD = 4;
+
+// Shared by every question and every turn, and sent first, so a backend with
+// prompt caching keeps its KV cache instead of re-reading it each time.
+const AI_SYSTEM_PROMPT = `You are a Catholic theological guide helping someone understand complex theological concepts while taking a quiz about Catholic schools of thought.
+
+Be helpful, educational, and explain theological concepts in accessible language. If asked to explain the question, break down the theological terms and what each option represents. Do NOT tell the user which answer to pick - help them understand the concepts so they can decide for themselves based on their own beliefs.
+
+If reference passages are given below, rely on them for any documents, authors or dates you mention, and do not invent sources.
+
+Keep responses concise (2-3 paragraphs max) but informative.`;
+
+// Approximate token count, close to what BPE tokenizers give for English:
+// one per word, number or punctuation mark, plus one per 6 further letters.
+function approxTokens(text) {
+    const pieces = text.match(/[^\s\d\p{P}\p{S}]+|\d+|[\p{P}\p{S}]/gu) || [];
+    let count = 0;
+    for (const piece of pieces) count += 1 + Math.floor((piece.length - 1) / 6);
+    return count;
+}
+
+const AI_SYSTEM_PROMPT_TOKENS = approxTokens(AI_SYSTEM_PROMPT);
+
+// The question-specific part of the system prompt, built and counted once
+// per question.
+const questionContextCache = new Map();
+
+function questionContext(qIndex) {
+    let context = questionContextCache.get(qIndex);
+    if (!context) {
+        const q = QUESTIONS[qIndex];
+        const text = `Current question being asked in the quiz:
+"${q.text}"
+
+Category: ${getCategoryForQuestion(qIndex).name}
+
+Options:
+${q.options.map((opt, i) => `${i + 1}. ${opt[0]}`).join('\n')}`;
+        context = { text, tokens: approxTokens(text) };
+        questionContextCache.set(qIndex, context);
+    }
+    return context;
+}
+
+// Retrieval: BM25 over the reference passages indexed by the build
+// (RETRIEVAL_*). Mirrors catholic_quiz/retrieval.py, which the build checks
+// this against; change both together.
+const RETRIEVAL_K1 = 1.2;
+const RETRIEVAL_B = 0.75;
+const AI_RETRIEVAL_K = 4;
+let retrievalIndex = null;
+
+// Tokenizer shared by retrievePassages and searchQuiz (retrieval.tokenize).
+function indexTokens(text, stopwords) {
+    const words = text.toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g, '').match(/[a-z0-9]+/g) || [];
+    const tokens = [];
+    for (let word of words) {
+        if (word.length < 2 || stopwords.has(word)) continue;
+        if (word.length > 3 && word.endsWith('s') && !'sui'.includes(word[word.length - 2])) word = word.slice(0, -1);
+        tokens.push(word);
+    }
+    return tokens;
+}
+
+function loadRetrievalIndex() {
+    if (retrievalIndex) return retrievalIndex;
+    const terms = RETRIEVAL_TERMS.split(' ');
+    const count = RETRIEVAL_LENGTHS.length;
+    let total = 0;
+    for (let d = 0; d < count; d++) total += RETRIEVAL_LENGTHS[d];
+    const avgLength = total / Math.max(1, count);
+    const norm = new Float64Array(count);
+    for (let d = 0; d < count; d++) {
+        norm[d] = RETRIEVAL_K1 * (1 - RETRIEVAL_B + RETRIEVAL_B * RETRIEVAL_LENGTHS[d] / avgLength);
+    }
+    // Undo the gap encoding: start[t] is where term t's postings begin.
+    const start = new Uint32Array(terms.length + 1);
+    const docs = new Uint16Array(RETRIEVAL_GAPS.length);
+    const idf = new Float64Array(terms.length);
+    for (let t = 0; t < terms.length; t++) {
+        const df = RETRIEVAL_COUNTS[t];
+        start[t + 1] = start[t] + df;
+        for (let p = start[t], doc = 0; p < start[t + 1]; p++) docs[p] = doc += RETRIEVAL_GAPS[p];
+        idf[t] = Math.log(1 + (count - df + 0.5) / (df + 0.5));
+    }
+    retrievalIndex = {
+        termIds: new Map(terms.map((term, t) => [term, t])),
+        stopwords: new Set((FUNCTION_WORDS + ' ' + RETRIEVAL_NOISE_WORDS).split(' ')),
+        start, docs, idf, norm,
+        scores: new Float64Array(count)
+    };
+    return retrievalIndex;
+}
+
+function passageText(ref) {
+    if (ref[0] === 'c') {
+        const c = ref[1] === 'default' ? DEFAULT_CITATIONS[ref[2]] : lazyTable('CITATIONS')[ref[1]][ref[2]];
+        const byline = [c.author, c.year].filter(Boolean).join(', ');
+        return c.title + (byline ? ` (${byline})` : '') + (c.note ? `. ${c.note}` : '');
+    }
+    if (ref[0] === 't') {
+        const t = QUESTION_TOPICS[ref[1]];
+        return `${t.topic}: ${t.description} Further reading: ${t.reading}`;
+    }
+    if (ref[0] === 's') return `${SCHOOL_NAME[ref[1]]}: ${SCHOOL_DESC[ref[1]].summary}`;
+    const f = lazyTable('SCHOOL_FIGURES')[ref[1]];
+    return `${f.figure} (${f.era}, ${SCHOOL_NAME[ref[1]]}). Works: ${f.works}`;
+}
+
+// The k best passages for a query as { doc, score, text }, best first.
+function retrievePassages(query, k = AI_RETRIEVAL_K) {
+    const index = loadRetrievalIndex();
+    const { start, docs, scores, idf, norm } = index;
+    const touched = [];
+    for (const token of new Set(indexTokens(query, index.stopwords))) {
+        const t = index.termIds.get(token);
+        if (t === undefined) continue;
+        for (let p = start[t]; p < start[t + 1]; p++) {
+            const doc = docs[p], tf = RETRIEVAL_FREQS[p];
+            if (scores[doc] === 0) touched.push(doc);
+            scores[doc] += idf[t] * (tf * (RETRIEVAL_K1 + 1)) / (tf + norm[doc]);
+        }
+    }
+    touched.sort((a, b) => scores[b] - scores[a] || a - b);
+    const results = touched.slice(0, k).map(doc => ({ doc, score: scores[doc], text: passageText(RETRIEVAL_REFS[doc]) }));
+    for (const doc of touched) scores[doc] = 0;
+    return results;
+}
+
+function recordAIExchange(question, answer) {
+    aiMessages.push({ role: 'user', content: question, tokens: approxTokens(question) });
+    aiMessages.push({ role: 'assistant', content: answer, tokens: approxTokens(answer) });
+    if (aiMessages.length > AI_HISTORY_LIMIT) aiMessages = aiMessages.slice(-AI_HISTORY_LIMIT);
+}
+
+// The messages for one turn, sized to the context window minus room for the
+// reply: system prompt, question context, reference passages retrieved for
+// the question and message, then as many of the most recent exchanges as fit. Exchanges that no longer fit are reduced to a one-line
+// note of what was asked. Whole exchanges are dropped, oldest first, so the
+// prompt prefix stays stable across turns for as long as possible.
+function buildAIMessages(qIndex, message, contextTokens = AI_DEFAULT_CONTEXT) {
+    const context = questionContext(qIndex);
+    const budget = contextTokens - AI_MAX_OUTPUT_TOKENS;
+    let used = AI_SYSTEM_PROMPT_TOKENS + context.tokens + approxTokens(message) + 2 * AI_MESSAGE_OVERHEAD;
+    // Passages may take up to a quarter of the budget.
+    const references = [];
+    let referenceTokens = 0;
+    for (const passage of retrievePassages(QUESTIONS[qIndex].text + ' ' + message)) {
+        const line = '- ' + passage.text;
+        const tokens = approxTokens(line);
+        if (referenceTokens + tokens > budget / 4) break;
+        references.push(line);
+        referenceTokens += tokens;
+    }
+    used += referenceTokens;
+    let keep = aiMessages.length;
+    while (keep >= 2) {
+        const cost = aiMessages[keep - 2].tokens + aiMessages[keep - 1].tokens + 2 * AI_MESSAGE_OVERHEAD;
+        if (used + cost > budget) break;
+        used += cost;
+        keep -= 2;
+    }
+    let system = AI_SYSTEM_PROMPT + '\n\n' + context.text;
+    if (references.length) system += "\n\nReference passages from the quiz's sources:\n" + references.join('\n');
+    const dropped = aiMessages.slice(0, keep).filter(m => m.role === 'user');
+    if (dropped.length) {
+        const topics = dropped.map(m => `"${m.content.split(/\s+/).slice(0, 12).join(' ')}"`);
+        let note = `\n\nEarlier in this conversation the user asked: ${topics.join('; ')}.`;
+        while (topics.length > 1 && used + approxTokens(note) > budget) {
+            topics.shift();
+            note = `\n\nEarlier in this conversation the user asked: ${topics.join('; ')}.`;
+        }
+        if (used + approxTokens(note) <= budget) system += note;
+    }
+    return [
+        { role: 'system', content: system },
+        ...aiMessages.slice(keep).map(({ role, content }) => ({ role, content })),
+        { role: 'user', content: message }
+    ];
+}
+
 // =============================================
 // AI HELPER - Local LLM (Ollama / LM Studio / llama.cpp)
 // =============================================
 
+const AI_DEFAULT_CONTEXT = 4096;
+
 const PROVIDER_DEFAULTS = {
     ollama:   { endpoint: 'http://localhost:11434', model: 'llama3.2' },
     lmstudio: { endpoint: 'http://localhost:1234',  model: 'default' },
@@ -5097,16 +6067,18 @@ function loadAISettings() {
         return {
             provider: saved.provider || 'ollama',
             endpoint: saved.endpoint || PROVIDER_DEFAULTS.ollama.endpoint,
-            model:    saved.model    || PROVIDER_DEFAULTS.ollama.model
+            model:    saved.model    || PROVIDER_DEFAULTS.ollama.model,
+            contextTokens: saved.contextTokens || AI_DEFAULT_CONTEXT
         };
-    } catch { return { provider: 'ollama', ...PROVIDER_DEFAULTS.ollama }; }
+    } catch { return { provider: 'ollama', ...PROVIDER_DEFAULTS.ollama, contextTokens: AI_DEFAULT_CONTEXT }; }
 }
 
 function saveAISettings() {
     const settings = {
         provider: document.getElementById('ai-provider').value,
         endpoint: document.getElementById('ai-endpoint').value.replace(/\/+$/, ''),
-        model:    document.getElementById('ai-model').value
+        model:    document.getElementById('ai-model').value,
+        contextTokens: Math.max(2048, parseInt(document.getElementById('ai-context').value, 10) || AI_DEFAULT_CONTEXT)
     };
     localStorage.setItem('catholicQuizAI', JSON.stringify(settings));
     return settings;
@@ -5124,34 +6096,85 @@ function toggleAISettings() {
     document.getElementById('ai-settings').classList.toggle('open');
 }
 
-// Build the correct API URL and request body per provider
-function buildAPIRequest(provider, endpoint, model, messages) {
+// Build the correct API URL and request body per provider.
+// Responses are streamed; parseStreamLine turns one line of the stream into
+// { text, done, queue }, and extractResponse handles servers that ignore
+// `stream`. `queue` ({ position, eta }) comes from the caching proxy while the
+// request waits for a free generation slot.
+//
+// The prompt-caching hints keep the model's KV cache for the shared prompt
+// prefix between turns: Ollama keeps the model loaded (keep_alive) with a
+// context of the configured size, llama.cpp reuses it with cache_prompt.
+function buildAPIRequest(provider, endpoint, model, messages, contextTokens = AI_DEFAULT_CONTEXT) {
     if (provider === 'ollama') {
+        // NDJSON: one JSON object per line, the last with done: true
         return {
             url: `${endpoint}/api/chat`,
             body: {
                 model: model,
                 messages: messages,
-                stream: false,
-                options: { temperature: 0.7, num_predict: 1000 }
+                stream: true,
+                keep_alive: '30m',
+                options: { temperature: 0.7, num_predict: AI_MAX_OUTPUT_TOKENS, num_ctx: contextTokens }
+            },
+            parseStreamLine: (line) => {
+                const data = JSON.parse(line);
+                if (data.error) throw new Error(data.error);
+                return { text: data.message?.content || '', done: !!data.done, queue: data.queue };
             },
             extractResponse: (data) => data.message?.content
         };
     }
-    // LM Studio, llama.cpp, and custom all use OpenAI-compatible format
+    // LM Studio, llama.cpp, and custom all use OpenAI-compatible format:
+    // server-sent events, "data: {...}" per delta and "data: [DONE]" at the end
     return {
         url: `${endpoint}/v1/chat/completions`,
         body: {
             model: model,
             messages: messages,
             temperature: 0.7,
-            max_tokens: 1000,
-            stream: false
+            max_tokens: AI_MAX_OUTPUT_TOKENS,
+            stream: true,
+            ...(provider === 'llamacpp' ? { cache_prompt: true } : {})
+        },
+        parseStreamLine: (line) => {
+            if (line.startsWith(': queue ')) return { text: '', done: false, queue: JSON.parse(line.slice(8)) };
+            if (!line.startsWith('data:')) return { text: '', done: false };
+            const payload = line.slice(5).trim();
+            if (payload === '[DONE]') return { text: '', done: true };
+            const data = JSON.parse(payload);
+            if (data.error) throw new Error(data.error.message || data.error);
+            return { text: data.choices?.[0]?.delta?.content || '', done: false };
         },
         extractResponse: (data) => data.choices?.[0]?.message?.content
     };
 }
 
+// Feed each text delta of a streamed response to onText as it arrives, and
+// queue updates to onQueue.
+async function readChatStream(response, parseStreamLine, onText, onQueue) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value, { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = done ? '' : lines.pop();
+        for (const line of lines) {
+            if (!line.trim()) continue;
+            const delta = parseStreamLine(line.trim());
+            if (delta.queue && onQueue) onQueue(delta.queue);
+            if (delta.text) onText(delta.text);
+            if (delta.done) {
+                reader.cancel().catch(() => {});
+                return;
+            }
+        }
+        if (done) return;
+    }
+}
+
 async function fetchModels() {
     const settings = saveAISettings();
     const listDiv = document.getElementById('ai-model-list');
@@ -5210,10 +6233,65 @@ async function testConnection() {
         }
     } catch (err) {
         statusEl.className = 'ai-test-status error';
-        statusEl.textContent = `✗ ${err.message || 'Failed'}`;
+        const msg = err.message || 'Failed';
+        if (msg.includes('Failed to fetch') || msg.includes('NetworkError') || msg.includes('Load failed')) {
+            statusEl.textContent = '✗ CORS / connection blocked — see instructions below';
+        } else {
+            statusEl.textContent = `✗ ${msg}`;
+        }
     }
 }
 
+// Detect whether we're likely to hit CORS issues
+function getOriginInfo() {
+    const proto = window.location.protocol;
+    return {
+        isFile: proto === 'file:',
+        isLocalhost: window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1',
+        protocol: proto
+    };
+}
+
+function getCORSInstructions(settings) {
+    const origin = getOriginInfo();
+    const lines = [];
+
+    lines.push(`⚠ CORS Error: Your browser blocked the request to ${settings.endpoint}.`);
+    lines.push('');
+
+    if (origin.isFile) {
+        lines.push('You are opening this file directly (file://). Browsers block requests from file:// to localhost for security.');
+        lines.push('');
+        lines.push('FIX — choose one:');
+        lines.push('');
+        lines.push('① Serve this file via a local web server (easiest):');
+        lines.push('   python3 -m http.server 8888');
+        lines.push('   Then open http://localhost:8888/index_FINAL_COMPLETE.html');
+        lines.push('');
+        lines.push('② Or set Ollama to allow all origins:');
+    } else {
+        lines.push('FIX — set your AI server to allow this origin:');
+    }
+
+    lines.push('');
+    if (settings.provider === 'ollama') {
+        lines.push('   macOS:    launchctl setenv OLLAMA_ORIGINS "*" && ollama serve');
+        lines.push('   Linux:    OLLAMA_ORIGINS="*" ollama serve');
+        lines.push('   Windows:  set OLLAMA_ORIGINS=* then start Ollama');
+        lines.push('   Docker:   -e OLLAMA_ORIGINS="*"');
+    } else {
+        lines.push('   Start your server with CORS headers allowing this origin.');
+        lines.push('   For LM Studio: enable "Allow Cross-Origin" in server settings.');
+    }
+
+    lines.push('');
+    lines.push('Or run the caching proxy from the quiz repository (it adds CORS headers and');
+    lines.push('answers repeated questions from its cache), then set the endpoint to http://localhost:8765:');
+    lines.push(`   python -m catholic_quiz proxy --backend ${settings.endpoint}`);
+
+    return lines.join('\n');
+}
+
 async function sendAIMessage() {
     const input = document.getElementById('ai-input');
     const message = input.value.trim();
@@ -5234,65 +6312,58 @@ async function sendAIMessage() {
     messagesDiv.appendChild(typingDiv);
     messagesDiv.scrollTop = messagesDiv.scrollHeight;
     
-    // Get current question context
-    const qIndex = selectedQuestions[currentQuestion];
-    const q = QUESTIONS[qIndex];
-    const cat = getCategoryForQuestion(qIndex);
-    
-    const systemPrompt = `You are a Catholic theological guide helping someone understand complex theological concepts while taking a quiz about Catholic schools of thought. 
-
-Current question being asked in the quiz:
-"${q.text}"
-
-Category: ${cat.name}
-
-Options:
-${q.options.map((opt, i) => `${i + 1}. ${opt[0]}`).join('\n')}
-
-Be helpful, educational, and explain theological concepts in accessible language. If asked to explain the question, break down the theological terms and what each option represents. Do NOT tell the user which answer to pick - help them understand the concepts so they can decide for themselves based on their own beliefs.
-
-Keep responses concise (2-3 paragraphs max) but informative.`;
-
-    // Build messages array with conversation history
-    const messages = [
-        { role: 'system', content: systemPrompt },
-        ...aiMessages.slice(-8),
-        { role: 'user', content: message }
-    ];
-
     const settings = loadAISettings();
+    const messages = buildAIMessages(selectedQuestions[currentQuestion], message, settings.contextTokens);
 
     try {
-        const { url, body, extractResponse } = buildAPIRequest(
-            settings.provider, settings.endpoint, settings.model, messages
+        const { url, body, parseStreamLine, extractResponse } = buildAPIRequest(
+            settings.provider, settings.endpoint, settings.model, messages, settings.contextTokens
         );
 
+        const started = performance.now();
         const response = await fetch(url, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(body)
         });
         
-        typingDiv.remove();
-        
         if (!response.ok) {
+            typingDiv.remove();
             const errData = await response.json().catch(() => ({}));
             console.error('Local AI error:', errData);
             throw new Error(errData.error?.message || `HTTP ${response.status}`);
         }
 
-        const data = await response.json();
-        const aiResponse = extractResponse(data);
+        let aiResponse = '';
+        let data = null;
+        const contentType = response.headers.get('Content-Type') || '';
+        if (response.body && !contentType.startsWith('application/json')) {
+            // Render tokens as they arrive; the typing indicator stays up
+            // until the first one.
+            let messageDiv = null;
+            await readChatStream(response, parseStreamLine, text => {
+                if (!messageDiv) {
+                    typingDiv.remove();
+                    console.debug(`AI helper: first token after ${Math.round(performance.now() - started)} ms`);
+                    messageDiv = addAIMessage('', 'assistant');
+                }
+                aiResponse += text;
+                appendAIMessageText(messageDiv, text);
+            }, queue => {
+                const eta = queue.eta ? `, about ${Math.ceil(queue.eta)} s` : '';
+                typingDiv.firstChild.data = queue.position === 0
+                    ? `Next in line${eta}`
+                    : `Waiting: ${queue.position} ahead${eta}`;
+            });
+        } else {
+            data = await response.json();
+            aiResponse = extractResponse(data) || '';
+            if (aiResponse) addAIMessage(aiResponse, 'assistant');
+        }
+        if (typingDiv.parentNode) typingDiv.remove();
         
         if (aiResponse) {
-            addAIMessage(aiResponse, 'assistant');
-            aiMessages.push({ role: 'user', content: message });
-            aiMessages.push({ role: 'assistant', content: aiResponse });
-            
-            // Keep conversation history manageable
-            if (aiMessages.length > 10) {
-                aiMessages = aiMessages.slice(-10);
-            }
+            recordAIExchange(message, aiResponse);
         } else {
             console.error('Unexpected response:', data);
             addAIMessage('The model returned an empty response. Try rephrasing your question or check your model settings.', 'system');
@@ -5301,19 +6372,13 @@ Keep responses concise (2-3 paragraphs max) but informative.`;
         if (typingDiv.parentNode) typingDiv.remove();
         console.error('AI Helper error:', error);
 
-        const isConnectionError = error.message?.includes('Failed to fetch') || error.message?.includes('NetworkError');
-        if (isConnectionError) {
-            addAIMessage(
-                `Unable to connect to ${settings.provider} at ${settings.endpoint}. ` +
-                `Make sure your local AI server is running.\n\n` +
-                `Quick start:\n` +
-                `• Ollama: install from ollama.com, then run "ollama run ${settings.model}"\n` +
-                `• LM Studio: download from lmstudio.ai, load a model, start the server\n\n` +
-                `Click ⚙ above to configure your connection.`,
-                'system'
-            );
+        const msg = error.message || '';
+        const isCORS = msg.includes('Failed to fetch') || msg.includes('NetworkError') || msg.includes('Load failed') || msg.includes('TypeError');
+        
+        if (isCORS) {
+            addAIMessage(getCORSInstructions(settings), 'system');
         } else {
-            addAIMessage(`Error: ${error.message}. Check ⚙ settings or try a different model.`, 'system');
+            addAIMessage(`Error: ${msg}. Check ⚙ settings or try a different model.`, 'system');
         }
     }
     
@@ -5324,9 +6389,29 @@ function addAIMessage(content, role) {
     const messagesDiv = document.getElementById('ai-messages');
     const messageDiv = document.createElement('div');
     messageDiv.className = `ai-message ${role}`;
-    messageDiv.textContent = content;
+    if (role === 'system') {
+        // Preserve newlines and monospace formatting for instructions
+        messageDiv.style.whiteSpace = 'pre-wrap';
+        messageDiv.style.fontFamily = "'Crimson Pro', Georgia, serif";
+    }
+    messageDiv.appendChild(document.createTextNode(content));
     messagesDiv.appendChild(messageDiv);
     messagesDiv.scrollTop = messagesDiv.scrollHeight;
+    return messageDiv;
+}
+
+// Append streamed text to a message from addAIMessage. Extends its text node
+// in place and scrolls at most once per frame, however fast tokens arrive.
+let aiScrollPending = false;
+function appendAIMessageText(messageDiv, text) {
+    messageDiv.firstChild.appendData(text);
+    if (aiScrollPending) return;
+    aiScrollPending = true;
+    requestAnimationFrame(() => {
+        aiScrollPending = false;
+        const messagesDiv = document.getElementById('ai-messages');
+        messagesDiv.scrollTop = messagesDiv.scrollHeight;
+    });
 }
 
 // Restore saved AI settings on load
@@ -5335,16 +6420,31 @@ function initAISettings() {
     document.getElementById('ai-provider').value = settings.provider;
     document.getElementById('ai-endpoint').value = settings.endpoint;
     document.getElementById('ai-model').value = settings.model;
+    document.getElementById('ai-context').value = settings.contextTokens;
 }
 
 // =============================================
 // INITIALIZATION
 // =============================================
 
+// sw.js is written by the build: it precaches the page so later visits start
+// from cache and work offline. Service workers need http(s), not file://.
+function registerServiceWorker() {
+    if (!('serviceWorker' in navigator) || !location.protocol.startsWith('http')) return;
+    navigator.serviceWorker.register('sw.js').catch(() => {});
+}
+
 document.addEventListener('DOMContentLoaded', () => {
     initScores();
-    setQuizLength(146);
+    setQuizLength(154);
     initAISettings();
+    if (!openSharedResults()) resumeQuiz();
+    // Pending answers are written at once when the tab is hidden or closed
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') flushProgress();
+    });
+    window.addEventListener('pagehide', flushProgress);
+    registerServiceWorker();
 });
     </script>
 </body>
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""Build index.html from the page source (catholic_quiz_IMPROVED.py)."""
+
+from catholic_quiz.build import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
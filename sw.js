@@ -0,0 +1,73 @@
+// Generated by python -m catholic_quiz build (catholic_quiz/offline.py); do not edit.
+const VERSION = '47484f9e36589341';
+const PRECACHE = [
+    {
+        "url": "index.html",
+        "revision": "9b92b4b07de8f61c"
+    }
+];
+const SHELL_CACHE = 'quiz-shell-' + VERSION;
+const DATA_CACHE = 'quiz-data-' + VERSION;
+const FONT_CACHE = 'quiz-fonts';
+const SHELL = new Set(PRECACHE.filter(entry => !entry.data).map(entry => entry.url));
+const DATA = new Set(PRECACHE.filter(entry => entry.data).map(entry => entry.url));
+
+self.addEventListener('install', event => {
+    const fill = (name, entries) => caches.open(name).then(cache =>
+        cache.addAll(entries.map(entry => new Request(entry.url, { cache: 'reload' }))));
+    event.waitUntil(Promise.all([
+        fill(SHELL_CACHE, PRECACHE.filter(entry => !entry.data)),
+        fill(DATA_CACHE, PRECACHE.filter(entry => entry.data)),
+    ]).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+    const keep = [SHELL_CACHE, DATA_CACHE, FONT_CACHE];
+    event.waitUntil(caches.keys()
+        .then(names => Promise.all(names.filter(name => name.startsWith('quiz-') && !keep.includes(name))
+            .map(name => caches.delete(name))))
+        .then(() => self.clients.claim()));
+});
+
+function cacheable(response) {
+    return response.ok || response.type === 'opaque';
+}
+
+async function cacheFirst(cacheName, request, key = request) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(key, { ignoreSearch: true });
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (cacheable(response)) cache.put(key, response.clone());
+    return response;
+}
+
+async function staleWhileRevalidate(event, cacheName, key) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(key, { ignoreSearch: true });
+    const refresh = fetch(event.request).then(response => {
+        if (cacheable(response)) cache.put(key, response.clone());
+        return response;
+    });
+    if (!cached) return refresh;
+    event.waitUntil(refresh.catch(() => {}));
+    return cached;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin === self.location.origin) {
+        const scope = new URL(self.registration.scope).pathname;
+        if (!url.pathname.startsWith(scope)) return;
+        let name = url.pathname.slice(scope.length);
+        if (request.mode === 'navigate' && name === '') name = PRECACHE[0].url;
+        if (SHELL.has(name)) event.respondWith(cacheFirst(SHELL_CACHE, request, name));
+        else if (DATA.has(name)) event.respondWith(staleWhileRevalidate(event, DATA_CACHE, name));
+    } else if (url.hostname === 'fonts.googleapis.com') {
+        event.respondWith(staleWhileRevalidate(event, FONT_CACHE, request));
+    } else if (url.hostname === 'fonts.gstatic.com') {
+        event.respondWith(cacheFirst(FONT_CACHE, request));
+    }
+});
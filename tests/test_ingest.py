@@ -0,0 +1,134 @@
+"""Crash recovery and write failures of the submission segment log."""
+
+from __future__ import annotations
+
+import errno
+import tempfile
+import unittest
+from pathlib import Path
+
+from catholic_quiz import ingest
+
+PAYLOAD = bytes([1, 0xAB, 0xCD, 0xEF, 0]) + bytes(range(60))
+
+
+class TornTailTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, count: int) -> Path:
+        # A small index interval puts an index entry at every other record or so.
+        log = ingest.SegmentLog(self.directory, fsync="off", index_interval=100)
+        for i in range(count):
+            log.append([PAYLOAD], timestamp=1000 + i)
+        log.close()
+        return ingest.segment_paths(self.directory)[0]
+
+    def test_record_torn_at_indexed_offset(self):
+        segment = self.write(5)
+        torn = ingest.read_index(segment.with_suffix(".idx"))[-1][2]
+        self.assertGreater(torn, 0)
+        with open(segment, "r+b") as fh:
+            fh.truncate(torn + 20)
+
+        log = ingest.SegmentLog(self.directory, fsync="off", index_interval=100)
+        self.assertEqual(segment.stat().st_size, torn)
+        kept = [record.timestamp for record in ingest.scan(self.directory)]
+        self.assertEqual(kept, [1000 + i for i in range(len(kept))])
+        self.assertEqual(log.last_timestamp, kept[-1])
+        log.append([PAYLOAD], timestamp=2000)
+        log.close()
+        self.assertEqual([record.timestamp for record in ingest.scan(self.directory)], kept + [2000])
+
+    def test_torn_tail_between_index_entries(self):
+        segment = self.write(5)
+        size = segment.stat().st_size
+        with open(segment, "ab") as fh:
+            fh.write(b"\x10\x00\x00\x00torn")
+        ingest.SegmentLog(self.directory, fsync="off", index_interval=100).close()
+        self.assertEqual(segment.stat().st_size, size)
+        self.assertEqual(len(list(ingest.scan(self.directory))), 5)
+
+
+class FlakyFile:
+    """Stands in for a segment file: writes at most ``limit`` bytes per call,
+    and after ``fail_after`` bytes in total raises ENOSPC (once)."""
+
+    def __init__(self, fh, limit: int | None = None, fail_after: int | None = None, truncate_fails: bool = False):
+        self.fh = fh
+        self.limit = limit
+        self.fail_after = fail_after
+        self.truncate_fails = truncate_fails
+
+    def write(self, data) -> int:
+        data = data[:self.limit] if self.limit else data
+        if self.fail_after is not None:
+            written = self.fh.write(data[:self.fail_after])
+            self.fail_after -= written
+            if self.fail_after == 0:
+                self.fail_after = None
+                raise OSError(errno.ENOSPC, "No space left on device")
+            return written
+        return self.fh.write(data)
+
+    def truncate(self, size: int) -> int:
+        if self.truncate_fails:
+            raise OSError(errno.EIO, "I/O error")
+        return self.fh.truncate(size)
+
+    def __getattr__(self, name):
+        return getattr(self.fh, name)
+
+
+class WriteFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.log = ingest.SegmentLog(self.directory, fsync="off", index_interval=100)
+
+    def tearDown(self):
+        self.log.close()
+        self.tmp.cleanup()
+
+    def timestamps(self) -> list[int]:
+        return [record.timestamp for record in ingest.scan(self.directory)]
+
+    def test_partial_write_is_rolled_back(self):
+        for i in range(3):
+            self.log.append([PAYLOAD], timestamp=1000 + i)
+        self.log.segment = FlakyFile(self.log.segment, fail_after=30)
+        with self.assertRaises(OSError):
+            self.log.append([PAYLOAD], timestamp=1003)
+        for i in range(4, 8):
+            self.log.append([PAYLOAD], timestamp=1000 + i)
+        expected = [1000, 1001, 1002, 1004, 1005, 1006, 1007]
+        self.assertEqual(self.timestamps(), expected)
+
+        # Recovery on reopening keeps every acknowledged record.
+        self.log.close()
+        self.log = ingest.SegmentLog(self.directory, fsync="off", index_interval=100)
+        self.assertEqual(self.timestamps(), expected)
+        self.assertEqual(ingest.scan(self.directory, since=1006).__next__().timestamp, 1006)
+
+    def test_short_writes_are_completed(self):
+        self.log.segment = FlakyFile(self.log.segment, limit=7)
+        self.log.append([PAYLOAD] * 5, timestamp=1000)
+        self.log.append([PAYLOAD], timestamp=1001)
+        self.assertEqual(self.timestamps(), [1000] * 5 + [1001])
+
+    def test_failed_rollback_moves_to_a_new_segment(self):
+        self.log.append([PAYLOAD], timestamp=1000)
+        self.log.segment = FlakyFile(self.log.segment, fail_after=30, truncate_fails=True)
+        with self.assertRaises(OSError):
+            self.log.append([PAYLOAD], timestamp=1001)
+        self.log.append([PAYLOAD], timestamp=1002)
+        self.assertEqual(len(ingest.segment_paths(self.directory)), 2)
+        self.assertEqual(self.timestamps(), [1000, 1002])
+
+
+if __name__ == "__main__":
+    unittest.main()